@@ -2,12 +2,24 @@ from flask import Flask, request, jsonify, render_template
 from flask_cors import CORS
 import os
 
-from routes.generate import bp as generate_bp
+from routes.generate import bp as generate_bp, start_warmup
+from routes.export import bp as export_bp
 
 app = Flask(__name__)
 CORS(app)
 
 app.register_blueprint(generate_bp)
+app.register_blueprint(export_bp)
+
+
+def start_background_tasks():
+    """
+    Load the schema model and cache its system prompt before the first
+    request. Call once in each serving process (the dev server below does);
+    importing the app starts nothing.
+    """
+    if os.environ.get("OLLAMA_WARMUP", "1").lower() in ("1", "true", "yes"):
+        start_warmup()
 
 @app.route('/')
 def index():
@@ -32,4 +44,7 @@ def chat():
 
 if __name__ == '__main__':
     port = int(os.environ.get('FLASK_PORT', 5000))
+    # The debug reloader runs this file twice; only the child process serves
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_tasks()
     app.run(debug=True, port=port, host='0.0.0.0')
\ No newline at end of file
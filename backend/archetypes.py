@@ -0,0 +1,280 @@
+# /backend/archetypes.py
+"""
+MechaStream — Zero-LLM fast path.
+Generic prompts ("portfolio for a photographer", "pricing page for my SaaS")
+are matched by keyword scoring to a parameterized template schema, filled
+from the prompt and validated locally — no Ollama call. Prompts that are
+long, multi-page, complex or ask for components code_builder can't render
+are left to the LLM.
+Config from env: ARCHETYPE_FAST_PATH, ARCHETYPE_CONFIDENCE.
+"""
+
+import copy
+import os
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from schema_validator import detect_complexity, estimate_page_count, validate_schema_data
+
+ARCHETYPE_FAST_PATH = os.environ.get("ARCHETYPE_FAST_PATH", "1").lower() in ("1", "true", "yes")
+ARCHETYPE_CONFIDENCE = float(os.environ.get("ARCHETYPE_CONFIDENCE", 0.6))
+
+# Prompts longer than this carry specifics a template would ignore
+MAX_PROMPT_WORDS = 25
+
+# Anything asking for these needs components code_builder can't render yet
+UNSUPPORTED_HINTS = (
+    "dashboard", "admin", "table", "chart", "graph", "form", "login", "sign in", "signup form",
+    "sidebar", "modal", "crud", "database", "checkout", "cart", "blog posts",
+)
+
+COLOR_WORDS = {
+    "blue": "#3b82f6", "green": "#22c55e", "red": "#ef4444", "purple": "#8b5cf6",
+    "orange": "#f97316", "pink": "#ec4899", "teal": "#14b8a6", "yellow": "#eab308",
+    "indigo": "#6366f1", "black": "#111827", "gold": "#d4a017",
+}
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# TEMPLATES
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# "{brand}", "{subject}" and "{subject_title}" are filled from the prompt;
+# "subject" is the fallback when the prompt doesn't name one.
+
+ARCHETYPES: Dict[str, Dict[str, Any]] = {
+    "saas": {
+        "keywords": {"saas": 3, "software": 2, "startup": 2, "platform": 2, "app": 1, "tool": 1,
+                     "product": 1, "subscription": 1, "b2b": 2, "api": 1},
+        "subject": "product",
+        "label": "",
+        "type": "saas",
+        "theme": {"primaryColor": "#6366f1", "fontFamily": "inter", "borderRadius": "rounded", "spacing": "normal"},
+        "sections": [
+            ("Navbar", {"logo": "{brand}", "links": ["Features", "Pricing", "Testimonials"]}),
+            ("Hero", {"headline": "{brand} — the smarter way to work",
+                      "subheadline": "Everything your team needs, in one place.",
+                      "ctaText": "Start Free Trial", "ctaLink": "/signup"}),
+            ("Features", {"title": "Why teams choose {brand}"}),
+            ("Pricing", {"title": "Simple, transparent pricing"}),
+            ("Testimonials", {"title": "Loved by teams everywhere"}),
+            ("Footer", {"brand": "{brand}", "tagline": "Built for teams that ship."}),
+        ],
+    },
+    "pricing": {
+        "keywords": {"pricing": 3, "pricing page": 6, "plans": 2, "plan": 1, "tiers": 2, "price": 1, "subscription": 1},
+        "subject": "product",
+        "label": "Pricing",
+        "type": "saas",
+        "theme": {"primaryColor": "#6366f1", "fontFamily": "inter", "borderRadius": "rounded", "spacing": "normal"},
+        "sections": [
+            ("Navbar", {"logo": "{brand}", "links": ["Home", "Features", "Pricing"]}),
+            ("Hero", {"headline": "Plans for every stage",
+                      "subheadline": "Start free, upgrade when {brand} grows with you.",
+                      "ctaText": "Compare Plans", "ctaLink": "#pricing"}),
+            ("Pricing", {"title": "Choose your plan"}),
+            ("Testimonials", {"title": "What our customers say"}),
+            ("CTA", {"headline": "Ready to get started?", "subtext": "No credit card required.",
+                     "ctaText": "Start Free"}),
+            ("Footer", {"brand": "{brand}", "tagline": "Simple pricing, no surprises."}),
+        ],
+    },
+    "portfolio": {
+        "keywords": {"portfolio": 3, "photographer": 2, "designer": 2, "artist": 2, "illustrator": 2,
+                     "freelancer": 2, "personal": 1, "resume": 2, "showcase": 1, "my work": 2,
+                     "developer": 1, "architect": 1, "writer": 1},
+        "subject": "creative",
+        "label": "Portfolio",
+        "type": "portfolio",
+        "theme": {"primaryColor": "#111827", "fontFamily": "manrope", "borderRadius": "sharp", "spacing": "relaxed"},
+        "sections": [
+            ("Navbar", {"logo": "{brand}", "links": ["Work", "About", "Contact"]}),
+            ("Hero", {"headline": "{brand}", "subheadline": "{subject_title} crafting thoughtful, memorable work.",
+                      "ctaText": "View My Work", "ctaLink": "#work"}),
+            ("Features", {"title": "Selected Work", "items": [
+                {"icon": "◆", "title": "Project One", "desc": "A recent {subject} project."},
+                {"icon": "◆", "title": "Project Two", "desc": "Client work with lasting impact."},
+                {"icon": "◆", "title": "Project Three", "desc": "A personal favourite."},
+            ]}),
+            ("Testimonials", {"title": "Kind words from clients"}),
+            ("CTA", {"headline": "Let's work together", "subtext": "Available for new projects.",
+                     "ctaText": "Get in Touch"}),
+            ("Footer", {"brand": "{brand}", "tagline": "{subject_title} portfolio."}),
+        ],
+    },
+    "business": {
+        "keywords": {"landing": 1, "business": 2, "agency": 2, "restaurant": 2, "cafe": 2, "bakery": 2,
+                     "shop": 1, "store": 1, "company": 1, "service": 1, "services": 1, "studio": 1,
+                     "gym": 2, "salon": 2, "clinic": 2, "consulting": 2, "homepage": 1, "website": 1},
+        "subject": "business",
+        "label": "",
+        "type": "landing",
+        "theme": {"primaryColor": "#f97316", "fontFamily": "poppins", "borderRadius": "rounded", "spacing": "normal"},
+        "sections": [
+            ("Navbar", {"logo": "{brand}", "links": ["Home", "Services", "Contact"]}),
+            ("Hero", {"headline": "Welcome to {brand}", "subheadline": "Your trusted {subject}.",
+                      "ctaText": "Get in Touch", "ctaLink": "#contact"}),
+            ("Features", {"title": "What we offer"}),
+            ("Testimonials", {"title": "What our customers say"}),
+            ("CTA", {"headline": "Visit {brand} today", "subtext": "We'd love to hear from you.",
+                     "ctaText": "Contact Us"}),
+            ("Footer", {"brand": "{brand}", "tagline": "Your trusted {subject}."}),
+        ],
+    },
+    "launch": {
+        "keywords": {"launch": 2, "waitlist": 3, "coming soon": 3, "beta": 2, "pre-order": 2, "preorder": 2,
+                     "early access": 3},
+        "subject": "product",
+        "label": "",
+        "type": "landing",
+        "theme": {"primaryColor": "#8b5cf6", "fontFamily": "inter", "borderRadius": "pill", "spacing": "relaxed"},
+        "sections": [
+            ("Navbar", {"logo": "{brand}", "links": ["About", "Features"]}),
+            ("Hero", {"headline": "{brand} is coming soon", "subheadline": "Be the first to try our new {subject}.",
+                      "ctaText": "Join the Waitlist", "ctaLink": "#waitlist"}),
+            ("Features", {"title": "What's coming"}),
+            ("Stats", {"title": "Early momentum"}),
+            ("CTA", {"headline": "Get early access", "subtext": "Join the waitlist today.",
+                     "ctaText": "Join Now"}),
+            ("Footer", {"brand": "{brand}", "tagline": "Launching soon."}),
+        ],
+    },
+}
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# CLASSIFIER
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'-]*")
+# An apostrophe only counts inside a word ("Joe's"), never as a closing quote
+_BRAND_WORD = r"[\w&.-]*(?:'\w[\w&.-]*)*"
+_BRAND = re.compile(
+    r"\b(?:called|named|brand(?:ed)?)\s+[\"'‘“]?([A-Za-z0-9]" + _BRAND_WORD + r"(?:\s+[A-Z]" + _BRAND_WORD + r")*)"
+)
+# Double or smart quotes anywhere; single quotes only at word boundaries,
+# so the apostrophes in "it's ... it's" or "Joe's ... Sam's" aren't a quote
+_QUOTED = re.compile(r"[\"“]([^\"“”]{2,40})[\"”]|(?<!\w)['‘]([^'‘’]{2,40})['’](?!\w)")
+_SUBJECT = re.compile(
+    r"\bfor\s+((?:a|an|the|my|our)\s+)?([a-z][a-z0-9 &'-]{1,40}?)(?=\s+(?:called|named|with|that|in|using)\b|[,.!?]|$)",
+    re.IGNORECASE,
+)
+_SUBJECT_STOPWORDS = {"me", "us", "it", "this", "free"}
+
+
+def _mentions(text: str, words: set, phrase: str) -> bool:
+    return phrase in text if " " in phrase else phrase in words
+
+
+def _keyword_hits(text: str, words: set, keywords: Dict[str, float]) -> float:
+    score = 0.0
+    for keyword, weight in keywords.items():
+        if _mentions(text, words, keyword):
+            score += weight
+    return score
+
+
+def classify_prompt(prompt: str) -> Dict[str, Any]:
+    """
+    Score the prompt against every archetype.
+    confidence = margin of the best over the runner-up × strength of the
+    best match, so both ambiguity and weak matches lower it. Prompts the
+    fast path must not handle get confidence 0 and a "reason".
+    """
+    text = prompt.lower()
+    words = set(_WORD.findall(text))
+    scores = {name: _keyword_hits(text, words, a["keywords"]) for name, a in ARCHETYPES.items()}
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    (best, top), (_, second) = ranked[0], ranked[1]
+
+    reason = None
+    if len(text.split()) > MAX_PROMPT_WORDS:
+        reason = "prompt too specific"
+    elif detect_complexity(prompt)["is_complex"]:
+        reason = "complex prompt"
+    elif estimate_page_count(prompt) > 1 or "pages" in words:
+        reason = "multi-page prompt"
+    elif any(_mentions(text, words, hint) for hint in UNSUPPORTED_HINTS):
+        reason = "needs unsupported components"
+
+    if top <= 0 or reason:
+        confidence = 0.0
+    else:
+        confidence = round((top - second) / top * min(1.0, top / 3.0), 3)
+    return {"archetype": best if top > 0 else None, "confidence": confidence, "scores": scores, "reason": reason}
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# TEMPLATE FILLING
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _extract_subject(prompt: str) -> Tuple[Optional[str], bool]:
+    """(subject, looks_like_a_name): "for Acme" names a brand, "for a bakery" doesn't."""
+    match = _SUBJECT.search(prompt)
+    if not match:
+        return None, False
+    subject = match.group(2).strip()
+    if subject.lower() in _SUBJECT_STOPWORDS:
+        return None, False
+    is_name = match.group(1) is None and all(w[:1].isupper() for w in subject.split())
+    return subject, is_name
+
+
+def _extract_brand(prompt: str) -> Optional[str]:
+    match = _BRAND.search(prompt) or _QUOTED.search(prompt)
+    if not match:
+        return None
+    return next(group for group in match.groups() if group).strip()
+
+
+def _fill(value: Any, fields: Dict[str, str]) -> Any:
+    if isinstance(value, str):
+        return value.format_map(fields)
+    if isinstance(value, list):
+        return [_fill(v, fields) for v in value]
+    if isinstance(value, dict):
+        return {k: _fill(v, fields) for k, v in value.items()}
+    return value
+
+
+def build_archetype_schema(name: str, prompt: str) -> Dict[str, Any]:
+    """Fill archetype `name` with the brand, subject and color found in the prompt."""
+    archetype = ARCHETYPES[name]
+    subject, is_name = _extract_subject(prompt)
+    brand = _extract_brand(prompt) or (subject if is_name else None)
+    if subject is None or is_name:
+        subject = archetype["subject"]
+    subject_title = " ".join(w[:1].upper() + w[1:] for w in subject.split())  # keeps "UI", "SaaS"
+    title = brand or " ".join(filter(None, [subject_title, archetype["label"]]))
+
+    theme = dict(archetype["theme"])
+    words = set(_WORD.findall(prompt.lower()))
+    for color, hex_value in COLOR_WORDS.items():
+        if color in words:
+            theme["primaryColor"] = hex_value
+            break
+
+    fields = {"brand": brand or subject_title, "subject": subject, "subject_title": subject_title}
+    return {
+        "meta": {"title": title[:120], "type": archetype["type"], "theme": theme},
+        "pages": [{
+            "name": "Home",
+            "route": "/",
+            "sections": [
+                {"component": component, "variant": "default", "props": _fill(copy.deepcopy(props), fields)}
+                for component, props in archetype["sections"]
+            ],
+        }],
+    }
+
+
+def schema_from_prompt(prompt: str, threshold: float = ARCHETYPE_CONFIDENCE) -> Optional[Dict[str, Any]]:
+    """
+    Validated schema for a generic prompt, or None when the classifier
+    isn't confident (the caller then goes to the LLM).
+    Returns {"schema", "archetype", "confidence"}.
+    """
+    match = classify_prompt(prompt)
+    if match["archetype"] is None or match["confidence"] < threshold:
+        return None
+    result = validate_schema_data(build_archetype_schema(match["archetype"], prompt))
+    if not result["success"]:
+        return None
+    return {"schema": result["schema"], "archetype": match["archetype"], "confidence": match["confidence"]}
@@ -0,0 +1 @@
+# MechaStream microbenchmarks (python -m benchmarks)
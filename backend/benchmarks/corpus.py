@@ -0,0 +1,113 @@
+# /backend/benchmarks/corpus.py
+"""
+MechaStream — Synthetic benchmark corpus.
+Deterministic schemas and code snippets in three sizes: small (1 page ×
+3 sections), typical (3 pages × 5 sections) and max (MAX_PAGES ×
+MAX_SECTIONS_PER_PAGE, every section with full props).
+"""
+
+import json
+import random
+from typing import Any, Dict
+
+from schema_validator import MAX_PAGES, MAX_SECTIONS_PER_PAGE
+
+SIZES = {
+    "small": (1, 3),
+    "typical": (3, 5),
+    "max": (MAX_PAGES, MAX_SECTIONS_PER_PAGE),
+}
+
+PAGE_NAMES = ["Home", "Features", "Pricing", "About", "Contact"]
+FONTS = ["inter", "poppins", "roboto", "manrope"]
+
+# Components code_builder renders, in the order a page usually has them
+BODY_COMPONENTS = ["Hero", "Features", "Stats", "Pricing", "Testimonials", "CTA"]
+
+
+def _props(component: str, rng: random.Random, n: int) -> Dict[str, Any]:
+    words = ["fast", "secure", "simple", "modern", "scalable", "reliable", "smart", "open"]
+    phrase = lambda k: " ".join(rng.choice(words) for _ in range(k)).capitalize()
+    if component == "Navbar":
+        return {"logo": "Acme", "links": PAGE_NAMES[:n]}
+    if component == "Hero":
+        return {"headline": phrase(5), "subheadline": phrase(12), "ctaText": "Get started", "ctaLink": "/signup"}
+    if component == "Features":
+        return {"title": phrase(3), "items": [
+            {"icon": "⚡", "title": phrase(2), "desc": phrase(10)} for _ in range(6)]}
+    if component == "Stats":
+        return {"title": phrase(3), "items": [
+            {"label": phrase(1), "value": f"{rng.randint(1, 99)}K+"} for _ in range(4)]}
+    if component == "Pricing":
+        return {"title": phrase(2), "plans": [
+            {"name": name, "price": f"${price}", "features": [phrase(3) for _ in range(5)]}
+            for name, price in (("Starter", 9), ("Pro", 29), ("Team", 99))]}
+    if component == "Testimonials":
+        return {"title": phrase(3), "items": [
+            {"name": f"Customer {i}", "role": phrase(1), "quote": phrase(15)} for i in range(3)]}
+    if component == "CTA":
+        return {"headline": phrase(4), "subtext": phrase(10), "ctaText": "Start free"}
+    return {"brand": "Acme", "tagline": phrase(6)}
+
+
+def make_schema(pages: int, sections: int, seed: int = 0) -> Dict[str, Any]:
+    """Valid AppSchema dict: every page starts with a Navbar and ends with a Footer."""
+    rng = random.Random(seed)
+    out_pages = []
+    for p in range(pages):
+        body = BODY_COMPONENTS[:max(0, sections - 2)]
+        components = (["Navbar"] + body + ["Footer"])[:sections]
+        out_pages.append({
+            "name": PAGE_NAMES[p],
+            "route": "/" if p == 0 else f"/{PAGE_NAMES[p].lower()}",
+            "sections": [
+                {"component": c, "variant": "default", "props": _props(c, rng, pages)} for c in components
+            ],
+        })
+    return {
+        "meta": {
+            "title": "Acme Cloud",
+            "type": "saas",
+            "theme": {"primaryColor": "#6366f1", "fontFamily": rng.choice(FONTS),
+                      "borderRadius": "rounded", "spacing": "normal"},
+        },
+        "pages": out_pages,
+    }
+
+
+def schema_corpus() -> Dict[str, Dict[str, Any]]:
+    return {size: make_schema(pages, sections, seed=i) for i, (size, (pages, sections)) in enumerate(SIZES.items())}
+
+
+def raw_corpus() -> Dict[str, str]:
+    """Schemas as the model returns them: JSON text."""
+    return {size: json.dumps(schema) for size, schema in schema_corpus().items()}
+
+
+_CODE_FUNCTION = '''
+def compute_{i}(values):
+    """Return running statistics for a list of numbers."""
+    total = 0
+    best = None
+    for v in values:
+        total += v * {i}
+        if best is None or v > best:
+            best = v
+    return {{"total": total, "best": best, "mean": total / max(1, len(values))}}
+'''
+
+
+def make_code(functions: int) -> str:
+    """Harmless Python that passes validate_code (the full set of checks runs)."""
+    body = "".join(_CODE_FUNCTION.format(i=i) for i in range(functions))
+    return "import math\nimport json\n" + body + "\nprint(compute_0([1, 2, 3]))\n"
+
+
+def code_corpus() -> Dict[str, str]:
+    """small ≈ 0.35 KB, typical ≈ 2.4 KB, max just under execution_service.MAX_CODE_LENGTH (10 000 chars)."""
+    corpus = {"small": make_code(1), "typical": make_code(8)}
+    functions = 1
+    while len(make_code(functions + 1)) < 10000:
+        functions += 1
+    corpus["max"] = make_code(functions)
+    return corpus
@@ -0,0 +1,283 @@
+# /backend/benchmarks/run.py
+"""
+MechaStream — Microbenchmarks for the request hot paths.
+Every benchmark runs on the small / typical / max corpus from corpus.py and
+records ops/sec (median of several timed repeats), peak traced memory per
+call and the number of memory blocks allocated by one call and still held
+by its result. Results are compared against a stored baseline JSON so a
+regression shows up as a percentage.
+
+    python -m benchmarks                      # run all, compare to baseline.json
+    python -m benchmarks -k build_app         # only the build_app benchmark (repeatable)
+    python -m benchmarks --save-baseline      # record a new baseline
+    python -m benchmarks --check              # exit 1 on regressions past --tolerance
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.corpus import SIZES, code_corpus, raw_corpus, schema_corpus
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# BENCHMARKS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# name -> factory(size) returning a zero-argument callable. A factory
+# raises ImportError when the code under test can't be imported here.
+
+
+def _validate_schema(size: str) -> Callable[[], Any]:
+    from schema_validator import validate_schema
+
+    raw = raw_corpus()[size]
+    return lambda: validate_schema(raw)
+
+
+def _validate_schema_pydantic(size: str) -> Callable[[], Any]:
+    from schema_validator import _validate_with_pydantic, parse_schema_json
+
+    raw = raw_corpus()[size]
+    return lambda: _validate_with_pydantic(parse_schema_json(raw)[0], raw)
+
+
+def _build_app(size: str) -> Callable[[], Any]:
+    from code_builder import build_app
+
+    schema = schema_corpus()[size]
+    return lambda: build_app(schema)
+
+
+def _build_app_stream(size: str) -> Callable[[], Any]:
+    """iter_build_app consumed as /api/build/stream does: encode each event and drop it."""
+    from code_builder import iter_build_app
+
+    schema = schema_corpus()[size]
+
+    def stream():
+        sent = 0
+        for event in iter_build_app(schema):
+            sent += len(json.dumps(event))
+        return sent
+    return stream
+
+
+def _build_zip(size: str) -> Callable[[], Any]:
+    from code_builder import build_app
+    from exporter import build_zip
+
+    built = build_app(schema_corpus()[size])
+    return lambda: build_zip(built).getvalue()
+
+
+def _zip_stream(size: str) -> Callable[[], Any]:
+    """Streamed export as the download route sends it: each chunk is dropped once written."""
+    from code_builder import build_app
+    from exporter import zip_stream
+
+    built = build_app(schema_corpus()[size])
+    return lambda: sum(len(chunk) for chunk in zip_stream(built, parallel=False))
+
+
+def _zip_stream_parallel(size: str) -> Callable[[], Any]:
+    """zip_stream with files deflated on the shared thread pool (scales with cores; no gain on one)."""
+    from code_builder import build_app
+    from exporter import zip_stream
+
+    built = build_app(schema_corpus()[size])
+    return lambda: sum(len(chunk) for chunk in zip_stream(built, parallel=True))
+
+
+def _validate_code(size: str) -> Callable[[], Any]:
+    from execution_service import validate_code  # needs flask_socketio
+
+    code = code_corpus()[size]
+    return lambda: validate_code(code)
+
+
+BENCHMARKS: Dict[str, Callable[[str], Callable[[], Any]]] = {
+    "validate_schema": _validate_schema,
+    "validate_schema_pydantic": _validate_schema_pydantic,  # the fallback path, for comparison
+    "build_app": _build_app,
+    "build_app_stream": _build_app_stream,
+    "build_zip": _build_zip,
+    "zip_stream": _zip_stream,
+    "zip_stream_parallel": _zip_stream_parallel,
+    "validate_code": _validate_code,
+}
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# MEASUREMENT
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def time_ops(fn: Callable[[], Any], min_time: float = 0.2, repeats: int = 5) -> float:
+    """Median ops/sec over `repeats` runs of a loop calibrated to last about `min_time` seconds."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / 4 or number >= 1 << 20:
+            break
+        number *= 2
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+
+    rates = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            for _ in range(number):
+                fn()
+            rates.append(number / (time.perf_counter() - started))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return statistics.median(rates)
+
+
+def measure_memory(fn: Callable[[], Any]) -> Dict[str, float]:
+    """Peak traced KiB during one call, and blocks/KiB allocated by it that its result still holds."""
+    fn()  # warm caches so one-time allocations don't count
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    del result
+    return {
+        "peak_kib": round((peak - base) / 1024, 1),
+        "alloc_blocks": sum(max(0, s.count_diff) for s in diff),
+        "alloc_kib": round(sum(max(0, s.size_diff) for s in diff) / 1024, 1),
+    }
+
+
+def run(names: Optional[List[str]] = None, min_time: float = 0.2, repeats: int = 5) -> Dict[str, Any]:
+    """Run the selected benchmarks. Returns {"results": {name[size]: metrics}, "skipped": {name: reason}}."""
+    results: Dict[str, Dict[str, float]] = {}
+    skipped: Dict[str, str] = {}
+    for name, factory in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        for size in SIZES:
+            try:
+                fn = factory(size)
+            except ImportError as e:
+                skipped[name] = f"{type(e).__name__}: {e}"
+                break
+            metrics = {"ops_per_sec": round(time_ops(fn, min_time, repeats), 1)}
+            metrics.update(measure_memory(fn))
+            results[f"{name}[{size}]"] = metrics
+    return {"results": results, "skipped": skipped}
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# BASELINE
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def environment() -> Dict[str, str]:
+    return {"python": platform.python_version(), "implementation": platform.python_implementation(),
+            "machine": platform.machine(), "platform": sys.platform}
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baseline(results: Dict[str, Dict[str, float]], path: str = BASELINE_PATH) -> None:
+    merged = load_baseline(path).get("results", {})
+    merged.update(results)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": dict(sorted(merged.items()))}, f, indent=2)
+        f.write("\n")
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float = 0.2) -> List[Dict[str, Any]]:
+    """
+    One row per result with % changes against the baseline. A row regresses
+    when ops/sec falls, or peak memory / allocated blocks grow, by more than
+    `tolerance`.
+    """
+    rows = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        row = dict(metrics, name=name, regressions=[])
+        if base:
+            for key, worse_if_lower in (("ops_per_sec", True), ("peak_kib", False), ("alloc_blocks", False)):
+                if not base.get(key):
+                    continue
+                change = (metrics[key] - base[key]) / base[key]
+                row[f"{key}_change"] = change
+                if (-change if worse_if_lower else change) > tolerance:
+                    row["regressions"].append(key)
+        rows.append(row)
+    return rows
+
+
+def format_rows(rows: List[Dict[str, Any]]) -> str:
+    def pct(row, key):
+        change = row.get(f"{key}_change")
+        return "" if change is None else f"{change:+.0%}"
+
+    lines = [f"{'benchmark':<34}{'ops/sec':>12}{'Δ':>7}{'peak KiB':>11}{'Δ':>7}{'blocks':>9}{'Δ':>7}"]
+    for row in rows:
+        flag = "  REGRESSION: " + ", ".join(row["regressions"]) if row["regressions"] else ""
+        lines.append(
+            f"{row['name']:<34}{row['ops_per_sec']:>12,.1f}{pct(row, 'ops_per_sec'):>7}"
+            f"{row['peak_kib']:>11,.1f}{pct(row, 'peak_kib'):>7}"
+            f"{row['alloc_blocks']:>9}{pct(row, 'alloc_blocks'):>7}{flag}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="MechaStream microbenchmarks")
+    parser.add_argument("-k", dest="names", action="append", help="benchmark name (repeatable)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed repeat")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative change (0.2 = 20%%)")
+    parser.add_argument("--check", action="store_true", help="exit 1 if anything regressed")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    out = run(args.names, args.min_time, args.repeats)
+    rows = compare(out["results"], load_baseline(args.baseline).get("results", {}), args.tolerance)
+    if args.json:
+        print(json.dumps({"environment": environment(), "rows": rows, "skipped": out["skipped"]}, indent=2))
+    else:
+        print(format_rows(rows))
+        for name, reason in out["skipped"].items():
+            print(f"skipped {name}: {reason}")
+    if args.save_baseline:
+        save_baseline(out["results"], args.baseline)
+        print(f"baseline written to {args.baseline}")
+    return 1 if args.check and any(row["regressions"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
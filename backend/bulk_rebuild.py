@@ -0,0 +1,275 @@
+# /backend/bulk_rebuild.py
+"""
+MechaStream — Bulk re-render of every stored project.
+After a template change in code_builder.COMPONENT_BUILDERS, each project's
+pages_json is stale. This job streams (id, schema_json, pages_json) from
+`projects` through a server-side cursor, rebuilds them on a process pool
+and writes changed pages_json back with batched UPDATEs. A row whose
+schema_json was edited after it was read is skipped rather than
+overwritten with pages built from the old schema. It resumes from a
+checkpoint file holding the last id whose batch was committed, and can be
+throttled to a max rows/sec so it doesn't starve the live database.
+
+    python bulk_rebuild.py                       # all projects, resume from checkpoint
+    python bulk_rebuild.py --max-rate 200        # at most 200 rows/sec
+    python bulk_rebuild.py --dry-run --restart   # rebuild everything, write nothing
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+BULK_REBUILD_WORKERS = int(os.environ.get("BULK_REBUILD_WORKERS", os.cpu_count() or 2))
+BULK_REBUILD_BATCH_SIZE = int(os.environ.get("BULK_REBUILD_BATCH_SIZE", 200))
+BULK_REBUILD_CHECKPOINT = os.environ.get("BULK_REBUILD_CHECKPOINT", "bulk_rebuild.checkpoint.json")
+
+# ORDER BY projects.id, not the text alias: that sorts by the uuid primary
+# key, so the cursor walks its index instead of sorting the whole table
+SELECT_SQL = (
+    "SELECT id::text AS id, schema_json, pages_json FROM projects"
+    " WHERE schema_json IS NOT NULL AND id > %s::uuid ORDER BY projects.id"
+)
+# Lowest possible uuid: the start when there is no checkpoint
+FIRST_ID = "00000000-0000-0000-0000-000000000000"
+
+# updated_at is left alone: a template re-render isn't a user edit. Only
+# rows whose schema_json still equals the one the pages were built from are
+# written; RETURNING tells the caller how many that was
+UPDATE_SQL = (
+    "UPDATE projects AS p SET pages_json = v.pages_json::jsonb"
+    " FROM (VALUES %s) AS v(id, pages_json, schema_json)"
+    " WHERE p.id = v.id::uuid AND p.schema_json = v.schema_json::jsonb"
+    " RETURNING p.id"
+)
+
+# (id, pages_json as JSON text or None when the row failed / is unchanged,
+#  schema_json as JSON text the pages were built from, error)
+Result = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# WORKER (runs in the process pool)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def rebuild_batch(rows: List[Tuple[str, Any, Any]]) -> List[Result]:
+    """
+    Validate and rebuild one batch of (id, schema_json, pages_json) rows.
+    pages_json comes back serialized (the workers do the JSON encoding), or
+    None when the stored pages are already current, together with the
+    schema_json text it was built from.
+    """
+    from code_builder import build_app
+    from schema_validator import validate_schema_data
+
+    out = []
+    for project_id, schema, current in rows:
+        try:
+            if isinstance(schema, str):
+                schema_text, schema = schema, json.loads(schema)
+            else:
+                schema_text = json.dumps(schema)
+            result = validate_schema_data(schema)
+            if not result["success"]:
+                out.append((project_id, None, None, "; ".join(result["errors"][:3])))
+                continue
+            pages = build_app(result["schema"])["pages"]
+        except Exception as e:  # one bad row must not stop the job
+            out.append((project_id, None, None, f"{type(e).__name__}: {e}"))
+            continue
+        if isinstance(current, str):
+            try:
+                current = json.loads(current)
+            except ValueError:
+                current = None
+        out.append((project_id, None if pages == current else json.dumps(pages), schema_text, None))
+    return out
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# CHECKPOINT
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def load_checkpoint(path: Optional[str]) -> Optional[str]:
+    if not path:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("last_id")
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(path: Optional[str], last_id: str, stats: Dict[str, Any]) -> None:
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"last_id": last_id, "stats": stats, "saved_at": time.time()}, f)
+    os.replace(tmp, path)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# ENGINE
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class Throttle:
+    """Sleeps just enough to keep the overall rate at or below max_rate items/sec (0 = unlimited)."""
+
+    def __init__(self, max_rate: float = 0, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.max_rate = max_rate
+        self._clock = clock
+        self._sleep = sleep
+        self._started = clock()
+        self._count = 0
+        self.slept = 0.0
+
+    def wait(self, n: int) -> None:
+        self._count += n
+        if self.max_rate <= 0:
+            return
+        ahead = self._count / self.max_rate - (self._clock() - self._started)
+        if ahead > 0:
+            self._sleep(ahead)
+            self.slept += ahead
+
+
+def _batches(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Tuple[str, Any, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append((row["id"], row["schema_json"], row.get("pages_json")))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_rebuild(rows: Iterable[Dict[str, Any]], write: Callable[[List[Tuple[str, str, str]]], int],
+                executor: Executor, batch_size: int = BULK_REBUILD_BATCH_SIZE, max_rate: float = 0,
+                checkpoint: Optional[str] = None, max_in_flight: int = 2 * BULK_REBUILD_WORKERS,
+                progress_every: float = 5.0, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """
+    Rebuild `rows` (dicts with id, schema_json, pages_json, ascending id) on
+    `executor`. Batches are written and checkpointed in input order, so the
+    checkpoint never skips an unwritten row; at most `max_in_flight` batches
+    are pending, which bounds memory. `write` receives [(id, pages_json,
+    schema_json)] for the rows whose pages changed, must commit them and
+    returns how many it wrote; the rest count as "skipped" (their schema
+    changed since they were read). Returns the stats.
+    """
+    throttle = Throttle(max_rate)
+    stats = {"rows": 0, "updated": 0, "skipped": 0, "unchanged": 0, "failed": 0, "batches": 0,
+             "last_id": None}
+    failures: List[Tuple[str, str]] = []
+    started = time.monotonic()
+    last_report = started
+    pending: "deque" = deque()
+
+    def drain_one() -> None:
+        nonlocal last_report
+        batch_rows, future = pending.popleft()
+        results = future.result()
+        updates = [(project_id, pages, schema) for project_id, pages, schema, error in results
+                   if pages is not None]
+        written = write(updates) if updates else 0
+        stats["rows"] += len(results)
+        stats["updated"] += written
+        stats["skipped"] += len(updates) - written
+        for project_id, pages, schema, error in results:
+            if error:
+                stats["failed"] += 1
+                failures.append((project_id, error))
+        stats["unchanged"] = stats["rows"] - stats["updated"] - stats["skipped"] - stats["failed"]
+        stats["batches"] += 1
+        stats["last_id"] = batch_rows[-1][0]
+        save_checkpoint(checkpoint, stats["last_id"], stats)
+        throttle.wait(len(results))
+
+        now = time.monotonic()
+        if now - last_report >= progress_every:
+            last_report = now
+            log(format_progress(stats, now - started))
+
+    for batch in _batches(rows, batch_size):
+        pending.append((batch, executor.submit(rebuild_batch, batch)))
+        if len(pending) >= max_in_flight:
+            drain_one()
+    while pending:
+        drain_one()
+
+    elapsed = time.monotonic() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["rows_per_sec"] = round(stats["rows"] / elapsed, 1) if elapsed > 0 else 0.0
+    stats["throttled_seconds"] = round(throttle.slept, 2)
+    stats["failures"] = failures[:100]
+    return stats
+
+
+def format_progress(stats: Dict[str, Any], elapsed: float) -> str:
+    rate = stats["rows"] / elapsed if elapsed > 0 else 0.0
+    return (f"{stats['rows']} rows ({rate:,.1f}/s): {stats['updated']} updated, "
+            f"{stats['skipped']} skipped, {stats['unchanged']} unchanged, {stats['failed']} failed; "
+            f"last id {stats['last_id']}")
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# DATABASE
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def db_writer(conn, page_size: int = BULK_REBUILD_BATCH_SIZE) -> Callable[[List[Tuple[str, str, str]]], int]:
+    """write() for run_rebuild: one multi-row UPDATE per batch, committed at once."""
+    from psycopg2.extras import execute_values
+
+    def write(updates: List[Tuple[str, str, str]]) -> int:
+        with conn.cursor() as cur:
+            written = execute_values(cur, UPDATE_SQL, updates, page_size=page_size, fetch=True)
+        conn.commit()
+        return len(written)
+    return write
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from database.db import connect, iter_rows
+
+    parser = argparse.ArgumentParser(description="Rebuild pages_json for every stored project")
+    parser.add_argument("--workers", type=int, default=BULK_REBUILD_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=BULK_REBUILD_BATCH_SIZE)
+    parser.add_argument("--max-rate", type=float, default=0, help="max rows/sec (0 = unlimited)")
+    parser.add_argument("--checkpoint", default=BULK_REBUILD_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first row")
+    parser.add_argument("--dry-run", action="store_true", help="rebuild and count, but write nothing")
+    args = parser.parse_args(argv)
+
+    start_id = None if args.restart else load_checkpoint(args.checkpoint)
+    print(f"resuming after {start_id}" if start_id else "starting from the first project", flush=True)
+    log = lambda line: print(line, flush=True)
+
+    # The server-side cursor lives in the reader's transaction; the writer
+    # commits every batch on its own connection
+    reader = connect(application_name="mechastream-bulk-rebuild")
+    writer = connect(application_name="mechastream-bulk-rebuild")
+    try:
+        rows = iter_rows(reader, SELECT_SQL, (start_id or FIRST_ID,), batch_size=args.batch_size)
+        write = (lambda updates: len(updates)) if args.dry_run else db_writer(writer, args.batch_size)
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            stats = run_rebuild(rows, write, pool, batch_size=args.batch_size, max_rate=args.max_rate,
+                                checkpoint=None if args.dry_run else args.checkpoint,
+                                max_in_flight=2 * max(1, args.workers), log=log)
+    finally:
+        reader.close()
+        writer.close()
+
+    log(format_progress(stats, stats["seconds"]) + f" in {stats['seconds']}s")
+    for project_id, error in stats["failures"]:
+        log(f"  failed {project_id}: {error}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
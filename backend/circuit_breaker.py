@@ -0,0 +1,163 @@
+# /backend/circuit_breaker.py
+"""
+MechaStream — Circuit breaker for the Ollama dependency.
+Tracks the failure rate and slow-call rate of recent calls. When either
+crosses its threshold the circuit opens and calls fail immediately for
+`open_seconds`; then a few half-open probe calls decide whether to close
+it again or re-open.
+Config from env: OLLAMA_BREAKER_FAILURE_RATE, OLLAMA_BREAKER_SLOW_RATE,
+OLLAMA_BREAKER_SLOW_MS, OLLAMA_BREAKER_WINDOW, OLLAMA_BREAKER_MIN_CALLS,
+OLLAMA_BREAKER_OPEN_SECONDS, OLLAMA_BREAKER_HALF_OPEN_CALLS.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Tuple, Type
+
+OLLAMA_BREAKER_FAILURE_RATE = float(os.environ.get("OLLAMA_BREAKER_FAILURE_RATE", 0.5))
+OLLAMA_BREAKER_SLOW_RATE = float(os.environ.get("OLLAMA_BREAKER_SLOW_RATE", 0.8))
+OLLAMA_BREAKER_SLOW_MS = float(os.environ.get("OLLAMA_BREAKER_SLOW_MS", 30000))
+OLLAMA_BREAKER_WINDOW = int(os.environ.get("OLLAMA_BREAKER_WINDOW", 20))
+OLLAMA_BREAKER_MIN_CALLS = int(os.environ.get("OLLAMA_BREAKER_MIN_CALLS", 5))
+OLLAMA_BREAKER_OPEN_SECONDS = float(os.environ.get("OLLAMA_BREAKER_OPEN_SECONDS", 15))
+OLLAMA_BREAKER_HALF_OPEN_CALLS = int(os.environ.get("OLLAMA_BREAKER_HALF_OPEN_CALLS", 1))
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpen(RuntimeError):
+    """The circuit is open (or its half-open probes are taken); the call was not made."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} is unavailable (circuit open). Retry after {retry_after}s.")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed → open → half-open breaker over a sliding window of
+    the last `window` calls. Exceptions in `failure_types` count as
+    failures, except those in `ignore_types` (e.g. a caller's own deadline
+    running out); calls slower than `slow_ms` count as slow whatever their outcome.
+    Use call(fn, *args), or allow() + record() around a streamed call.
+    """
+
+    def __init__(self, name: str = "Ollama", failure_rate: float = OLLAMA_BREAKER_FAILURE_RATE,
+                 slow_rate: float = OLLAMA_BREAKER_SLOW_RATE, slow_ms: float = OLLAMA_BREAKER_SLOW_MS,
+                 window: int = OLLAMA_BREAKER_WINDOW, min_calls: int = OLLAMA_BREAKER_MIN_CALLS,
+                 open_seconds: float = OLLAMA_BREAKER_OPEN_SECONDS,
+                 half_open_calls: int = OLLAMA_BREAKER_HALF_OPEN_CALLS,
+                 failure_types: Tuple[Type[BaseException], ...] = (RuntimeError,),
+                 ignore_types: Tuple[Type[BaseException], ...] = ()):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.min_calls = max(1, min_calls)
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, half_open_calls)
+        self.failure_types = failure_types
+        self.ignore_types = ignore_types
+        self._calls: deque = deque(maxlen=max(1, window))  # (failed, slow)
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "failures": 0, "slow": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == STATE_OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = STATE_HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def _retry_after(self, now: float) -> int:
+        return max(1, math.ceil(self.open_seconds - (now - self._opened_at)))
+
+    def allow(self) -> None:
+        """Reserve a call. Raises CircuitOpen while open or when half-open probes are taken."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == STATE_HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return
+            if state != STATE_CLOSED:
+                self._stats["rejected"] += 1
+                raise CircuitOpen(self.name, self._retry_after(now) if state == STATE_OPEN else 1)
+
+    def record(self, failed: bool, latency: float) -> None:
+        """Outcome of a call reserved with allow(); latency in seconds."""
+        slow = latency * 1000 >= self.slow_ms
+        now = time.monotonic()
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["failures"] += failed
+            self._stats["slow"] += slow
+            state = self._current_state(now)
+            if state == STATE_HALF_OPEN:
+                if failed or slow:
+                    self._trip(now)
+                else:
+                    self._probes -= 1
+                    if self._probes <= 0:
+                        self._state = STATE_CLOSED
+                        self._calls.clear()
+                return
+            if state == STATE_OPEN:
+                return  # straggler from before the circuit opened
+            self._calls.append((failed, slow))
+            if len(self._calls) >= self.min_calls:
+                n = len(self._calls)
+                failures = sum(1 for f, _ in self._calls if f)
+                slow_calls = sum(1 for _, s in self._calls if s)
+                if failures / n >= self.failure_rate or slow_calls / n >= self.slow_rate:
+                    self._trip(now)
+
+    def _trip(self, now: float) -> None:
+        self._state = STATE_OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self._stats["opened"] += 1
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """fn(*args, **kwargs) through the breaker."""
+        self.allow()
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.record(self.is_failure(e), time.monotonic() - started)
+            raise
+        self.record(False, time.monotonic() - started)
+        return result
+
+    def is_failure(self, error: BaseException) -> bool:
+        return isinstance(error, self.failure_types) and not isinstance(error, self.ignore_types)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._calls.clear()
+            self._probes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            out = dict(self._stats)
+            out["state"] = self._current_state(now)
+            out["window_calls"] = len(self._calls)
+            out["window_failures"] = sum(1 for f, _ in self._calls if f)
+            if out["state"] == STATE_OPEN:
+                out["retry_after"] = self._retry_after(now)
+        return out
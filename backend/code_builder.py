@@ -1,6 +1,6 @@
 # /backend/code_builder.py
 
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # THEME RESOLVER
@@ -242,41 +242,38 @@ COMPONENT_BUILDERS = {
 # MAIN BUILD FUNCTION
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-def build_app(schema: Dict) -> Dict:
+def iter_page_code(page: Dict, theme: Dict) -> Iterator[str]:
     """
-    Takes validated AppSchema dict.
-    Returns generated React code for each page.
+    Generated React code for one validated page, yielded in pieces: the
+    import line, each component definition as it is rendered, then the page
+    component. "".join() of the pieces is the page's code.
     """
-    theme = resolve_theme(schema["meta"]["theme"])
-    app_title = schema["meta"]["title"]
-    pages_output = {}
+    component_names = []
 
-    for page in schema["pages"]:
-        page_name = page["name"]
-        route = page["route"]
-        component_definitions = []
-        component_names = []
+    yield "import React from 'react';\n\n"
+    for section in page["sections"]:
+        component = section["component"]
+        props = section.get("props", {})
 
-        for section in page["sections"]:
-            component = section["component"]
-            props = section.get("props", {})
+        builder = COMPONENT_BUILDERS.get(component)
+        if not builder:
+            continue  # skip unknown components silently
 
-            builder = COMPONENT_BUILDERS.get(component)
-            if not builder:
-                continue  # skip unknown components silently
+        code = builder(props, theme)
+        yield "\n" + code if component_names else code
+        component_names.append(component)
 
-            component_definitions.append(builder(props, theme))
-            component_names.append(component)
+    yield _page_component(page, theme, component_names)
 
-        # Assemble page
-        components_render = "\n      ".join([
-            f"<{name} />" for name in component_names
-        ])
 
-        page_code = f"""
-import React from 'react';
+def _page_component(page: Dict, theme: Dict, component_names: List[str]) -> str:
+    page_name = page["name"]
+    route = page["route"]
+    components_render = "\n      ".join([
+        f"<{name} />" for name in component_names
+    ])
 
-{chr(10).join(component_definitions)}
+    return f"""
 
 // ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 // PAGE: {page_name}
@@ -290,17 +287,225 @@ export default function {page_name.replace(" ", "")}Page() {{
       {components_render}
     </main>
   );
-}}
-"""
-        pages_output[route] = {
-            "name": page_name,
-            "route": route,
-            "code": page_code.strip()
-        }
+}}"""
+
+
+def build_page(page: Dict, theme: Dict) -> Dict:
+    """Generated React code for one validated page under a resolved theme."""
+    return {
+        "name": page["name"],
+        "route": page["route"],
+        "code": "".join(iter_page_code(page, theme))
+    }
+
+
+def build_app(schema: Dict, shared_components: bool = False) -> Dict:
+    """
+    Takes validated AppSchema dict.
+    Returns generated React code for each page.
+    With shared_components, see build_app_shared.
+    """
+    if shared_components:
+        return build_app_shared(schema)
+    theme = resolve_theme(schema["meta"]["theme"])
+    pages_output = {}
+
+    for page in schema["pages"]:
+        pages_output[page["route"]] = build_page(page, theme)
 
     return {
         "success": True,
-        "title": app_title,
+        "title": schema["meta"]["title"],
         "theme": theme,
         "pages": pages_output
     }
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# SHARED COMPONENTS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _utf8_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def build_app_shared(schema: Dict) -> Dict:
+    """
+    build_app with deduplicated components: a rendered component that is
+    identical on two or more pages is emitted once under "components"
+    ({name: {"name", "path", "code"}}, path components/<name>.tsx) and those
+    pages import it instead of inlining it. Variants of one component get
+    numbered names (Navbar, Navbar2, ...). "dedupe" reports the size of
+    the inlined build against the shared one, in UTF-8 bytes.
+    """
+    theme = resolve_theme(schema["meta"]["theme"])
+    pages = _pages_by_route(schema)
+
+    rendered = {}
+    pages_using: Dict[str, int] = {}
+    for route, page in pages.items():
+        sections = []
+        for section in page["sections"]:
+            builder = COMPONENT_BUILDERS.get(section["component"])
+            if not builder:
+                continue  # skip unknown components silently
+            props = section.get("props", {})
+            code = builder(props, theme)
+            sections.append((section["component"], code))
+        rendered[route] = sections
+        for code in {code for _, code in sections}:
+            pages_using[code] = pages_using.get(code, 0) + 1
+
+    modules: Dict[str, str] = {}  # rendered code -> module name
+    components_output = {}
+    variants: Dict[str, int] = {}
+    for sections in rendered.values():
+        for component, code in sections:
+            if pages_using[code] < 2 or code in modules:
+                continue
+            variants[component] = variants.get(component, 0) + 1
+            name = component if variants[component] == 1 else f"{component}{variants[component]}"
+            modules[code] = name
+            components_output[name] = {
+                "name": name,
+                "path": f"components/{name}.tsx",
+                "code": f"import React from 'react';\n\n{code.lstrip()}\n\nexport default {component};\n",
+            }
+
+    pages_output = {}
+    inline_bytes = 0
+    for route, sections in rendered.items():
+        page = pages[route]
+        imports = []
+        definitions = []
+        for component, code in sections:
+            if code in modules:
+                line = f"import {component} from '../components/{modules[code]}';\n"
+                if line not in imports:
+                    imports.append(line)
+            else:
+                definitions.append(code)
+        footer = _page_component(page, theme, [component for component, _ in sections])
+        code = "import React from 'react';\n" + "".join(imports) + "\n" + "\n".join(definitions) + footer
+        pages_output[route] = {"name": page["name"], "route": route, "code": code}
+        inline_bytes += _utf8_len("import React from 'react';\n\n"
+                                  + "\n".join(code for _, code in sections) + footer)
+
+    output_bytes = (sum(_utf8_len(p["code"]) for p in pages_output.values())
+                    + sum(_utf8_len(c["code"]) for c in components_output.values()))
+    saved = inline_bytes - output_bytes
+    return {
+        "success": True,
+        "title": schema["meta"]["title"],
+        "theme": theme,
+        "pages": pages_output,
+        "components": components_output,
+        "dedupe": {
+            "shared_components": len(components_output),
+            "inline_bytes": inline_bytes,
+            "output_bytes": output_bytes,
+            "saved_bytes": saved,
+            "saved_ratio": round(saved / inline_bytes, 3) if inline_bytes else 0.0,
+        },
+    }
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# INCREMENTAL BUILD
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _pages_by_route(schema: Dict) -> Dict[str, Dict]:
+    # Same precedence as build_app: a repeated route keeps its first
+    # position and its last page
+    return {page["route"]: page for page in schema["pages"]}
+
+
+def _changed_sections(old: List[Dict], new: List[Dict]) -> List[int]:
+    return [i for i, section in enumerate(new) if i >= len(old) or section != old[i]]
+
+
+def build_app_incremental(prev_schema: Optional[Dict], prev_built: Optional[Dict], new_schema: Dict) -> Dict:
+    """
+    Rebuild only what changed between two validated AppSchema dicts.
+    `prev_built` is build_app(prev_schema) as the caller holds it (or None:
+    builds are deterministic, so prev_schema alone is enough). A theme change
+    touches every page, so it rebuilds everything ("full": True).
+    Returns build_app's shape with "pages" holding only added/changed pages,
+    plus a manifest:
+      routes           — every route of the new app, in order
+      unchanged        — routes whose code is the same as in prev_built
+      removed          — routes that no longer exist
+      changed_sections — route → indices of sections that differ
+    apply_build_delta(prev_built, result) gives the same as build_app(new_schema).
+    """
+    theme = resolve_theme(new_schema["meta"]["theme"])
+    new_pages = _pages_by_route(new_schema)
+    old_pages = _pages_by_route(prev_schema) if prev_schema else {}
+
+    full = (
+        not prev_schema
+        or resolve_theme(prev_schema["meta"]["theme"]) != theme
+        or (prev_built is not None and prev_built.get("theme") != theme)
+    )
+    built_routes = set(prev_built["pages"]) if prev_built is not None else set(old_pages)
+
+    pages_output = {}
+    unchanged = []
+    changed_sections = {}
+    for route, page in new_pages.items():
+        old = old_pages.get(route)
+        if not full and old == page and route in built_routes:
+            unchanged.append(route)
+            continue
+        pages_output[route] = build_page(page, theme)
+        if old is not None:
+            changed_sections[route] = _changed_sections(old["sections"], page["sections"])
+
+    return {
+        "success": True,
+        "title": new_schema["meta"]["title"],
+        "theme": theme,
+        "pages": pages_output,
+        "routes": list(new_pages),
+        "unchanged": unchanged,
+        "removed": [route for route in old_pages if route not in new_pages],
+        "changed_sections": changed_sections,
+        "full": full,
+    }
+
+
+def apply_build_delta(prev_built: Dict, delta: Dict) -> Dict:
+    """Full build_app result from a previous build and build_app_incremental's result."""
+    pages = delta["pages"]
+    return {
+        "success": True,
+        "title": delta["title"],
+        "theme": delta["theme"],
+        "pages": {route: pages[route] if route in pages else prev_built["pages"][route]
+                  for route in delta["routes"]},
+    }
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# STREAMING BUILD
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def iter_build_app(schema: Dict) -> Iterator[Dict]:
+    """
+    build_app as a stream of events, route by route, so callers can send
+    pages as they are generated and never hold the whole app:
+      {"type": "app",   "title", "theme", "routes"}
+      {"type": "page",  "route", "name"}   — a page starts
+      {"type": "chunk", "route", "code"}   — the next piece of its code
+      {"type": "done",  "pages"}
+    Joining a route's chunks gives build_app(schema)["pages"][route]["code"].
+    """
+    theme = resolve_theme(schema["meta"]["theme"])
+    pages = _pages_by_route(schema)
+
+    yield {"type": "app", "title": schema["meta"]["title"], "theme": theme, "routes": list(pages)}
+    for route, page in pages.items():
+        yield {"type": "page", "route": route, "name": page["name"]}
+        for code in iter_page_code(page, theme):
+            yield {"type": "chunk", "route": route, "code": code}
+    yield {"type": "done", "pages": len(pages)}
@@ -0,0 +1,6 @@
+# /backend/conftest.py
+import os
+
+# Tests never talk to a real Ollama: no warm-up or background health checks
+os.environ.setdefault("OLLAMA_WARMUP", "0")
+os.environ.setdefault("OLLAMA_HEALTH_INTERVAL", "0")
@@ -6,7 +6,8 @@ Credentials from env: DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD.
 
 import os
 from contextlib import contextmanager
-from typing import Any, List, Optional, Tuple
+import uuid
+from typing import Any, Iterator, List, Optional, Tuple
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
@@ -25,6 +26,17 @@ def _get_config() -> dict:
     }
 
 
+def connect(**overrides: Any) -> "psycopg2.extensions.connection":
+    """
+    New connection outside get_db(), for long-running jobs that need more
+    than one (e.g. a streaming reader plus a writer). Caller closes it.
+    `overrides` are passed to psycopg2.connect (e.g. application_name).
+    """
+    conn = psycopg2.connect(**dict(_get_config(), **overrides))
+    conn.autocommit = False
+    return conn
+
+
 @contextmanager
 def get_db():
     """
@@ -32,9 +44,7 @@ def get_db():
     Use execute_query, fetch_one, fetch_all inside this block (they use the same connection).
     """
     global _current_conn
-    config = _get_config()
-    conn = psycopg2.connect(**config)
-    conn.autocommit = False
+    conn = connect()
     try:
         _current_conn = conn
         yield conn
@@ -71,3 +81,19 @@ def fetch_all(sql: str, params: Optional[Tuple[Any, ...]] = None) -> List[dict]:
     with _conn().cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute(sql, params or ())
         return cur.fetchall()
+
+
+def iter_rows(conn: "psycopg2.extensions.connection", sql: str, params: Optional[Tuple[Any, ...]] = None,
+              batch_size: int = 500) -> Iterator[dict]:
+    """
+    Stream rows as dicts through a server-side (named) cursor, fetching
+    `batch_size` rows per round trip, so memory stays flat however many rows
+    match. The cursor lives in `conn`'s open transaction: don't commit on
+    `conn` while iterating.
+    """
+    name = f"iter_rows_{uuid.uuid4().hex}"
+    with conn.cursor(name=name, cursor_factory=RealDictCursor) as cur:
+        cur.itersize = batch_size
+        cur.execute(sql, params or ())
+        for row in cur:
+            yield row
@@ -0,0 +1,81 @@
+# /backend/deadline.py
+"""
+MechaStream — End-to-end request deadlines.
+A client sends its time budget in the X-Deadline-Ms header; the budget is
+turned into an absolute deadline once and checked between pipeline stages,
+and whatever is left becomes the timeout of each Ollama call, so a request
+that can no longer finish in time fails fast instead of holding a thread.
+Config from env: GENERATE_DEADLINE_MS (default budget, 0 = none),
+GENERATE_MAX_DEADLINE_MS (cap on client budgets, 0 = none).
+"""
+
+import math
+import os
+import time
+from typing import Mapping, Optional
+
+DEADLINE_HEADER = "X-Deadline-Ms"
+GENERATE_DEADLINE_MS = float(os.environ.get("GENERATE_DEADLINE_MS", 0))
+GENERATE_MAX_DEADLINE_MS = float(os.environ.get("GENERATE_MAX_DEADLINE_MS", 0))
+# Largest budget accepted at all (one day), with or without GENERATE_MAX_DEADLINE_MS
+MAX_BUDGET_MS = 24 * 3600 * 1000.0
+
+
+class DeadlineExpired(RuntimeError):
+    """The request deadline ran out before `stage` could start."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded before {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """Absolute deadline on the monotonic clock; budget None = no deadline."""
+
+    def __init__(self, budget_ms: Optional[float] = None):
+        self.budget_ms = budget_ms
+        self._at = None if budget_ms is None else time.monotonic() + budget_ms / 1000.0
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str], default_ms: float = GENERATE_DEADLINE_MS,
+                     max_ms: float = GENERATE_MAX_DEADLINE_MS) -> "Deadline":
+        """Deadline from X-Deadline-Ms (else the default). Raises ValueError on a malformed header."""
+        raw = headers.get(DEADLINE_HEADER)
+        if raw is None or not str(raw).strip():
+            budget = default_ms or None
+        else:
+            try:
+                budget = float(raw)
+            except ValueError:
+                raise ValueError(f"{DEADLINE_HEADER} must be a number of milliseconds")
+            # NaN, inf and 1e300 (which overflows the wait timeouts) are malformed
+            if not math.isfinite(budget) or budget > MAX_BUDGET_MS:
+                raise ValueError(f"{DEADLINE_HEADER} must be a number of milliseconds")
+        if budget is not None and max_ms:
+            budget = min(budget, max_ms)
+        return cls(budget)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None without a deadline."""
+        if self._at is None:
+            return None
+        return max(0.0, self._at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self._at is not None and time.monotonic() >= self._at
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExpired if there's no time left to start `stage`."""
+        if self.expired:
+            raise DeadlineExpired(stage)
+
+    def timeout(self, default: Optional[float] = None) -> Optional[float]:
+        """Timeout for the next blocking call: the time left, capped at `default`."""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return remaining if default is None else min(default, remaining)
+
+
+NO_DEADLINE = Deadline()
@@ -0,0 +1,158 @@
+# /backend/export_cache.py
+"""
+MechaStream — Content-addressed cache of finished export archives.
+Archives are stored on local disk under a hash of the build_app() output,
+so re-exporting an unchanged project costs a file lookup, and the route
+serves the file with send_file (sendfile / wsgi.file_wrapper, no copy
+through Python). A miss is written while it streams to the client (tee),
+so it costs no extra memory. The directory is bounded by total size;
+least recently used archives are evicted first.
+Config from env: EXPORT_CACHE_DIR, EXPORT_CACHE_MAX_BYTES (0 disables).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import uuid
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+EXPORT_CACHE_DIR = os.environ.get("EXPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mechastream-exports"))
+EXPORT_CACHE_MAX_BYTES = int(os.environ.get("EXPORT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Bump when exporter output changes for the same build (templates, layout)
+EXPORT_FORMAT_VERSION = 3
+
+_SUFFIX = ".zip"
+
+
+def export_key(build_result: Dict[str, Any], **options: Any) -> str:
+    """sha256 of the build output, the export options and EXPORT_FORMAT_VERSION."""
+    material = json.dumps(
+        {"v": EXPORT_FORMAT_VERSION, "build": build_result, "options": options},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ExportCache:
+    """
+    Directory of <key>.zip files; mtime doubles as the LRU clock.
+    Safe across threads and processes: every write goes to a unique temp
+    file that is renamed into place only once complete.
+    """
+
+    def __init__(self, directory: str = EXPORT_CACHE_DIR, max_bytes: int = EXPORT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "aborted": 0,
+                       "write_errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory) and self.max_bytes > 0
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached archive, or None."""
+        path = self.path(key)
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        return path
+
+    def tee(self, key: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Yield `chunks` unchanged while writing them to the cache. The archive
+        is stored only if the stream is consumed to the end; a client that
+        disconnects early leaves nothing behind. A failed write (disk full)
+        drops the partial file and the rest of the stream is only yielded.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}.tmp")
+            out = open(tmp, "wb")
+        except OSError:
+            yield from chunks  # caching is best-effort; the export still works
+            return
+
+        complete = False
+        try:
+            for chunk in chunks:
+                if out is not None:
+                    try:
+                        out.write(chunk)
+                    except OSError:
+                        self._discard(out, tmp, "write_errors")
+                        out = None
+                yield chunk
+            complete = True
+        finally:
+            if out is not None and not complete:
+                self._discard(out, tmp, "aborted")
+            elif out is not None:
+                try:
+                    out.close()
+                    os.replace(tmp, self.path(key))
+                except OSError:
+                    self._discard(out, tmp, "write_errors")
+                else:
+                    with self._lock:
+                        self._stats["stores"] += 1
+                    self.evict()
+
+    def _discard(self, out, tmp: str, reason: str) -> None:
+        try:
+            out.close()
+        except OSError:
+            pass  # a close that flushes can fail on a full disk too
+        _remove(tmp)
+        with self._lock:
+            self._stats[reason] += 1
+
+    def evict(self) -> None:
+        """Delete least recently used archives until the total is within max_bytes."""
+        with self._lock:
+            try:
+                entries = [e for e in os.scandir(self.directory) if e.name.endswith(_SUFFIX)]
+            except OSError:
+                return
+            files = []
+            for entry in entries:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, entry.path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                if _remove(path):
+                    total -= size
+                    self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 3) if lookups else 0.0
+        out["max_bytes"] = self.max_bytes
+        return out
+
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
@@ -1,12 +1,69 @@
 # /backend/exporter.py
 """
 MechaStream — ZIP exporter for build_app() output.
-Produces a ready-to-run Next.js project in memory (no temp files).
+Produces a ready-to-run Next.js project without temp files: zip_stream()
+yields the archive entry by entry (constant memory, for streamed
+downloads); build_zip() collects the same bytes into a BytesIO.
+Config from env: EXPORT_COMPRESS_WORKERS, EXPORT_STORE_BELOW.
 """
 
-import zipfile
+import functools
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import BytesIO
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Threads deflating files concurrently (1 = sequential, on the request thread)
+EXPORT_COMPRESS_WORKERS = int(os.environ.get("EXPORT_COMPRESS_WORKERS", min(4, os.cpu_count() or 1)))
+# Files smaller than this are stored uncompressed
+EXPORT_STORE_BELOW = int(os.environ.get("EXPORT_STORE_BELOW", 128))
+
+# Files identical in every export: compressed once (see predeflate) and
+# spliced into each archive
+STATIC_FILES = {
+    "components/.gitkeep": "# Reserved for V2\n",
+    "tailwind.config.js": """/** @type {import('tailwindcss').Config} */
+module.exports = {
+  content: [
+    "./pages/**/*.{ts,tsx}",
+    "./components/**/*.{ts,tsx}"
+  ],
+  darkMode: "class",
+  theme: { extend: {} },
+  plugins: []
+};
+""",
+    "tsconfig.json": """{
+  "compilerOptions": {
+    "target": "es5",
+    "lib": ["dom", "dom.iterable", "esnext"],
+    "allowJs": true,
+    "skipLibCheck": true,
+    "strict": true,
+    "noEmit": true,
+    "esModuleInterop": true,
+    "module": "esnext",
+    "moduleResolution": "bundler",
+    "resolveJsonModule": true,
+    "isolatedModules": true,
+    "jsx": "preserve",
+    "incremental": true,
+    "paths": { "@/*": ["./*"] }
+  },
+  "include": ["next-env.d.ts", "**/*.ts", "**/*.tsx"],
+  "exclude": ["node_modules"]
+}
+""",
+    "next.config.js": """/** @type {import('next').NextConfig} */
+const nextConfig = { reactStrictMode: true };
+module.exports = nextConfig;
+""",
+}
 
 
 def _route_to_filename(route: str) -> str:
@@ -21,36 +78,40 @@ def _safe_title(build_result: Dict) -> str:
     return "".join(c if c.isalnum() or c in " -_" else "" for c in title).strip() or "my-app"
 
 
-def build_zip(build_result: Dict[str, Any]) -> BytesIO:
-    """
-    Build a downloadable zip from build_app() output.
-    Returns BytesIO ready for Flask send_file. UTF-8, no temp files.
-    """
+def project_folder(build_result: Dict, suffix: str = "") -> str:
+    """Folder for one project in a multi-project archive; `suffix` keeps equal titles apart."""
     title = _safe_title(build_result)
-    root = f"{title}"
-    pages = build_result.get("pages") or {}
-    theme = build_result.get("theme") or {}
+    return f"{title}-{suffix}" if suffix else title
 
-    buf = BytesIO()
-    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
 
-        def add(path: str, content: str) -> None:
-            zf.writestr(f"{root}/{path}", content.encode("utf-8"))
+def zip_filename(build_result: Dict) -> str:
+    """Download name for the export archive."""
+    return f"{_safe_title(build_result)}.zip"
 
-        # ─── Pages ───
-        for route, data in pages.items():
-            name = data.get("name", route)
-            code = data.get("code", "")
-            fname = _route_to_filename(route) + ".tsx"
-            add(f"pages/{fname}", code)
 
-        # ─── Reserved empty components dir ───
-        add("components/.gitkeep", "# Reserved for V2\n")
+def project_files(build_result: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+    """(path inside the project folder, file content) for every file of the export, in archive order."""
+    title = _safe_title(build_result)
+    pages = build_result.get("pages") or {}
+
+    # ─── Pages ───
+    for route, data in pages.items():
+        name = data.get("name", route)
+        code = data.get("code", "")
+        fname = _route_to_filename(route) + ".tsx"
+        yield (f"pages/{fname}", code)
+
+    # ─── Shared components (build_app(..., shared_components=True)) ───
+    components = build_result.get("components") or {}
+    for data in components.values():
+        yield (data["path"], data["code"])
+    if not components:
+        yield ("components/.gitkeep", STATIC_FILES["components/.gitkeep"])
 
-        # ─── package.json ───
-        add(
-            "package.json",
-            """{
+    # ─── package.json ───
+    yield (
+        "package.json",
+        """{
   "name": "%s",
   "version": "0.1.0",
   "private": true,
@@ -75,68 +136,26 @@ def build_zip(build_result: Dict[str, Any]) -> BytesIO:
   }
 }
 """
-            % title.replace(" ", "-").lower(),
-        )
+        % title.replace(" ", "-").lower(),
+    )
 
-        # ─── tailwind.config.js ───
-        add(
-            "tailwind.config.js",
-            """/** @type {import('tailwindcss').Config} */
-module.exports = {
-  content: [
-    "./pages/**/*.{ts,tsx}",
-    "./components/**/*.{ts,tsx}"
-  ],
-  darkMode: "class",
-  theme: { extend: {} },
-  plugins: []
-};
-""",
-        )
+    # ─── tailwind.config.js ───
+    yield ("tailwind.config.js", STATIC_FILES["tailwind.config.js"])
 
-        # ─── tsconfig.json ───
-        add(
-            "tsconfig.json",
-            """{
-  "compilerOptions": {
-    "target": "es5",
-    "lib": ["dom", "dom.iterable", "esnext"],
-    "allowJs": true,
-    "skipLibCheck": true,
-    "strict": true,
-    "noEmit": true,
-    "esModuleInterop": true,
-    "module": "esnext",
-    "moduleResolution": "bundler",
-    "resolveJsonModule": true,
-    "isolatedModules": true,
-    "jsx": "preserve",
-    "incremental": true,
-    "paths": { "@/*": ["./*"] }
-  },
-  "include": ["next-env.d.ts", "**/*.ts", "**/*.tsx"],
-  "exclude": ["node_modules"]
-}
-""",
-        )
+    # ─── tsconfig.json ───
+    yield ("tsconfig.json", STATIC_FILES["tsconfig.json"])
 
-        # ─── next.config.js ───
-        add(
-            "next.config.js",
-            """/** @type {import('next').NextConfig} */
-const nextConfig = { reactStrictMode: true };
-module.exports = nextConfig;
-""",
-        )
+    # ─── next.config.js ───
+    yield ("next.config.js", STATIC_FILES["next.config.js"])
 
-        # ─── README.md ───
-        pages_list = "\n".join(
-            f"- **{data.get('name', route)}** — `{route}`"
-            for route, data in pages.items()
-        )
-        add(
-            "README.md",
-            f"""# {build_result.get('title', title)}
+    # ─── README.md ───
+    pages_list = "\n".join(
+        f"- **{data.get('name', route)}** — `{route}`"
+        for route, data in pages.items()
+    )
+    yield (
+        "README.md",
+        f"""# {build_result.get('title', title)}
 
 ## Install & run
 
@@ -155,7 +174,202 @@ Then open [http://localhost:3000](http://localhost:3000).
 
 Generated by MechaStream.
 """,
+    )
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# STREAMING ZIP WRITER
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# Forward-only ZIP: nothing is ever seeked back to. Every entry is
+# compressed whole before it is written, so its local header carries the
+# sizes/CRC and no data descriptor follows; forward-only readers such as
+# Java's ZipInputStream reject a stored entry with one. No ZIP64: an export
+# is far below 4 GiB / 65535 entries.
+
+_UTF8 = 0x800  # names are UTF-8
+_VERSION = 20  # 2.0: deflate
+_STORED, _DEFLATED = 0, 8
+_ZIP32_LIMIT = 0xFFFFFFFF
+
+
+# Entries are stamped 1980-01-01 00:00 (the earliest DOS date) unless a
+# timestamp is given, so the same files always give the same archive bytes
+ZIP_EPOCH = (0, (1 << 5) | 1)
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    t = time.gmtime(timestamp)  # not localtime: bytes must not depend on the server's zone
+    if t.tm_year < 1980:
+        return ZIP_EPOCH
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+def archive_settings(compresslevel: int = 6) -> Dict[str, Any]:
+    """Everything besides the files that decides archive bytes; part of the export cache key / ETag."""
+    return {"compresslevel": compresslevel, "store_below": EXPORT_STORE_BELOW, "zlib": zlib.ZLIB_RUNTIME_VERSION}
+
+
+class CompressedEntry(NamedTuple):
+    method: int   # _DEFLATED or _STORED
+    crc: int
+    size: int     # uncompressed
+    data: bytes   # as stored in the archive
+
+
+def compress_entry(data: bytes, level: Optional[int]) -> CompressedEntry:
+    """Whole-entry raw deflate at `level`, or stored as is when level is None. zlib runs without the GIL."""
+    if level is None:
+        return CompressedEntry(_STORED, zlib.crc32(data), len(data), data)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return CompressedEntry(_DEFLATED, zlib.crc32(data), len(data), compressor.compress(data) + compressor.flush())
+
+
+@functools.lru_cache(maxsize=64)
+def predeflate(data: bytes, compresslevel: Optional[int] = 6) -> CompressedEntry:
+    """compress_entry computed once; later archives splice the result in as is."""
+    return compress_entry(data, compresslevel)
+
+
+def entry_level(path: str, size: int, compresslevel: int = 6) -> Optional[int]:
+    """
+    Default per-entry choice: files under EXPORT_STORE_BELOW bytes are
+    stored (deflate headers would eat most of the saving), the rest use
+    `compresslevel`.
+    """
+    return None if size < EXPORT_STORE_BELOW else compresslevel
+
+
+class ZipStreamWriter:
+    """
+    Builds a ZIP archive as a sequence of byte chunks. add_compressed()
+    yields one entry's local header and data; close() returns the central
+    directory. Only the central directory records (about 50 bytes + name
+    per entry) are kept between entries.
+    Output is reproducible: entries keep the order they are added in and
+    every one carries the same timestamp (ZIP_EPOCH by default).
+    """
+
+    def __init__(self, timestamp: Optional[float] = None):
+        self.offset = 0
+        self._time, self._date = ZIP_EPOCH if timestamp is None else _dos_datetime(timestamp)
+        self._central: List[bytes] = []
+
+    def add_compressed(self, path: str, entry: "CompressedEntry") -> Iterator[bytes]:
+        """Splice in an entry compressed beforehand (see predeflate); no zlib work here."""
+        header_offset = self.offset
+        self._record(path, _UTF8, entry.method, header_offset, entry.crc, len(entry.data), entry.size)
+        yield self._local_header(path, _UTF8, entry.method, entry.crc, len(entry.data), entry.size)
+        yield self._emit(entry.data)
+
+    def _local_header(self, path: str, flags: int, method: int, crc: int, compressed_size: int,
+                      size: int) -> bytes:
+        name = path.encode("utf-8")
+        return self._emit(struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, _VERSION, flags, method, self._time, self._date,
+            crc, compressed_size, size, len(name), 0,
+        ) + name)
+
+    def _record(self, path: str, flags: int, method: int, header_offset: int, crc: int,
+                compressed_size: int, size: int) -> None:
+        """Central directory record for an entry; flags must match its local header."""
+        if max(size, compressed_size, header_offset) > _ZIP32_LIMIT:
+            raise ValueError("Archive too large for ZIP without ZIP64")
+        name = path.encode("utf-8")
+        self._central.append(struct.pack(
+            "<IHHHHHHIIIHHHHHII", 0x02014B50, _VERSION, _VERSION, flags, method, self._time, self._date,
+            crc, compressed_size, size, len(name), 0, 0, 0, 0, 0, header_offset,
+        ) + name)
+
+    def close(self) -> bytes:
+        directory = b"".join(self._central)
+        end = struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, len(self._central), len(self._central),
+            len(directory), self.offset, 0,
         )
+        return self._emit(directory + end)
+
+    def _emit(self, chunk: bytes) -> bytes:
+        self.offset += len(chunk)
+        return chunk
+
+
+_compress_pool: Optional[ThreadPoolExecutor] = None
+_compress_pool_lock = threading.Lock()
+
+
+def _get_compress_pool() -> ThreadPoolExecutor:
+    global _compress_pool
+    with _compress_pool_lock:
+        if _compress_pool is None:
+            _compress_pool = ThreadPoolExecutor(max_workers=EXPORT_COMPRESS_WORKERS, thread_name_prefix="zip-deflate")
+        return _compress_pool
+
 
+def zip_stream(build_result: Dict[str, Any], compresslevel: int = 6, parallel: Optional[bool] = None,
+               level_for: Optional[Callable[[str, int], Optional[int]]] = None) -> Iterator[bytes]:
+    """
+    The export archive of build_app() output as a stream of bytes. Files
+    sit under the app title.
+    `level_for(path, size)` picks each entry's deflate level, or None to
+    store it (default: entry_level). Static files come from predeflate.
+    Sequential (default when EXPORT_COMPRESS_WORKERS <= 1): one file at a
+    time, memory about one file plus its deflated copy.
+    Parallel: files are deflated on a shared thread pool and written in
+    order as they finish; at most 2 × EXPORT_COMPRESS_WORKERS compressed
+    files are held at once.
+    """
+    folders = [(_safe_title(build_result), project_files(build_result))]
+    return zip_stream_folders(folders, compresslevel, parallel, level_for)
+
+
+def zip_stream_folders(folders: Iterable[Tuple[str, Iterable[Tuple[str, str]]]], compresslevel: int = 6,
+                       parallel: Optional[bool] = None,
+                       level_for: Optional[Callable[[str, int], Optional[int]]] = None) -> Iterator[bytes]:
+    """
+    zip_stream for several folders in one archive: `folders` yields
+    (folder, files) with files as (path, content) pairs, e.g. from
+    project_files(). Both are consumed lazily, so a caller can produce
+    folders one at a time (from a database cursor, say) and memory stays
+    bounded by the compression window. "" puts files at the archive root.
+    """
+    writer = ZipStreamWriter()
+    if parallel is None:
+        parallel = EXPORT_COMPRESS_WORKERS > 1
+    pool = _get_compress_pool() if parallel else None
+    window = 2 * EXPORT_COMPRESS_WORKERS if pool else 0
+    pending: "deque" = deque()
+
+    def write(arcname: str, item: Any) -> Iterator[bytes]:
+        if isinstance(item, Future):
+            item = item.result()
+        return writer.add_compressed(arcname, item)
+
+    for root, files in folders:
+        for path, content in files:
+            data = content.encode("utf-8")
+            level = level_for(path, len(data)) if level_for else entry_level(path, len(data), compresslevel)
+            if path in STATIC_FILES:
+                item = predeflate(data, level)
+            elif pool:
+                item = pool.submit(compress_entry, data, level)
+            else:
+                item = compress_entry(data, level)
+            pending.append((f"{root}/{path}" if root else path, item))
+            while len(pending) > window:
+                yield from write(*pending.popleft())
+    while pending:
+        yield from write(*pending.popleft())
+    yield writer.close()
+
+
+def build_zip(build_result: Dict[str, Any]) -> BytesIO:
+    """
+    Build a downloadable zip from build_app() output.
+    Returns BytesIO ready for Flask send_file. UTF-8, no temp files.
+    """
+    buf = BytesIO()
+    for chunk in zip_stream(build_result):
+        buf.write(chunk)
     buf.seek(0)
     return buf
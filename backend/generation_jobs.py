@@ -0,0 +1,122 @@
+# /backend/generation_jobs.py
+"""
+MechaStream — Background generation jobs.
+A bounded worker pool (sized to the Ollama backend's real concurrency)
+behind a bounded queue. submit() never blocks: when workers and queue are
+full it raises QueueFull with a Retry-After estimate.
+Config from env: GENERATE_WORKERS (falls back to OLLAMA_NUM_PARALLEL),
+GENERATE_QUEUE_SIZE, GENERATE_JOB_TTL.
+"""
+
+import math
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+GENERATE_WORKERS = int(os.environ.get("GENERATE_WORKERS", os.environ.get("OLLAMA_NUM_PARALLEL", 4)))
+GENERATE_QUEUE_SIZE = int(os.environ.get("GENERATE_QUEUE_SIZE", 32))
+GENERATE_JOB_TTL = int(os.environ.get("GENERATE_JOB_TTL", 3600))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class QueueFull(Exception):
+    """All workers are busy and the queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Generation queue is full. Retry after {retry_after}s.")
+        self.retry_after = retry_after
+
+
+class JobRunner:
+    """
+    Runs fn(*args) -> (payload, status_code) on a bounded thread pool and
+    keeps each job's outcome for `result_ttl` seconds after it finishes.
+    """
+
+    def __init__(self, workers: int = GENERATE_WORKERS, max_queue: int = GENERATE_QUEUE_SIZE,
+                 result_ttl: float = GENERATE_JOB_TTL):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="generate-job")
+        self._capacity = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._avg_duration = 0.0
+        self._stats = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0, "pending": 0, "running": 0}
+
+    def submit(self, fn: Callable[..., tuple], *args: Any) -> str:
+        """Queue a job and return its id. Raises QueueFull instead of blocking."""
+        self._purge()
+        if not self._capacity.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise QueueFull(self.retry_after())
+
+        job_id = uuid.uuid4().hex
+        job = {"id": job_id, "status": STATUS_QUEUED, "created_at": time.time(),
+               "started_at": None, "finished_at": None, "status_code": None, "result": None}
+        with self._lock:
+            self._jobs[job_id] = job
+            self._stats["submitted"] += 1
+            self._stats["pending"] += 1
+        self._executor.submit(self._run, job, fn, args)
+        return job_id
+
+    def _run(self, job: Dict[str, Any], fn: Callable[..., tuple], args: tuple) -> None:
+        with self._lock:
+            job["status"] = STATUS_RUNNING
+            job["started_at"] = time.time()
+            self._stats["pending"] -= 1
+            self._stats["running"] += 1
+        try:
+            payload, status_code = fn(*args)
+            outcome = STATUS_DONE
+        except Exception as e:
+            payload, status_code = {"success": False, "errors": [str(e)]}, 500
+            outcome = STATUS_FAILED
+        finally:
+            self._capacity.release()
+        finished = time.time()
+        with self._lock:
+            job.update(status=outcome, finished_at=finished, status_code=status_code, result=payload)
+            self._stats["running"] -= 1
+            self._stats[outcome] += 1
+            # Exponential moving average of job duration, for Retry-After
+            duration = finished - job["started_at"]
+            self._avg_duration = duration if not self._avg_duration else 0.8 * self._avg_duration + 0.2 * duration
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up (one job completes per avg/workers)."""
+        with self._lock:
+            avg = self._avg_duration or 5.0
+        return max(1, math.ceil(avg / self.workers))
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [jid for jid, job in self._jobs.items()
+                       if job["finished_at"] is not None and job["finished_at"] < cutoff]
+            for jid in expired:
+                del self._jobs[jid]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+            out["stored"] = len(self._jobs)
+            out["avg_duration_s"] = round(self._avg_duration, 3)
+        out["workers"] = self.workers
+        out["max_queue"] = self.max_queue
+        return out
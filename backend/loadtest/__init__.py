@@ -0,0 +1 @@
+# MechaStream load-test harness (offline: mock Ollama + load generator)
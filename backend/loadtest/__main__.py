@@ -0,0 +1,3 @@
+from loadtest.load_generator import main
+
+main()
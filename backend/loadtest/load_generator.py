@@ -0,0 +1,280 @@
+# /backend/loadtest/load_generator.py
+"""
+MechaStream — Open-loop load generator for POST /api/generate.
+Sends requests at a target rate (fixed spacing or Poisson arrivals)
+regardless of how fast responses come back. Latency is measured from each
+request's scheduled send time, so queueing in the generator shows up in
+the numbers instead of hiding (no coordinated omission).
+
+By default it runs fully offline: it starts the mock Ollama server and the
+Flask app in-process, points one at the other and drives the app over HTTP.
+
+    python -m loadtest --rps 5 --duration 30 --latency lognormal:1500:0.5 --malformed-rate 0.1
+    python -m loadtest --target http://localhost:5000 --rps 2 --duration 60
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from loadtest.mock_ollama import add_mock_arguments, mock_from_args, start_mock_server
+
+DEFAULT_PROMPTS = [
+    "SaaS landing page for a project management tool",
+    "Portfolio for a wedding photographer",
+    "Pricing page for an email marketing startup",
+    "Website for a family bakery with a hero, features and testimonials",
+    "Landing page for a mobile fitness app launch",
+    "Consulting business site with stats and a call to action",
+    "Marketing site for an AI note-taking app with pricing",
+    "Personal site for a freelance UX designer",
+]
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# ONE REQUEST
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _classify(status: int, payload: Dict[str, Any]) -> str:
+    """Outcome bucket for one response."""
+    if status == 200:
+        return "ok"
+    if status == 422:
+        return "invalid_schema"
+    if status == 503:
+        return "circuit_open" if payload.get("retry_after") else "ollama_unavailable"
+    if status == 504:
+        return "deadline"
+    if status == 429:
+        return "rejected"
+    return f"http_{status}"
+
+
+def _read_sse(body: str) -> Dict[str, Any]:
+    """(status, payload) of the final done/error event of an SSE body."""
+    last_event, last_data = None, {}
+    for block in body.strip().split("\n\n"):
+        lines = block.split("\n")
+        if lines and lines[0].startswith("event: "):
+            last_event = lines[0][len("event: "):]
+            data = next((l[len("data: "):] for l in lines if l.startswith("data: ")), "{}")
+            last_data = json.loads(data)
+    if last_event == "done":
+        return {"status": 200, "payload": last_data}
+    return {"status": last_data.get("status", 422 if last_event == "error" else 502), "payload": last_data}
+
+
+def send_generate(target: str, prompt: str, stream: bool = False, fast_path: bool = False,
+                  deadline_ms: Optional[float] = None, timeout: float = 120.0) -> Dict[str, Any]:
+    """One POST /api/generate. Returns {"status", "outcome", "source", "repaired", "error"}."""
+    body = json.dumps({"prompt": prompt, "stream": stream, "fast_path": fast_path}).encode()
+    headers = {"Content-Type": "application/json"}
+    if deadline_ms:
+        headers["X-Deadline-Ms"] = str(deadline_ms)
+    req = urllib.request.Request(f"{target.rstrip('/')}/api/generate", data=body, headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            text = resp.read().decode("utf-8")
+            if stream:
+                result = _read_sse(text)
+                status, payload = result["status"], result["payload"]
+            else:
+                status, payload = resp.status, json.loads(text)
+    except urllib.error.HTTPError as e:
+        status = e.code
+        try:
+            payload = json.loads(e.read().decode("utf-8") or "{}")
+        except ValueError:
+            payload = {}
+    except (TimeoutError, OSError) as e:
+        kind = "timeout" if "timed out" in str(e) else "connection_error"
+        return {"status": None, "outcome": kind, "source": None, "repaired": False, "error": str(e)}
+
+    return {
+        "status": status,
+        "outcome": _classify(status, payload),
+        "source": payload.get("source"),
+        "repaired": bool(payload.get("repairs")),
+        "error": (payload.get("errors") or [None])[0],
+    }
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# RUN + REPORT
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(q / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def run_load(target: str, rps: float, duration: float, prompts: Sequence[str] = DEFAULT_PROMPTS,
+             concurrency: int = 64, arrivals: str = "uniform", unique: bool = True, stream: bool = False,
+             fast_path: bool = False, deadline_ms: Optional[float] = None, timeout: float = 120.0,
+             seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Drive `target` at `rps` for `duration` seconds and return the report.
+    With `unique`, each prompt gets a request number appended so the schema
+    cache and request coalescing don't turn the run into a cache benchmark.
+    """
+    rng = random.Random(seed)
+    total = max(1, int(rps * duration))
+    results: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+
+    def one(n: int, scheduled: float) -> None:
+        prompt = prompts[n % len(prompts)] + (f" #{n}" if unique else "")
+        result = send_generate(target, prompt, stream, fast_path, deadline_ms, timeout)
+        result["latency_ms"] = (time.monotonic() - scheduled) * 1000.0
+        with lock:
+            results.append(result)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="loadgen") as pool:
+        at = started
+        for n in range(total):
+            delay = at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, n, at)
+            at += rng.expovariate(rps) if arrivals == "poisson" else 1.0 / rps
+    elapsed = time.monotonic() - started
+    return build_report(results, elapsed, rps)
+
+
+def build_report(results: List[Dict[str, Any]], elapsed: float, target_rps: float = 0.0) -> Dict[str, Any]:
+    latencies = [r["latency_ms"] for r in results]
+    ok_latencies = [r["latency_ms"] for r in results if r["outcome"] == "ok"]
+    outcomes = Counter(r["outcome"] for r in results)
+    validated = outcomes["ok"] + outcomes["invalid_schema"]
+    return {
+        "requests": len(results),
+        "elapsed_s": round(elapsed, 2),
+        "target_rps": target_rps,
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "goodput_rps": round(outcomes["ok"] / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1) if latencies else 0.0,
+        },
+        "ok_latency_ms": {
+            "p50": round(percentile(ok_latencies, 50), 1),
+            "p95": round(percentile(ok_latencies, 95), 1),
+            "p99": round(percentile(ok_latencies, 99), 1),
+        },
+        "outcomes": dict(outcomes),
+        "status_codes": dict(Counter(str(r["status"]) for r in results)),
+        "sources": dict(Counter(r["source"] for r in results if r["source"])),
+        "error_rate": round(1 - outcomes["ok"] / len(results), 4) if results else 0.0,
+        "validator_failure_rate": round(outcomes["invalid_schema"] / validated, 4) if validated else 0.0,
+        "repair_rate": round(sum(r["repaired"] for r in results) / outcomes["ok"], 4) if outcomes["ok"] else 0.0,
+        "sample_errors": dict(Counter(r["error"] for r in results if r["error"]).most_common(5)),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lat, ok = report["latency_ms"], report["ok_latency_ms"]
+    lines = [
+        f"requests        {report['requests']} in {report['elapsed_s']}s "
+        f"(target {report['target_rps']} rps, achieved {report['throughput_rps']} rps, "
+        f"goodput {report['goodput_rps']} rps)",
+        f"latency (all)   p50 {lat['p50']} ms   p95 {lat['p95']} ms   p99 {lat['p99']} ms   max {lat['max']} ms",
+        f"latency (ok)    p50 {ok['p50']} ms   p95 {ok['p95']} ms   p99 {ok['p99']} ms",
+        f"error rate      {report['error_rate']:.2%}",
+        f"validator fail  {report['validator_failure_rate']:.2%} of validated responses "
+        f"(repaired locally or by LLM: {report['repair_rate']:.2%} of successes)",
+        "outcomes        " + ", ".join(f"{k}={v}" for k, v in sorted(report["outcomes"].items())),
+        "status codes    " + ", ".join(f"{k}={v}" for k, v in sorted(report["status_codes"].items())),
+    ]
+    if report["sources"]:
+        lines.append("sources         " + ", ".join(f"{k}={v}" for k, v in sorted(report["sources"].items())))
+    for error, count in report["sample_errors"].items():
+        lines.append(f"  {count} × {error}")
+    return "\n".join(lines)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# IN-PROCESS STACK
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def start_app(ollama_url: str, host: str = "127.0.0.1"):
+    """
+    Start the Flask app on a background werkzeug server, pointed at
+    `ollama_url`. Must run before anything imports app/ollama_client, since
+    their config is read from the environment at import time.
+    Returns (server, base_url).
+    """
+    os.environ["OLLAMA_BASE_URL"] = ollama_url
+    os.environ.pop("OLLAMA_BASE_URLS", None)
+    os.environ["OLLAMA_WARMUP"] = "0"
+    os.environ["SCHEMA_CACHE_PATH"] = ""
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no access log line per request
+    from werkzeug.serving import make_server
+
+    from app import app
+
+    server = make_server(host, 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="loadtest-app", daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load test POST /api/generate")
+    parser.add_argument("--target", help="running app to test (default: start app + mock Ollama in-process)")
+    parser.add_argument("--ollama-url", help="with the in-process app: real Ollama instead of the mock")
+    parser.add_argument("--rps", type=float, default=2.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of sending")
+    parser.add_argument("--concurrency", type=int, default=64, help="max requests in flight")
+    parser.add_argument("--arrivals", choices=("uniform", "poisson"), default="uniform")
+    parser.add_argument("--prompts", help="file with one prompt per line")
+    parser.add_argument("--allow-cache", action="store_true", help="repeat prompts verbatim")
+    parser.add_argument("--fast-path", action="store_true", help="let archetype templates answer")
+    parser.add_argument("--stream", action="store_true", help="use the SSE variant")
+    parser.add_argument("--deadline-ms", type=float, help="send X-Deadline-Ms")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    add_mock_arguments(parser)
+    args = parser.parse_args(argv)
+
+    prompts = DEFAULT_PROMPTS
+    if args.prompts:
+        with open(args.prompts, "r", encoding="utf-8") as f:
+            prompts = [line.strip() for line in f if line.strip()]
+
+    mock = None
+    target = args.target
+    if not target:
+        ollama_url = args.ollama_url
+        if not ollama_url:
+            mock = mock_from_args(args)
+            mock_server = start_mock_server(mock)
+            ollama_url = f"http://127.0.0.1:{mock_server.server_address[1]}"
+        _server, target = start_app(ollama_url)
+
+    report = run_load(target, args.rps, args.duration, prompts, concurrency=args.concurrency,
+                      arrivals=args.arrivals, unique=not args.allow_cache, stream=args.stream,
+                      fast_path=args.fast_path, deadline_ms=args.deadline_ms, timeout=args.timeout,
+                      seed=args.seed)
+    if mock is not None:
+        report["mock"] = mock.stats()
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
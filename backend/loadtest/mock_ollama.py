@@ -0,0 +1,263 @@
+# /backend/loadtest/mock_ollama.py
+"""
+MechaStream — Offline stand-in for Ollama's /api/chat.
+Replays schemas from a corpus with a configurable latency distribution,
+token-paced streaming, HTTP error rate and a rate of malformed output
+(truncated JSON, prose around the JSON, invalid values, no JSON at all),
+so the generate pipeline can be load tested without a GPU.
+
+    python -m loadtest.mock_ollama --port 11435 --latency lognormal:1500:0.5 \\
+        --error-rate 0.02 --malformed-rate 0.1
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+MALFORMED_KINDS = ("truncated", "chatter", "invalid", "not_json")
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# LATENCY
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency sampler (seconds) from a spec in milliseconds:
+      fixed:MS | uniform:LO:HI | normal:MEAN:SD | lognormal:MEDIAN:SIGMA | exp:MEAN
+    """
+    kind, *args = spec.split(":")
+    try:
+        values = [float(a) for a in args]
+    except ValueError:
+        raise ValueError(f"Bad latency spec '{spec}'")
+    arity = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+    if kind not in arity or len(values) != arity[kind]:
+        raise ValueError(f"Bad latency spec '{spec}' (expected one of: {', '.join(arity)})")
+
+    if kind == "fixed":
+        sample = lambda rng: values[0]
+    elif kind == "uniform":
+        sample = lambda rng: rng.uniform(values[0], values[1])
+    elif kind == "normal":
+        sample = lambda rng: rng.gauss(values[0], values[1])
+    elif kind == "lognormal":
+        sample = lambda rng: rng.lognormvariate(math.log(max(values[0], 1e-3)), values[1])
+    else:
+        sample = lambda rng: rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+    return lambda rng: max(0.0, sample(rng)) / 1000.0
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# CORPUS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def default_corpus() -> List[Dict[str, Any]]:
+    """One valid schema per archetype, plus a three-page variant of each."""
+    from archetypes import ARCHETYPES, build_archetype_schema
+
+    corpus = []
+    for name in ARCHETYPES:
+        schema = build_archetype_schema(name, "for Acme")
+        corpus.append(schema)
+        home = schema["pages"][0]
+        pages = [home] + [dict(home, name=n, route=f"/{n.lower()}") for n in ("About", "Contact")]
+        corpus.append(dict(schema, pages=pages))
+    return corpus
+
+
+def load_corpus(path: Optional[str]) -> List[Dict[str, Any]]:
+    """Schemas from a JSON list or a JSONL file; the default corpus without a path."""
+    if not path:
+        return default_corpus()
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        return json.loads(stripped)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def malform(schema: Dict[str, Any], kind: str, rng: random.Random) -> str:
+    """Model output with one of the failure modes in MALFORMED_KINDS."""
+    text = json.dumps(schema)
+    if kind == "truncated":
+        return text[:rng.randint(1, max(1, len(text) - 1))]
+    if kind == "chatter":
+        return f"Sure! Here is your schema:\n```json\n{json.dumps(schema, indent=2)}\n```\nLet me know if you need changes."
+    if kind == "invalid":
+        broken = json.loads(text)
+        broken["meta"]["type"] = "blog-ish"
+        broken["pages"][0]["sections"][0]["component"] = "Carousel3D"
+        return json.dumps(broken)
+    return "I'm sorry, I can't help with that request."
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# SERVER
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class MockOllama:
+    """
+    Behaviour shared by all handler threads. Every request samples its
+    latency, error and malformed outcome from one seeded RNG, so a run is
+    reproducible for a given seed and request order.
+    """
+
+    def __init__(self, corpus: Optional[List[Dict[str, Any]]] = None, latency: str = "fixed:0",
+                 tokens_per_second: float = 0.0, error_rate: float = 0.0, malformed_rate: float = 0.0,
+                 chars_per_token: int = 4, seed: Optional[int] = None):
+        self.corpus = corpus or default_corpus()
+        self.latency = parse_latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.chars_per_token = max(1, chars_per_token)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "streamed": 0, "errors": 0, "malformed": 0}
+
+    def plan(self, stream: bool) -> Dict[str, Any]:
+        """Decide one response: {"delay", "error", "content", "malformed"}."""
+        with self._lock:
+            rng = self._rng
+            self._stats["requests"] += 1
+            self._stats["streamed"] += stream
+            delay = self.latency(rng)
+            if rng.random() < self.error_rate:
+                self._stats["errors"] += 1
+                return {"delay": delay, "error": rng.choice([500, 503]), "content": "", "malformed": None}
+            schema = rng.choice(self.corpus)
+            kind = rng.choice(MALFORMED_KINDS) if rng.random() < self.malformed_rate else None
+            if kind:
+                self._stats["malformed"] += 1
+                content = malform(schema, kind, rng)
+            else:
+                content = json.dumps(schema)
+        return {"delay": delay, "error": None, "content": content, "malformed": kind}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
+
+
+def _handler(mock: MockOllama):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json(200, {"models": [{"name": "mock"}]})
+            elif self.path == "/mock/stats":
+                self._send_json(200, mock.stats())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            if self.path not in ("/api/chat", "/api/generate"):
+                self._send_json(404, {"error": "not found"})
+                return
+            stream = body.get("stream", True)  # Ollama streams unless told not to
+            plan = mock.plan(stream)
+            time.sleep(plan["delay"])
+            if plan["error"]:
+                self._send_json(plan["error"], {"error": "mock: model runner failed"})
+            elif stream:
+                self._stream(plan, body.get("model", "mock"))
+            else:
+                self._send_json(200, self._message(plan["content"], body.get("model", "mock"), plan, done=True))
+
+        def _message(self, content: str, model: str, plan: Dict[str, Any], done: bool) -> Dict[str, Any]:
+            out = {"model": model, "message": {"role": "assistant", "content": content}, "done": done}
+            if done:
+                tokens = max(1, len(plan["content"]) // mock.chars_per_token)
+                eval_s = tokens / mock.tokens_per_second if mock.tokens_per_second else 0.0
+                out.update(total_duration=int((plan["delay"] + eval_s) * 1e9), load_duration=0,
+                           prompt_eval_count=200, prompt_eval_duration=int(plan["delay"] * 1e9),
+                           eval_count=tokens, eval_duration=int(eval_s * 1e9))
+            return out
+
+        def _stream(self, plan: Dict[str, Any], model: str):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            content = plan["content"]
+            step = mock.chars_per_token
+            pause = 1.0 / mock.tokens_per_second if mock.tokens_per_second else 0.0
+            try:
+                for i in range(0, len(content), step):
+                    self._chunk(self._message(content[i:i + step], model, plan, done=False))
+                    if pause:
+                        time.sleep(pause)
+                self._chunk(self._message("", model, plan, done=True))
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client stopped reading (early abort)
+
+        def _chunk(self, payload: Dict[str, Any]):
+            data = json.dumps(payload).encode() + b"\n"
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        def _send_json(self, status: int, payload: Dict[str, Any]):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_mock_server(mock: MockOllama, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve `mock` on a daemon thread. The bound URL is http://host:server.server_address[1]."""
+    server = ThreadingHTTPServer((host, port), _handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-ollama", daemon=True).start()
+    return server
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--corpus", help="JSON list or JSONL of schemas (default: archetype templates)")
+    parser.add_argument("--latency", default="lognormal:1500:0.5",
+                        help="time to first token, ms: fixed:MS | uniform:LO:HI | normal:MEAN:SD | "
+                             "lognormal:MEDIAN:SIGMA | exp:MEAN")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="stream pacing (0 = no pacing)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of HTTP 500/503 replies")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of malformed outputs")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def mock_from_args(args: argparse.Namespace) -> MockOllama:
+    return MockOllama(load_corpus(args.corpus), latency=args.latency, tokens_per_second=args.tokens_per_second,
+                      error_rate=args.error_rate, malformed_rate=args.malformed_rate, seed=args.seed)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Mock Ollama /api/chat server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    add_mock_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = start_mock_server(mock_from_args(args), args.host, args.port)
+    print(f"Mock Ollama listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,634 @@
+# /backend/ollama_client.py
+"""
+MechaStream — Shared keep-alive HTTP client for Ollama.
+One thread-safe connection pool per backend; connections are reused across
+requests instead of opening a new TCP connection per call. Several backends
+are load-balanced (least outstanding requests) with passive and active
+health checks and optional hedging of slow requests.
+Config from env: OLLAMA_BASE_URLS (comma-separated; falls back to
+OLLAMA_BASE_URL), OLLAMA_TIMEOUT, OLLAMA_POOL_SIZE, OLLAMA_EJECT_AFTER,
+OLLAMA_EJECT_SECONDS, OLLAMA_HEALTH_INTERVAL, OLLAMA_HEDGE, OLLAMA_HEDGE_AFTER_MS.
+"""
+
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import closing
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+from urllib.parse import urlsplit
+
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_TIMEOUT = int(os.environ.get("OLLAMA_TIMEOUT", 60))
+OLLAMA_BASE_URLS = [u.strip() for u in os.environ.get("OLLAMA_BASE_URLS", "").split(",") if u.strip()] or [OLLAMA_BASE_URL]
+OLLAMA_POOL_SIZE = int(os.environ.get("OLLAMA_POOL_SIZE", 8))
+OLLAMA_EJECT_AFTER = int(os.environ.get("OLLAMA_EJECT_AFTER", 3))
+OLLAMA_EJECT_SECONDS = float(os.environ.get("OLLAMA_EJECT_SECONDS", 30))
+OLLAMA_HEALTH_INTERVAL = float(os.environ.get("OLLAMA_HEALTH_INTERVAL", 10))
+OLLAMA_HEDGE = os.environ.get("OLLAMA_HEDGE", "0").lower() in ("1", "true", "yes")
+OLLAMA_HEDGE_AFTER_MS = float(os.environ.get("OLLAMA_HEDGE_AFTER_MS", 0))
+
+# Errors that mean a pooled keep-alive connection went stale before we used it
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class OllamaError(RuntimeError):
+    """Ollama could not be reached or returned an unusable response."""
+
+
+class OllamaHTTPError(OllamaError):
+    """Ollama answered with an HTTP error status."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+class DeadlineExceeded(OllamaError):
+    """The per-request deadline ran out before Ollama answered."""
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# CONNECTION POOL
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class ConnectionPool:
+    """
+    Bounded pool of keep-alive HTTP connections to one host.
+    At most `size` connections exist at once; callers wait for a free slot
+    until their deadline. Idle connections are reused LIFO.
+    """
+
+    def __init__(self, base_url: str, size: int = OLLAMA_POOL_SIZE):
+        parts = urlsplit(base_url)
+        self.base_url = base_url.rstrip("/")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.scheme = parts.scheme or "http"
+        self.size = max(1, size)
+        self._idle: deque = deque()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "connections_discarded": 0,
+            "stale_retries": 0,
+            "pool_waits": 0,
+            "failures": 0,
+        }
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    def _new_connection(self, timeout: float) -> http.client.HTTPConnection:
+        self._count("connections_created")
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=timeout)
+
+    def acquire(self, deadline: float) -> http.client.HTTPConnection:
+        """Take a connection (idle or new). Waits for a slot until `deadline`."""
+        if not self._slots.acquire(blocking=False):
+            self._count("pool_waits")
+            if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                raise DeadlineExceeded(f"Ollama request failed: no free connection to {self.base_url}")
+        remaining = max(0.001, deadline - time.monotonic())
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            return self._new_connection(remaining)
+        self._count("connections_reused")
+        conn.timeout = remaining
+        if conn.sock is not None:
+            conn.sock.settimeout(remaining)
+        return conn
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        """Return a connection to the pool, or close it if it cannot be reused."""
+        if reusable:
+            with self._lock:
+                self._idle.append(conn)
+        else:
+            self._count("connections_discarded")
+            conn.close()
+        self._slots.release()
+
+    def request(self, method: str, path: str, body: Optional[bytes], deadline: float):
+        """
+        Send a request and return (conn, response) with headers read.
+        The caller must read the body and then release(conn, reusable).
+        A stale idle connection is retried once on a fresh one.
+        """
+        self._count("requests")
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        for attempt in (0, 1):
+            conn = self.acquire(deadline)
+            reused = conn.sock is not None
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                return conn, conn.getresponse()
+            except _STALE_ERRORS as e:
+                self.release(conn, reusable=False)
+                if reused and attempt == 0:
+                    self._count("stale_retries")
+                    continue
+                self._count("failures")
+                raise OllamaError(f"Ollama request failed: {e}")
+            except socket.timeout:
+                self.release(conn, reusable=False)
+                self._count("failures")
+                raise DeadlineExceeded("Ollama request failed: timed out")
+            except (OSError, http.client.HTTPException) as e:
+                # HTTPException: a malformed reply (BadStatusLine, LineTooLong, ...)
+                self.release(conn, reusable=False)
+                self._count("failures")
+                raise OllamaError(f"Ollama request failed: {e}")
+        raise OllamaError("Ollama request failed")  # pragma: no cover
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+            out["idle"] = len(self._idle)
+        out["size"] = self.size
+        out["reuse_ratio"] = round(out["connections_reused"] / out["requests"], 3) if out["requests"] else 0.0
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            while self._idle:
+                self._idle.pop().close()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# BACKENDS & LOAD BALANCER
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class Backend:
+    """One Ollama server: its connection pool plus health and latency state."""
+
+    def __init__(self, base_url: str, pool_size: int):
+        self.pool = ConnectionPool(base_url, pool_size)
+        self.url = self.pool.base_url
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.latencies: deque = deque(maxlen=200)
+        self.counts = {"requests": 0, "failures": 0, "ejections": 0}
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy(time.monotonic()),
+            "outstanding": self.outstanding,
+            "consecutive_failures": self.consecutive_failures,
+            "p95_ms": round(_quantile(self.latencies, 0.95) * 1000, 1) if self.latencies else None,
+            **self.counts,
+            "pool": self.pool.stats(),
+        }
+
+
+def _quantile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LoadBalancer:
+    """
+    Least-outstanding-requests routing over backends.
+    Passive health: a backend is ejected for `eject_seconds` after
+    `eject_after` consecutive failures. Active health: check() probes
+    GET /api/tags and reinstates or ejects a backend.
+    """
+
+    def __init__(self, base_urls: Sequence[str], pool_size: int = OLLAMA_POOL_SIZE,
+                 eject_after: int = OLLAMA_EJECT_AFTER, eject_seconds: float = OLLAMA_EJECT_SECONDS):
+        self.backends = [Backend(url, pool_size) for url in base_urls]
+        self.eject_after = max(1, eject_after)
+        self.eject_seconds = eject_seconds
+        self._lock = threading.Lock()
+        self._rr = 0
+
+    def acquire(self, exclude: Sequence[Backend] = ()) -> Optional[Backend]:
+        """Pick a backend and count the request against it. None if only excluded ones exist."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [b for b in self.backends if b not in exclude]
+            if not candidates:
+                return None
+            healthy = [b for b in candidates if b.healthy(now)]
+            if healthy:
+                # Rotate the start index so ties don't always land on the first backend
+                self._rr = (self._rr + 1) % len(healthy)
+                rotated = healthy[self._rr:] + healthy[:self._rr]
+                chosen = min(rotated, key=lambda b: b.outstanding)
+            else:
+                # Everything is ejected: fail open on the one that comes back first
+                chosen = min(candidates, key=lambda b: b.ejected_until)
+            chosen.outstanding += 1
+            chosen.counts["requests"] += 1
+            return chosen
+
+    def release(self, backend: Backend, ok: Optional[bool], latency: Optional[float] = None) -> None:
+        with self._lock:
+            backend.outstanding -= 1
+        self.record(backend, ok, latency)
+
+    def record(self, backend: Backend, ok: Optional[bool], latency: Optional[float] = None) -> None:
+        """Passive health: ok=False counts toward ejection, True resets it, None leaves it alone."""
+        if ok is None:
+            return
+        with self._lock:
+            if ok:
+                backend.consecutive_failures = 0
+                backend.ejected_until = 0.0
+                if latency is not None:
+                    backend.latencies.append(latency)
+                return
+            backend.counts["failures"] += 1
+            backend.consecutive_failures += 1
+            if backend.consecutive_failures >= self.eject_after and backend.healthy(time.monotonic()):
+                backend.ejected_until = time.monotonic() + self.eject_seconds
+                backend.counts["ejections"] += 1
+
+    def healthy_count(self) -> int:
+        now = time.monotonic()
+        return sum(1 for b in self.backends if b.healthy(now))
+
+    def hedge_delay(self, fixed_ms: float = 0, min_samples: int = 20) -> Optional[float]:
+        """Seconds to wait before hedging: fixed if configured, else the recent p95."""
+        if fixed_ms > 0:
+            return fixed_ms / 1000.0
+        with self._lock:
+            samples = [x for b in self.backends for x in b.latencies]
+        if len(samples) < min_samples:
+            return None
+        return _quantile(samples, 0.95)
+
+    def check(self, backend: Backend, timeout: float = 2.0) -> bool:
+        """
+        Active health check: GET /api/tags on a connection of its own, so a
+        backend whose pool is busy with healthy generations isn't ejected for
+        having no free slot.
+        """
+        pool = backend.pool
+        cls = http.client.HTTPSConnection if pool.scheme == "https" else http.client.HTTPConnection
+        conn = cls(pool.host, pool.port, timeout=timeout)
+        try:
+            conn.request("GET", "/api/tags")
+            resp = conn.getresponse()
+            resp.read()
+            ok = resp.status < 500
+        except (OSError, http.client.HTTPException):
+            ok = False
+        finally:
+            conn.close()
+        self.record(backend, ok)
+        return ok
+
+    def check_all(self) -> None:
+        for backend in self.backends:
+            self.check(backend)
+
+    def start_health_checks(self, interval: float = OLLAMA_HEALTH_INTERVAL) -> Optional[threading.Thread]:
+        """Probe every backend every `interval` seconds on a daemon thread."""
+        if interval <= 0:
+            return None
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.check_all()
+
+        thread = threading.Thread(target=loop, name="ollama-health", daemon=True)
+        thread.start()
+        return thread
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# TIMINGS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+# Duration fields (nanoseconds) Ollama reports on a final response
+TIMING_FIELDS = ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+COUNT_FIELDS = ("prompt_eval_count", "eval_count")
+# A load_duration above this means the model was (re)loaded rather than already resident
+COLD_LOAD_MS = 500
+
+
+class TimingStats:
+    """Aggregates Ollama's per-response timing fields (load, prompt eval, eval)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._responses = 0
+        self._cold_loads = 0
+        self._sums = {f: 0 for f in TIMING_FIELDS + COUNT_FIELDS}
+        self._last: Dict[str, Any] = {}
+
+    def record(self, out: Dict[str, Any]) -> None:
+        if "total_duration" not in out:
+            return
+        last = {f: out.get(f, 0) or 0 for f in TIMING_FIELDS + COUNT_FIELDS}
+        with self._lock:
+            self._responses += 1
+            for f, v in last.items():
+                self._sums[f] += v
+            if last["load_duration"] / 1e6 > COLD_LOAD_MS:
+                self._cold_loads += 1
+            self._last = last
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            n = self._responses
+            out: Dict[str, Any] = {"responses": n, "cold_loads": self._cold_loads}
+            for f in TIMING_FIELDS:
+                out[f"avg_{f[:-len('_duration')]}_ms"] = round(self._sums[f] / n / 1e6, 1) if n else None
+            for f in COUNT_FIELDS:
+                out[f"avg_{f}"] = round(self._sums[f] / n, 1) if n else None
+            out["last"] = {
+                (f"{f[:-len('_duration')]}_ms" if f in TIMING_FIELDS else f): (
+                    round(v / 1e6, 1) if f in TIMING_FIELDS else v)
+                for f, v in self._last.items()
+            }
+        return out
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# OLLAMA CLIENT
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _error_message(status: int, raw: bytes) -> str:
+    try:
+        detail = json.loads(raw.decode()).get("error")
+    except (ValueError, AttributeError):
+        detail = None
+    return f"Ollama request failed: HTTP {status}" + (f" ({detail})" if detail else "")
+
+
+def _is_backend_fault(e: Exception) -> bool:
+    """Errors that count against a backend's health (4xx are the caller's fault)."""
+    return _health(e) is False
+
+
+def _health(e: Exception) -> Optional[bool]:
+    """
+    What an error says about the backend: False = its fault, True = the
+    caller's (4xx), None = nothing. DeadlineExceeded is None: the caller's
+    deadline or a wait for a free pooled connection says nothing about the
+    server, which is how the circuit breaker judges it too. A hung server
+    is still caught by the active check().
+    """
+    if isinstance(e, DeadlineExceeded):
+        return None
+    return isinstance(e, OllamaHTTPError) and e.status < 500
+
+
+class OllamaClient:
+    """
+    JSON-over-HTTP client for the Ollama API, load-balanced over one or
+    more backends. With hedging on, a non-streaming request that has not
+    answered within the p95 latency (or OLLAMA_HEDGE_AFTER_MS) is duplicated
+    on a second backend and the first success wins.
+    """
+
+    def __init__(self, base_url: Union[str, Sequence[str]] = None, pool_size: int = OLLAMA_POOL_SIZE,
+                 timeout: float = OLLAMA_TIMEOUT, hedge: bool = OLLAMA_HEDGE,
+                 hedge_after_ms: float = OLLAMA_HEDGE_AFTER_MS, **balancer_options: Any):
+        urls: List[str] = [base_url] if isinstance(base_url, str) else list(base_url or OLLAMA_BASE_URLS)
+        self.balancer = LoadBalancer(urls, pool_size, **balancer_options)
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_after_ms = hedge_after_ms
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
+        self._hedge_stats = {"hedged": 0, "hedge_wins": 0}
+        self.timings = TimingStats()
+
+    def _deadline(self, timeout: Optional[float]) -> float:
+        return time.monotonic() + (self.timeout if timeout is None else timeout)
+
+    # ─── single-backend primitives ───
+
+    def _post_on(self, backend: Backend, path: str, data: bytes, deadline: float) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            result = self._post(backend.pool, path, data, deadline)
+        except OllamaError as e:
+            self.balancer.release(backend, ok=_health(e))
+            raise
+        self.balancer.release(backend, ok=True, latency=time.monotonic() - started)
+        return result
+
+    @staticmethod
+    def _post(pool: ConnectionPool, path: str, data: bytes, deadline: float) -> Dict[str, Any]:
+        conn, resp = pool.request("POST", path, data, deadline)
+        reusable = False
+        try:
+            raw = resp.read()
+            reusable = not resp.will_close
+        except socket.timeout:
+            raise DeadlineExceeded("Ollama request failed: timed out")
+        except (OSError, http.client.HTTPException) as e:
+            raise OllamaError(f"Ollama request failed: {e}")
+        finally:
+            pool.release(conn, reusable)
+        if resp.status >= 400:
+            raise OllamaHTTPError(_error_message(resp.status, raw), resp.status)
+        try:
+            return json.loads(raw.decode())
+        except json.JSONDecodeError as e:
+            raise OllamaError(f"Ollama returned invalid JSON: {e}")
+
+    # ─── public API ───
+
+    def post_json(self, path: str, body: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """POST body as JSON, return the decoded JSON response."""
+        deadline = self._deadline(timeout)
+        data = json.dumps(body).encode("utf-8")
+        primary = self.balancer.acquire()
+        delay = self.balancer.hedge_delay(self.hedge_after_ms) if self.hedge else None
+        if delay is not None and self.balancer.healthy_count() >= 2:
+            return self._post_hedged(primary, path, data, deadline, delay)
+        try:
+            return self._post_on(primary, path, data, deadline)
+        except DeadlineExceeded:
+            raise
+        except OllamaError as e:
+            # Fail over once to another backend if this one is at fault
+            fallback = self.balancer.acquire(exclude=[primary]) if _is_backend_fault(e) else None
+            if fallback is None:
+                raise
+            return self._post_on(fallback, path, data, deadline)
+
+    def _post_hedged(self, primary: Backend, path: str, data: bytes, deadline: float,
+                     delay: float) -> Dict[str, Any]:
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=2 * self.balancer.backends[0].pool.size * len(self.balancer.backends),
+                    thread_name_prefix="ollama-hedge",
+                )
+        first = self._hedge_executor.submit(self._post_on, primary, path, data, deadline)
+        done, _ = wait([first], timeout=min(delay, max(0.0, deadline - time.monotonic())))
+        if done:
+            return first.result()
+
+        secondary = self.balancer.acquire(exclude=[primary])
+        if secondary is None:
+            return first.result()
+        with self._hedge_lock:
+            self._hedge_stats["hedged"] += 1
+        second = self._hedge_executor.submit(self._post_on, secondary, path, data, deadline)
+
+        # First success wins; the loser finishes in the background and its
+        # connection goes back to its pool.
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    if fut is second:
+                        with self._hedge_lock:
+                            self._hedge_stats["hedge_wins"] += 1
+                    return fut.result()
+                error = fut.exception()
+        raise error
+
+    def _open_stream(self, backend: Backend, path: str, data: bytes, deadline: float):
+        """POST on one backend and check the status. Returns (conn, response); releases everything on failure."""
+        try:
+            conn, resp = backend.pool.request("POST", path, data, deadline)
+        except OllamaError as e:
+            self.balancer.release(backend, ok=_health(e))
+            raise
+        if resp.status < 400:
+            return conn, resp
+        try:
+            raw = resp.read()
+        except (OSError, http.client.HTTPException):
+            raw = b""
+        backend.pool.release(conn, reusable=False)
+        error = OllamaHTTPError(_error_message(resp.status, raw), resp.status)
+        self.balancer.release(backend, ok=_health(error))
+        raise error
+
+    def stream_json(self, path: str, body: Dict[str, Any], timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        POST body and yield each NDJSON line of the response as a dict.
+        If the caller stops early the connection is closed (cancelling the
+        generation server-side) rather than returned to the pool.
+        Streams are not hedged, but fail over once, like post_json, when
+        the first backend can't be reached or answers 5xx.
+        """
+        deadline = self._deadline(timeout)
+        data = json.dumps(body).encode("utf-8")
+        backend = self.balancer.acquire()
+        started = time.monotonic()
+        try:
+            conn, resp = self._open_stream(backend, path, data, deadline)
+        except DeadlineExceeded:
+            raise
+        except OllamaError as e:
+            # Nothing has been yielded yet, so another backend can start over
+            fallback = self.balancer.acquire(exclude=[backend]) if _is_backend_fault(e) else None
+            if fallback is None:
+                raise
+            backend = fallback
+            started = time.monotonic()
+            conn, resp = self._open_stream(backend, path, data, deadline)
+        pool = backend.pool
+        reusable = False
+        ok = True
+        try:
+            while True:
+                if time.monotonic() > deadline:
+                    raise DeadlineExceeded("Ollama request failed: timed out")
+                line = resp.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line.decode())
+                except json.JSONDecodeError as e:
+                    raise OllamaError(f"Ollama returned invalid JSON: {e}")
+            resp.read()  # mark the response complete so the connection can be reused
+            reusable = not resp.will_close
+        except socket.timeout:
+            raise DeadlineExceeded("Ollama request failed: timed out")
+        except (OSError, http.client.HTTPException) as e:
+            ok = False
+            raise OllamaError(f"Ollama request failed: {e}")
+        finally:
+            pool.release(conn, reusable)
+            self.balancer.release(backend, ok, time.monotonic() - started if reusable else None)
+
+    def post_all(self, path: str, body: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        POST the same body to every backend (e.g. to warm each one up).
+        Returns {backend url: response dict or OllamaError}.
+        """
+        data = json.dumps(body).encode("utf-8")
+        results: Dict[str, Any] = {}
+        for backend in self.balancer.backends:
+            try:
+                results[backend.url] = self._post(backend.pool, path, data, self._deadline(timeout))
+            except OllamaError as e:
+                self.balancer.record(backend, ok=_health(e))
+                results[backend.url] = e
+        return results
+
+    def chat(self, body: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        out = self.post_json("/api/chat", dict(body, stream=False), timeout)
+        self.timings.record(out)
+        return out
+
+    def chat_stream(self, body: Dict[str, Any], timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        # closing(): abandoning this generator releases the connection at once,
+        # which is what tells Ollama to stop generating
+        with closing(self.stream_json("/api/chat", dict(body, stream=True), timeout)) as lines:
+            for out in lines:
+                if out.get("error"):
+                    raise OllamaError(f"Ollama error: {out['error']}")
+                if out.get("done"):
+                    self.timings.record(out)
+                yield out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._hedge_lock:
+            hedging = dict(self._hedge_stats, enabled=self.hedge)
+        return {
+            "backends": [b.stats() for b in self.balancer.backends],
+            "hedging": hedging,
+            "timings": self.timings.stats(),
+        }
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# SHARED INSTANCE
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+_client: Optional[OllamaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OllamaClient:
+    """Process-wide client used by every LLM call. Starts active health checks."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaClient()
+                _client.balancer.start_health_checks()
+    return _client
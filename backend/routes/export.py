@@ -0,0 +1,163 @@
+# /backend/routes/export.py
+"""
+MechaStream — Project export routes.
+POST /api/export builds a validated schema and streams the Next.js project
+as a ZIP while it is being compressed, so memory per download stays flat
+however large the project is. Finished archives are kept in an
+ExportCache keyed by the build output; repeat exports are served from disk.
+GET /api/workspaces/<id>/export streams every project of a workspace from
+the database into one archive; its progress is at /api/exports/<id>/progress.
+It is off unless WORKSPACE_EXPORT_ENABLED is set: there is no auth layer yet
+to check the caller's membership and plan, so only enable it behind a proxy
+that does.
+"""
+
+import unicodedata
+import uuid
+from urllib.parse import quote
+
+
+from flask import Blueprint, Response, jsonify, request, send_file, stream_with_context
+
+from code_builder import build_app
+from export_cache import ExportCache, export_key
+from exporter import archive_settings, zip_filename, zip_stream
+from schema_validator import validate_schema_data
+from workspace_export import WORKSPACE_EXPORT_ENABLED, open_workspace, progress_registry, stream_workspace
+
+bp = Blueprint("export", __name__, url_prefix="/api")
+
+export_cache = ExportCache()
+
+# Keep the download but revalidate with If-None-Match before reusing it
+EXPORT_CACHE_CONTROL = "private, no-cache"
+
+
+@bp.route("/export", methods=["POST"])
+def export_zip():
+    """
+    Body: {"schema": validated or raw AppSchema, "shared_components": bool}.
+    Returns application/zip as a chunked attachment with a strong ETag;
+    304 when If-None-Match already names it; 422 if the schema is invalid.
+    """
+    if not request.is_json:
+        return jsonify({"success": False, "errors": ["Content-Type must be application/json"]}), 400
+    data = request.get_json() or {}
+    if "schema" not in data:
+        return jsonify({"success": False, "errors": ["Missing schema"]}), 400
+
+    result = validate_schema_data(data["schema"])
+    if not result["success"]:
+        return jsonify({"success": False, "errors": result["errors"]}), 422
+
+    built = build_app(result["schema"], shared_components=bool(data.get("shared_components")))
+    # Archives are reproducible, so the key of the inputs is a strong ETag
+    # for the bytes: a client holding them gets a 304 with no ZIP work
+    key = export_key(built, **archive_settings())
+    if request.if_none_match.contains(key):
+        resp = Response(status=304)
+        resp.set_etag(key)
+        resp.headers["Cache-Control"] = EXPORT_CACHE_CONTROL
+        return resp
+
+    if not export_cache.enabled:
+        return _stream_zip(built, key, zip_stream(built), "off")
+
+    path = export_cache.get(key)
+    if path:
+        try:
+            f = open(path, "rb")  # open now: it may be evicted before it is sent
+        except OSError:
+            pass
+        else:
+            resp = send_file(f, mimetype="application/zip", as_attachment=True,
+                             download_name=zip_filename(built), etag=key)
+            resp.headers["Cache-Control"] = EXPORT_CACHE_CONTROL
+            resp.headers["X-Export-Cache"] = "hit"
+            return resp
+    return _stream_zip(built, key, export_cache.tee(key, zip_stream(built)), "miss")
+
+
+def _set_attachment(resp: Response, filename: str) -> None:
+    """
+    Content-Disposition the way send_file(download_name=...) writes it:
+    header values must be latin-1, so a non-ASCII name gets an ASCII
+    fallback plus filename*=UTF-8''... (RFC 6266).
+    """
+    try:
+        filename.encode("ascii")
+    except UnicodeEncodeError:
+        fallback = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+        resp.headers.set("Content-Disposition", "attachment", filename=fallback,
+                         **{"filename*": "UTF-8''" + quote(filename, safe="!#$&+^`|")})
+    else:
+        resp.headers.set("Content-Disposition", "attachment", filename=filename)
+
+
+def _stream_zip(built: dict, key: str, chunks, cache_status: str) -> Response:
+    resp = Response(
+        stream_with_context(chunks),
+        mimetype="application/zip",
+        headers={
+            "Cache-Control": EXPORT_CACHE_CONTROL,
+            "X-Accel-Buffering": "no",
+            "X-Export-Cache": cache_status,
+        },
+    )
+    _set_attachment(resp, zip_filename(built))
+    resp.set_etag(key)
+    return resp
+
+
+@bp.route("/export/stats", methods=["GET"])
+def export_stats():
+    return jsonify({"cache": export_cache.stats()})
+
+
+@bp.route("/workspaces/<workspace_id>/export", methods=["GET"])
+def export_workspace(workspace_id: str):
+    """
+    One ZIP with a folder per project of the workspace and export-report.json.
+    ?rebuild=1 re-renders every schema instead of reusing stored pages.
+    The X-Export-Id header names the export for the progress route.
+    404 while WORKSPACE_EXPORT_ENABLED is off.
+    """
+    if not WORKSPACE_EXPORT_ENABLED:
+        return jsonify({"success": False, "errors": ["Workspace export is disabled"]}), 404
+    try:
+        workspace_id = str(uuid.UUID(workspace_id))
+    except ValueError:
+        return jsonify({"success": False, "errors": ["Invalid workspace id"]}), 400
+
+    try:
+        conn, total = open_workspace(workspace_id)
+    except Exception as e:
+        return jsonify({"success": False, "errors": [f"Database unavailable: {type(e).__name__}"]}), 503
+    if not total:
+        conn.close()
+        return jsonify({"success": False, "errors": ["Workspace has no projects"]}), 404
+
+    rebuild = request.args.get("rebuild", "").lower() in ("1", "true", "yes")
+    export_id, progress = progress_registry.create(workspace_id, total)
+    resp = Response(
+        stream_with_context(stream_workspace(conn, workspace_id, progress, rebuild)),
+        mimetype="application/zip",
+        headers={
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no",
+            "X-Export-Id": export_id,
+        },
+    )
+    _set_attachment(resp, f"workspace-{workspace_id[:8]}.zip")
+    # The stream closes the connection when it ends; this covers a client
+    # that goes away before the first chunk
+    resp.call_on_close(conn.close)
+    return resp
+
+
+@bp.route("/exports/<export_id>/progress", methods=["GET"])
+def export_progress(export_id: str):
+    progress = progress_registry.get(export_id)
+    if progress is None:
+        return jsonify({"success": False, "errors": ["Unknown export"]}), 404
+    return jsonify({"success": True, "progress": progress.to_dict()})
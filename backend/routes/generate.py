@@ -2,111 +2,676 @@
 
 import os
 import json
-import urllib.request
-import urllib.error
+import threading
+import time
+from contextlib import closing
+from typing import Iterator, Optional, Tuple
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 
-from schema_validator import validate_schema, detect_complexity
+from schema_validator import (
+    validate_meta, validate_page, validate_schema_data, detect_complexity, estimate_num_predict,
+    output_json_schema,
+)
 from schema_generator_prompt import SCHEMA_GENERATOR_SYSTEM_PROMPT
-from code_builder import build_app
+from schema_stream import SchemaStreamParser, SchemaViolation, EVENT_META, EVENT_PAGE
+from schema_repair import repair_and_validate, repair_meta, repair_page, stream_violation
+from archetypes import ARCHETYPE_FAST_PATH, schema_from_prompt
+from code_builder import build_app, build_app_incremental, iter_build_app, resolve_theme
+from ollama_client import DeadlineExceeded, OllamaError, get_client
+from circuit_breaker import CircuitBreaker, CircuitOpen
+from deadline import NO_DEADLINE, Deadline, DeadlineExpired
+from schema_cache import SchemaCache, make_cache_key
+from singleflight import SingleFlight
+from generation_jobs import JobRunner, QueueFull
 
 bp = Blueprint("generate", __name__, url_prefix="/api")
 
-OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.environ.get("OLLAMA_CODE_MODEL", os.environ.get("OLLAMA_MODEL", "qwen2.5-coder:7b"))
-OLLAMA_TIMEOUT = int(os.environ.get("OLLAMA_TIMEOUT", 60))
+SCHEMA_LLM_REPAIR = os.environ.get("SCHEMA_LLM_REPAIR", "1").lower() in ("1", "true", "yes")
+# "schema" = constrain output to AppSchema, "json" = any JSON, "off" = prompt only
+OLLAMA_FORMAT = os.environ.get("OLLAMA_FORMAT", "schema").lower()
+# Keep the model resident between requests; warm-up runs well inside this window
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+# Fixed context size: a per-request num_ctx change makes Ollama reload the
+# runner and drop the cached system-prompt prefix
+OLLAMA_NUM_CTX = int(os.environ.get("OLLAMA_NUM_CTX", 8192))
+OLLAMA_WARMUP_INTERVAL = float(os.environ.get("OLLAMA_WARMUP_INTERVAL", 300))
+# Stream the schema call even for non-streaming requests, so generation can
+# be cancelled on the first unfixable violation
+OLLAMA_STREAM_SCHEMA = os.environ.get("OLLAMA_STREAM_SCHEMA", "1").lower() in ("1", "true", "yes")
 
+MSG_OLLAMA_DOWN = "Could not get response from Ollama. Is it running? (ollama serve)"
+MSG_EMPTY = "AI returned no content. Try a clearer or shorter prompt."
+MSG_INVALID = "AI returned an invalid schema. Try simplifying your prompt."
+MSG_CIRCUIT_OPEN = "Ollama is failing or overloaded right now. Please retry shortly."
+MSG_DEADLINE = "The request deadline ran out before generation finished."
 
-def call_ollama_for_schema(user_prompt: str) -> str:
+schema_cache = SchemaCache()
+inflight = SingleFlight()
+jobs = JobRunner()
+# A call cut short by the caller's own deadline says nothing about Ollama's
+# health; one cut short by OLLAMA_TIMEOUT still counts as a slow call
+breaker = CircuitBreaker("Ollama", failure_types=(OllamaError,), ignore_types=(DeadlineExceeded,))
+
+
+def schema_cache_key(user_prompt: str) -> str:
+    return make_cache_key(user_prompt, OLLAMA_MODEL, SCHEMA_GENERATOR_SYSTEM_PROMPT)
+
+
+def _schema_chat_body(user_prompt: str, stream: bool, extra_messages: list = ()) -> dict:
     """
-    Call Ollama with schema-generator system prompt.
-    Returns raw string response (expected to be JSON).
+    Chat body for schema generation. The system prompt always comes first
+    and byte-identical, and model/num_ctx/keep_alive never vary, so Ollama
+    can reuse the evaluated system-prompt prefix from its KV cache and only
+    evaluate the user turn.
     """
-    url = f"{OLLAMA_BASE_URL}/api/chat"
     body = {
         "model": OLLAMA_MODEL,
         "messages": [
             {"role": "system", "content": SCHEMA_GENERATOR_SYSTEM_PROMPT},
             {"role": "user", "content": user_prompt},
+            *extra_messages,
         ],
-        "stream": False,
-        "options": {"temperature": 0.3, "num_predict": 1200},
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {
+            "temperature": 0.3,
+            "num_ctx": OLLAMA_NUM_CTX,
+            "num_predict": estimate_num_predict(user_prompt),
+        },
     }
-    data = json.dumps(body).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
+    if OLLAMA_FORMAT == "schema":
+        body["format"] = output_json_schema()
+    elif OLLAMA_FORMAT == "json":
+        body["format"] = "json"
+    return body
+
+
+def call_ollama_for_schema(user_prompt: str, timeout: Optional[float] = None) -> str:
+    """
+    Call Ollama with schema-generator system prompt.
+    Returns raw string response (expected to be JSON).
+    With OLLAMA_STREAM_SCHEMA the reply is streamed and parsed as it
+    arrives, and an unfixable violation raises SchemaViolation: closing the
+    connection there cancels the rest of the generation. A reply that
+    parses is read to Ollama's final "done" line, so its timings are
+    recorded and the keep-alive connection goes back to the pool.
+    """
+    if not OLLAMA_STREAM_SCHEMA:
+        out = get_client().chat(_schema_chat_body(user_prompt, stream=False), timeout)
+        return (out.get("message") or {}).get("content") or out.get("response") or ""
+
+    parser = SchemaStreamParser(check=stream_violation, restart=OLLAMA_FORMAT != "schema")
+    with closing(stream_ollama_for_schema(user_prompt, timeout)) as chunks:
+        for chunk in chunks:
+            if not parser.done:
+                parser.feed(chunk)
+    return parser.json_text() or parser.text
+
+
+def warm_up_schema_model() -> dict:
+    """
+    Load the schema model on every backend, pin it with keep_alive and
+    evaluate the system prompt so the prefix is cached before real traffic.
+    Returns {backend url: load_duration/prompt_eval_duration in ms, or error}.
+    """
+    body = _schema_chat_body("Reply with {}.", stream=False)
+    body.pop("format", None)
+    body["options"]["num_predict"] = 1
+    report = {}
+    for url, out in get_client().post_all("/api/chat", body).items():
+        if isinstance(out, Exception):
+            report[url] = {"error": str(out)}
+        else:
+            get_client().timings.record(out)
+            report[url] = {
+                "load_ms": round((out.get("load_duration") or 0) / 1e6, 1),
+                "prompt_eval_ms": round((out.get("prompt_eval_duration") or 0) / 1e6, 1),
+            }
+    return report
+
+
+def start_warmup(interval: float = OLLAMA_WARMUP_INTERVAL) -> Optional[threading.Thread]:
+    """Warm up now and then every `interval` seconds on a daemon thread (0 = startup only)."""
+    def loop():
+        while True:
+            warm_up_schema_model()
+            if interval <= 0:
+                return
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="ollama-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def call_ollama_for_repair(user_prompt: str, raw_output: str, errors: list, timeout: Optional[float] = None) -> str:
+    """
+    Targeted repair call: replay the conversation and ask for the same
+    schema with only the listed validation errors fixed.
+    """
+    error_list = "\n".join(f"- {e}" for e in errors)
+    body = _schema_chat_body(user_prompt, stream=False, extra_messages=[
+        {"role": "assistant", "content": raw_output},
+        {"role": "user", "content": (
+            "That schema failed validation with these errors:\n"
+            f"{error_list}\n"
+            "Return the full corrected JSON schema. Fix only these errors. Output JSON only."
+        )},
+    ])
+    out = get_client().chat(body, timeout)
+    return (out.get("message") or {}).get("content") or out.get("response") or ""
+
+
+def validate_with_repair(user_prompt: str, raw_output: str, deadline: Deadline = NO_DEADLINE) -> dict:
+    """
+    validate_schema with local rule-based repair; falls back to one
+    targeted LLM repair call only if local repair can't make it valid.
+    Raises RuntimeError if that repair call fails to reach Ollama.
+    """
+    result = repair_and_validate(raw_output)
+    if result["success"] or not SCHEMA_LLM_REPAIR:
+        return result
+
+    deadline.check("LLM repair")
+    repaired_output = breaker.call(
+        call_ollama_for_repair, user_prompt, raw_output, result["errors"], timeout=deadline.timeout(),
     )
-    try:
-        with urllib.request.urlopen(req, timeout=OLLAMA_TIMEOUT) as resp:
-            out = json.loads(resp.read().decode())
-            return (out.get("message") or {}).get("content") or out.get("response") or ""
-    except urllib.error.URLError as e:
-        raise RuntimeError(f"Ollama request failed: {e.reason}")
-    except json.JSONDecodeError as e:
-        raise RuntimeError(f"Ollama returned invalid JSON: {e}")
+    retry = repair_and_validate(repaired_output) if repaired_output.strip() else result
+    retry["llm_repair"] = True
+    return retry
 
 
-@bp.route("/generate", methods=["POST"])
-def generate():
-    """Schema-only generate: prompt → Ollama → validate_schema → return schema or errors."""
-    if not request.is_json:
-        return jsonify({"success": False, "errors": ["Content-Type must be application/json"]}), 400
+def stream_ollama_for_schema(user_prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+    """
+    Streaming variant of call_ollama_for_schema.
+    Yields content chunks as Ollama produces them.
+    """
+    with closing(get_client().chat_stream(_schema_chat_body(user_prompt, stream=True), timeout)) as lines:
+        for out in lines:
+            chunk = (out.get("message") or {}).get("content") or out.get("response") or ""
+            if chunk:
+                yield chunk
 
-    data = request.get_json() or {}
-    user_prompt = (data.get("prompt") or "").strip()
 
-    if not user_prompt:
-        return jsonify({
+def fetch_schema(user_prompt: str, cache_key: str, deadline: Deadline = NO_DEADLINE) -> dict:
+    """
+    Ollama → validate_schema for one prompt, coalesced with identical
+    concurrent requests. Returns validate_schema's result (plus "message"
+    on failure); valid schemas are cached. Raises RuntimeError if Ollama
+    fails, CircuitOpen while the breaker is open and DeadlineExpired once
+    the deadline runs out.
+    The shared call is bounded by the deadline of the caller that starts
+    it, so no work outlives its requester. A waiter whose own deadline has
+    time left isn't failed by that caller's deadline: it starts the call
+    again (once) with its own budget.
+    """
+    ran = []
+
+    def run() -> dict:
+        ran.append(True)
+        deadline.check("LLM call")
+        try:
+            raw_output = breaker.call(call_ollama_for_schema, user_prompt, timeout=deadline.timeout())
+        except SchemaViolation as e:
+            return {
+                "success": False,
+                "schema": None,
+                "errors": [str(e)],
+                "message": MSG_INVALID,
+                "aborted": True,
+            }
+        if not raw_output or not raw_output.strip():
+            return {
+                "success": False,
+                "schema": None,
+                "errors": ["Ollama returned an empty response"],
+                "message": MSG_EMPTY,
+            }
+        deadline.check("validation")
+        result = validate_with_repair(user_prompt, raw_output, deadline)
+        if result["success"]:
+            schema_cache.set(cache_key, result["schema"])
+        else:
+            result["message"] = MSG_INVALID
+        return result
+
+    for attempt in (0, 1):
+        try:
+            result, _shared = inflight.do(cache_key, run, timeout=deadline.remaining())
+        except TimeoutError:
+            raise DeadlineExpired("a coalesced LLM call finished")
+        except (DeadlineExceeded, DeadlineExpired):
+            if ran or attempt or deadline.expired:
+                raise
+            continue  # the leader's deadline, not ours: run it ourselves
+        return result
+    raise DeadlineExpired("LLM call")  # pragma: no cover
+
+
+def _local_schema(user_prompt: str, cache_key: str, fast_path: bool = True):
+    """
+    Schema available without Ollama: the archetype fast path for generic
+    prompts, else the cache. Returns (schema, source) or (None, None).
+    """
+    if fast_path and ARCHETYPE_FAST_PATH:
+        match = schema_from_prompt(user_prompt)
+        if match:
+            return match["schema"], "archetype"
+    schema = schema_cache.get(cache_key)
+    if schema is not None:
+        return schema, "cache"
+    return None, None
+
+
+def _failure(e: RuntimeError, deadline: Deadline) -> Tuple[dict, int]:
+    """Error payload and HTTP status for an Ollama call that failed or was refused."""
+    if isinstance(e, CircuitOpen):
+        return {
             "success": False,
-            "errors": ["Missing or empty prompt"],
-            "message": "Please provide a prompt describing the app you want.",
-        }), 400
+            "errors": [str(e)],
+            "message": MSG_CIRCUIT_OPEN,
+            "retry_after": e.retry_after,
+        }, 503
+    if isinstance(e, DeadlineExpired) or (isinstance(e, DeadlineExceeded) and deadline.remaining() is not None):
+        return {
+            "success": False,
+            "errors": [str(e)],
+            "message": MSG_DEADLINE,
+        }, 504
+    return {
+        "success": False,
+        "errors": [str(e)],
+        "message": MSG_OLLAMA_DOWN,
+    }, 503
+
+
+def _sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
 
-    # Step 1: Complexity check
-    complexity = detect_complexity(user_prompt)
-    warning = complexity["message"] if complexity["is_complex"] else None
 
-    # Step 2: Call Ollama for schema-only output
+def _meta_event(meta: dict, warning) -> str:
+    return _sse("meta", {
+        "title": meta["title"],
+        "type": meta["type"],
+        "theme": resolve_theme(meta["theme"]),
+        "warning": warning,
+    })
+
+
+def _done_event(schema: dict, built: dict, warning, cached: bool, source: str = "llm") -> str:
+    return _sse("done", {
+        "success": True,
+        "schema": schema,
+        "routes": list(built["pages"].keys()),
+        "title": built["title"],
+        "theme": built["theme"],
+        "warning": warning,
+        "cached": cached,
+        "source": source,
+    })
+
+
+def _generate_stream(user_prompt: str, warning, cache_key: str, fast_path: bool = True,
+                     deadline: Deadline = NO_DEADLINE) -> Iterator[str]:
+    """
+    SSE body for streaming generate. Events, in order:
+      meta  — repaired and validated meta + resolved theme
+      page  — one per page, repaired, validated and built as soon as it closes
+      done  — full validated schema (same shape as the non-streaming response)
+      error — errors + message + the status the non-streaming route would
+              return; any pages already sent should be discarded
+    """
+    local_schema, source = _local_schema(user_prompt, cache_key, fast_path)
+    if local_schema is not None:
+        built = build_app(local_schema)
+        yield _meta_event(local_schema["meta"], warning)
+        for index, page in enumerate(built["pages"].values()):
+            yield _sse("page", {"index": index, "page": page})
+        yield _done_event(local_schema, built, warning, cached=source == "cache", source=source)
+        return
+
+    parser = SchemaStreamParser(check=stream_violation, restart=OLLAMA_FORMAT != "schema")
+    meta = None
+    waiting_pages = []
+
+    def build_page(page: dict) -> dict:
+        built = build_app({"meta": meta, "pages": [page]})
+        return built["pages"][page["route"]]
+
     try:
-        raw_output = call_ollama_for_schema(user_prompt)
+        deadline.check("LLM call")
+        breaker.allow()
     except RuntimeError as e:
-        return jsonify({
+        payload, status = _failure(e, deadline)
+        yield _sse("error", dict(payload, status=status))
+        return
+
+    started = time.monotonic()
+    failed = False
+    chunks = stream_ollama_for_schema(user_prompt, timeout=deadline.timeout())
+    try:
+        for chunk in chunks:
+            for kind, path, value in parser.feed(chunk):
+                # Repair first, as the final repair_and_validate will, so
+                # the page events match the pages in "done"
+                if kind == EVENT_META:
+                    checked = validate_meta(repair_meta(value)[0])
+                    if not checked["success"]:
+                        continue  # reported by the final validate_schema
+                    meta = checked["meta"]
+                    yield _meta_event(meta, warning)
+                    for index, page in waiting_pages:
+                        yield _sse("page", {"index": index, "page": build_page(page)})
+                    waiting_pages = []
+                elif kind == EVENT_PAGE:
+                    checked = validate_page(repair_page(value, path[1])[0], path[1])
+                    if not checked["success"]:
+                        continue
+                    if meta is None:
+                        waiting_pages.append((path[1], checked["page"]))
+                    else:
+                        yield _sse("page", {"index": path[1], "page": build_page(checked["page"])})
+            if parser.done:
+                break
+    except SchemaViolation as e:
+        yield _sse("error", {
             "success": False,
             "errors": [str(e)],
-            "message": "Could not get response from Ollama. Is it running? (ollama serve)",
-        }), 503
+            "message": MSG_INVALID,
+            "status": 422,
+        })
+        return
+    except RuntimeError as e:
+        failed = breaker.is_failure(e)
+        payload, status = _failure(e, deadline)
+        yield _sse("error", dict(payload, status=status))
+        return
+    finally:
+        chunks.close()  # stops generation if we broke off early
+        breaker.record(failed, time.monotonic() - started)
 
-    if not raw_output or not raw_output.strip():
-        return jsonify({
+    raw_output = parser.json_text() or parser.text
+    if not raw_output.strip():
+        yield _sse("error", {
             "success": False,
             "errors": ["Ollama returned an empty response"],
-            "message": "AI returned no content. Try a clearer or shorter prompt.",
-        }), 422
-
-    # Step 3: Validate schema
-    result = validate_schema(raw_output)
+            "message": MSG_EMPTY,
+            "status": 422,
+        })
+        return
 
+    try:
+        deadline.check("validation")
+        result = validate_with_repair(user_prompt, raw_output, deadline)
+    except RuntimeError as e:
+        if isinstance(e, CircuitOpen) or deadline.expired:
+            payload, status = _failure(e, deadline)
+            yield _sse("error", dict(payload, status=status))
+            return
+        result = {"success": False, "errors": [str(e)]}
     if not result["success"]:
-        return jsonify({
+        yield _sse("error", {
             "success": False,
             "errors": result["errors"],
-            "message": "AI returned an invalid schema. Try simplifying your prompt.",
-        }), 422
+            "message": MSG_INVALID,
+            "status": 422,
+        })
+        return
 
-    # Step 4: Build code from validated schema
     schema = result["schema"]
-    built = build_app(schema)
+    schema_cache.set(cache_key, schema)
+    if deadline.expired:
+        payload, status = _failure(DeadlineExpired("build"), deadline)
+        yield _sse("error", dict(payload, status=status))
+        return
+    yield _done_event(schema, build_app(schema), warning, cached=False)
+
+
+def run_generate(user_prompt: str, fast_path: bool = True,
+                 deadline: Deadline = NO_DEADLINE, shared_components: bool = False) -> Tuple[dict, int]:
+    """
+    Non-streaming generate pipeline for one prompt.
+    Returns (response payload, HTTP status); shared by the sync route and jobs.
+    Every stage first checks `deadline` and fails with 504 once it has passed.
+    With shared_components, components repeated across pages come back once
+    under "components" (see code_builder.build_app_shared).
+    """
+    # Step 1: Complexity check
+    try:
+        deadline.check("complexity check")
+    except DeadlineExpired as e:
+        return _failure(e, deadline)
+    complexity = detect_complexity(user_prompt)
+    warning = complexity["message"] if complexity["is_complex"] else None
+
+    # Step 2: Archetype template for generic prompts, else a cached schema
+    cache_key = schema_cache_key(user_prompt)
+    schema, source = _local_schema(user_prompt, cache_key, fast_path)
+    repairs = []
+
+    if schema is None:
+        source = "llm"
+        # Step 3: Call Ollama (once per identical in-flight prompt) and validate
+        try:
+            result = fetch_schema(user_prompt, cache_key, deadline)
+        except RuntimeError as e:
+            return _failure(e, deadline)
+
+        if not result["success"]:
+            return {
+                "success": False,
+                "errors": result["errors"],
+                "message": result["message"],
+            }, 422
+
+        schema = result["schema"]
+        repairs = result.get("repairs", [])
+
+    # Step 4: Build code from validated schema
+    try:
+        deadline.check("build")
+    except DeadlineExpired as e:
+        return _failure(e, deadline)
+    built = build_app(schema, shared_components=shared_components)
 
     # Step 5: Return schema + generated pages
-    return jsonify({
+    payload = {
         "success": True,
         "schema": schema,
         "pages": built["pages"],
         "title": built["title"],
         "theme": built["theme"],
         "warning": warning,
+        "cached": source == "cache",
+        "source": source,
+        "repairs": repairs,
+    }
+    if shared_components:
+        payload["components"] = built["components"]
+        payload["dedupe"] = built["dedupe"]
+    return payload, 200
+
+
+def _read_prompt():
+    """Parse the JSON body. Returns (data, prompt, error_response)."""
+    if not request.is_json:
+        return None, None, (jsonify({"success": False, "errors": ["Content-Type must be application/json"]}), 400)
+
+    data = request.get_json() or {}
+    user_prompt = (data.get("prompt") or "").strip()
+
+    if not user_prompt:
+        return data, None, (jsonify({
+            "success": False,
+            "errors": ["Missing or empty prompt"],
+            "message": "Please provide a prompt describing the app you want.",
+        }), 400)
+    return data, user_prompt, None
+
+
+def _read_deadline():
+    """Request deadline from the X-Deadline-Ms header. Returns (deadline, error_response)."""
+    try:
+        return Deadline.from_headers(request.headers), None
+    except ValueError as e:
+        return None, (jsonify({"success": False, "errors": [str(e)]}), 400)
+
+
+def _json_response(payload: dict, status: int):
+    resp = jsonify(payload)
+    if payload.get("retry_after"):
+        resp.headers["Retry-After"] = str(payload["retry_after"])
+    return resp, status
+
+
+@bp.route("/generate", methods=["POST"])
+def generate():
+    """
+    Schema-only generate: prompt → Ollama → validate_schema → return schema or errors.
+    With {"stream": true} the response is text/event-stream (see _generate_stream).
+    With {"shared_components": true} components repeated across pages are
+    returned once under "components", with a "dedupe" size report.
+    An X-Deadline-Ms header bounds the whole request: 504 once it runs out,
+    503 + Retry-After while the Ollama circuit breaker is open.
+    """
+    data, user_prompt, error = _read_prompt()
+    if not error:
+        deadline, error = _read_deadline()
+    if error:
+        return error
+
+    if data.get("stream"):
+        complexity = detect_complexity(user_prompt)
+        warning = complexity["message"] if complexity["is_complex"] else None
+        return Response(
+            stream_with_context(_generate_stream(
+                user_prompt, warning, schema_cache_key(user_prompt),
+                fast_path=data.get("fast_path", True), deadline=deadline,
+            )),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    payload, status = run_generate(user_prompt, fast_path=data.get("fast_path", True), deadline=deadline,
+                                   shared_components=bool(data.get("shared_components")))
+    return _json_response(payload, status)
+
+
+def _read_schema():
+    """Parse and validate {"schema": ...} from the JSON body. Returns (data, schema, error_response)."""
+    if not request.is_json:
+        return None, None, (jsonify({"success": False, "errors": ["Content-Type must be application/json"]}), 400)
+    data = request.get_json() or {}
+    if "schema" not in data:
+        return data, None, (jsonify({"success": False, "errors": ["Missing schema"]}), 400)
+
+    result = validate_schema_data(data["schema"])
+    if not result["success"]:
+        return data, None, (jsonify({"success": False, "errors": result["errors"]}), 422)
+    return data, result["schema"], None
+
+
+@bp.route("/rebuild", methods=["POST"])
+def rebuild():
+    """
+    Incremental rebuild for editor round trips.
+    Body: {"schema": edited schema, "previous_schema": schema of the build the
+    client already holds}. Only added/changed pages come back with code; the
+    manifest ("routes", "unchanged", "removed", "changed_sections") tells the
+    client which pages to keep. A missing or invalid previous_schema, or a
+    theme change, rebuilds every page ("full": true). The validated schema
+    is echoed back only when validation normalised it ("schema"), since the
+    client already holds what it sent.
+    """
+    data, schema, error = _read_schema()
+    if error:
+        return error
+
+    previous = data.get("previous_schema")
+    prev_schema = None
+    if previous is not None:
+        prev_result = validate_schema_data(previous)
+        prev_schema = prev_result["schema"] if prev_result["success"] else None
+
+    delta = build_app_incremental(prev_schema, None, schema)
+    if schema != data["schema"]:
+        delta["schema"] = schema
+    return jsonify(delta)
+
+
+@bp.route("/build/stream", methods=["POST"])
+def build_stream():
+    """
+    Build a validated schema as NDJSON, one iter_build_app event per line
+    (app, then page + chunks route by route, then done). Pages reach the
+    client while later ones are still being rendered, and the response is
+    never held in memory as a whole.
+    """
+    _, schema, error = _read_schema()
+    if error:
+        return error
+
+    def lines() -> Iterator[str]:
+        for event in iter_build_app(schema):
+            yield json.dumps(event) + "\n"
+
+    return Response(
+        stream_with_context(lines()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@bp.route("/generate/jobs", methods=["POST"])
+def create_generate_job():
+    """
+    Queue a generate job; returns 202 + job id at once, or 429 when the queue is full.
+    An X-Deadline-Ms budget starts at submission, so it includes time spent queued.
+    """
+    data, user_prompt, error = _read_prompt()
+    if not error:
+        deadline, error = _read_deadline()
+    if error:
+        return error
+
+    try:
+        job_id = jobs.submit(run_generate, user_prompt, data.get("fast_path", True), deadline,
+                             bool(data.get("shared_components")))
+    except QueueFull as e:
+        resp = jsonify({
+            "success": False,
+            "errors": [str(e)],
+            "message": "Too many generations in progress. Please retry shortly.",
+        })
+        resp.headers["Retry-After"] = str(e.retry_after)
+        return resp, 429
+
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"{bp.url_prefix}/generate/jobs/{job_id}",
+    }), 202
+
+
+@bp.route("/generate/jobs/<job_id>", methods=["GET"])
+def get_generate_job(job_id: str):
+    """Job status; once finished, "result" holds the same payload /api/generate returns."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "errors": [f"Unknown job '{job_id}'"]}), 404
+    return jsonify(job)
+
+
+@bp.route("/generate/stats", methods=["GET"])
+def generate_stats():
+    """Counters for the generate pipeline's shared components."""
+    return jsonify({
+        "ollama": get_client().stats(),
+        "schema_cache": schema_cache.stats(),
+        "coalescing": inflight.stats(),
+        "jobs": jobs.stats(),
+        "breaker": breaker.stats(),
     })
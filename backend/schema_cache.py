@@ -0,0 +1,163 @@
+# /backend/schema_cache.py
+"""
+MechaStream — Prompt-keyed cache of validated schemas.
+Bounded LRU with TTL and optional JSON persistence, so equivalent prompts
+skip the Ollama round trip. Only schemas that passed validate_schema are stored.
+Config from env: SCHEMA_CACHE_MAX_ENTRIES, SCHEMA_CACHE_TTL, SCHEMA_CACHE_PATH,
+SCHEMA_CACHE_SAVE_INTERVAL.
+"""
+
+import atexit
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+SCHEMA_CACHE_MAX_ENTRIES = int(os.environ.get("SCHEMA_CACHE_MAX_ENTRIES", 512))
+SCHEMA_CACHE_TTL = int(os.environ.get("SCHEMA_CACHE_TTL", 24 * 3600))
+SCHEMA_CACHE_PATH = os.environ.get("SCHEMA_CACHE_PATH", "")
+# Seconds to gather inserts into one rewrite of the file (0 = write on every insert)
+SCHEMA_CACHE_SAVE_INTERVAL = float(os.environ.get("SCHEMA_CACHE_SAVE_INTERVAL", 2.0))
+
+_NON_WORD = re.compile(r"[^\w#]+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, unicode form, punctuation and whitespace-insensitive form of a prompt."""
+    text = unicodedata.normalize("NFKC", prompt).lower()
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def make_cache_key(prompt: str, model: str, system_prompt: str) -> str:
+    """Key = normalized prompt + model + hash of the system prompt."""
+    system_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+    material = "\0".join([model, system_hash, normalize_prompt(prompt)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class SchemaCache:
+    """
+    Thread-safe LRU of validated schemas with a per-entry TTL.
+    If `path` is set, entries are loaded from it on start and rewritten
+    (atomically) at most every `save_interval` seconds after inserts, and
+    once more at exit.
+    """
+
+    def __init__(self, max_entries: int = SCHEMA_CACHE_MAX_ENTRIES, ttl: float = SCHEMA_CACHE_TTL,
+                 path: Optional[str] = SCHEMA_CACHE_PATH or None,
+                 save_interval: float = SCHEMA_CACHE_SAVE_INTERVAL):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.path = path
+        self.save_interval = save_interval
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (created, schema)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        # Bumped on every change; the file holds generation _saved
+        self._generation = 0
+        self._saved = 0
+        self._save_timer: Optional[threading.Timer] = None
+        self._stats = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expired": 0, "saves": 0}
+        if self.path:
+            self._load()
+            atexit.register(self.flush)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] > self.ttl:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        return copy.deepcopy(entry[1])
+
+    def set(self, key: str, schema: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), copy.deepcopy(schema))
+            self._entries.move_to_end(key)
+            self._stats["sets"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+            self._generation += 1
+        if self.path:
+            self._schedule_save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+        if self.path:
+            self._schedule_save()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+            out["entries"] = len(self._entries)
+        lookups = out["hits"] + out["misses"]
+        out["max_entries"] = self.max_entries
+        out["hit_rate"] = round(out["hits"] / lookups, 3) if lookups else 0.0
+        return out
+
+    # ─── persistence ───
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        with self._lock:
+            for key, created, schema in data.get("entries", []):
+                if now - created <= self.ttl:
+                    self._entries[key] = (created, schema)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _schedule_save(self) -> None:
+        if self.save_interval <= 0:
+            self.flush()
+            return
+        with self._lock:
+            if self._save_timer is not None:
+                return  # the pending write will include this change
+            self._save_timer = threading.Timer(self.save_interval, self.flush)
+            self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def flush(self) -> None:
+        """Write the current entries to `path` now, unless the file already has them."""
+        if not self.path:
+            return
+        # Snapshot under _save_lock too, so a newer snapshot is never
+        # overwritten by an older one that finished writing later
+        with self._save_lock:
+            with self._lock:
+                self._save_timer = None
+                generation = self._generation
+                if generation == self._saved:
+                    return
+                entries = [[key, created, schema] for key, (created, schema) in self._entries.items()]
+            tmp = f"{self.path}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"version": 1, "entries": entries}, f)
+                os.replace(tmp, self.path)
+            except OSError:
+                return  # persistence is best-effort; the in-memory cache still works
+            with self._lock:
+                self._saved = generation
+                self._stats["saves"] += 1
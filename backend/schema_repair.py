@@ -0,0 +1,249 @@
+# /backend/schema_repair.py
+"""
+MechaStream — Deterministic repair of near-valid schemas.
+Runs between JSON parsing and AppSchema validation and fixes the trivial
+mistakes models make (wrong-case values, colors without '#', routes without
+a leading '/', missing variant/props, one section too many) so they don't
+cost another LLM call. Every change is recorded.
+"""
+
+import copy
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from schema_validator import (
+    ALLOWED_COMPONENTS,
+    ALLOWED_FONTS,
+    ALLOWED_PAGE_TYPES,
+    ALLOWED_RADIUS,
+    ALLOWED_SPACING,
+    MAX_PAGES,
+    MAX_SECTIONS_PER_PAGE,
+    parse_schema_json,
+    validate_schema_data,
+)
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# ALIASES
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+_COMPONENTS_BY_KEY = {c.lower(): c for c in ALLOWED_COMPONENTS}
+
+COMPONENT_ALIASES = {
+    "header": "Navbar", "nav": "Navbar", "navigation": "Navbar", "menu": "Navbar",
+    "banner": "Hero", "jumbotron": "Hero", "herosection": "Hero",
+    "feature": "Features", "featurelist": "Features", "featuregrid": "Features",
+    "testimonial": "Testimonials", "reviews": "Testimonials",
+    "calltoaction": "CTA", "cta": "CTA",
+    "stat": "Stats", "metrics": "Stats",
+    "plans": "Pricing", "pricingtable": "Pricing",
+    "contactform": "Form", "contact": "Form",
+    "graph": "Chart", "datatable": "Table",
+}
+
+PAGE_TYPE_ALIASES = {
+    "landingpage": "landing", "marketing": "landing", "website": "landing",
+    "admin": "dashboard", "adminpanel": "dashboard", "analytics": "dashboard",
+    "personal": "portfolio", "resume": "portfolio",
+    "startup": "saas", "software": "saas",
+}
+
+RADIUS_ALIASES = {
+    "none": "sharp", "square": "sharp", "0": "sharp",
+    "round": "rounded", "md": "rounded", "lg": "rounded", "medium": "rounded",
+    "full": "pill", "circle": "pill", "capsule": "pill",
+}
+
+SPACING_ALIASES = {
+    "tight": "compact", "dense": "compact", "small": "compact", "sm": "compact",
+    "default": "normal", "medium": "normal", "md": "normal", "regular": "normal",
+    "loose": "relaxed", "spacious": "relaxed", "large": "relaxed", "lg": "relaxed", "airy": "relaxed",
+}
+
+_HEX = re.compile(r"^[0-9a-fA-F]+$")
+
+
+def _key(value: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", value.lower())
+
+
+def normalize_component_name(name: Any) -> Optional[str]:
+    """Registry name for a component spelled with the wrong case or a common alias; None if unknown."""
+    if not isinstance(name, str):
+        return None
+    if name in ALLOWED_COMPONENTS:
+        return name
+    key = _key(name)
+    return _COMPONENTS_BY_KEY.get(key) or COMPONENT_ALIASES.get(key)
+
+
+def _normalize_choice(value: Any, allowed: set, aliases: Dict[str, str]) -> Optional[str]:
+    if not isinstance(value, str):
+        return None
+    lowered = value.strip().lower()
+    if lowered in allowed:
+        return lowered
+    first = lowered.split(",")[0].strip().strip("'\"")  # "Inter, sans-serif" -> "inter"
+    if first in allowed:
+        return first
+    return aliases.get(_key(value))
+
+
+def _normalize_color(value: Any) -> Optional[str]:
+    if not isinstance(value, str):
+        return None
+    digits = value.strip().lstrip("#")
+    if not _HEX.match(digits):
+        return None
+    if len(digits) in (3, 6):
+        return "#" + digits
+    if len(digits) in (4, 8):  # drop the alpha channel
+        return "#" + digits[:len(digits) * 3 // 4]
+    return None
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# REPAIR
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _fixer(changes: List[str]):
+    """fix(container, field, new, location): set the field and log the change if it differs."""
+    def fix(container: dict, field: str, new: Any, location: str) -> None:
+        old = container.get(field)
+        if new is not None and new != old:
+            container[field] = new
+            changes.append(f"{location}: {old!r} → {new!r}")
+    return fix
+
+
+def repair_schema(data: Any) -> Tuple[Any, List[str]]:
+    """
+    Returns (repaired copy of data, list of changes made).
+    Anything it doesn't recognise is left as-is for AppSchema to reject.
+    """
+    if not isinstance(data, dict):
+        return data, []
+    data = copy.deepcopy(data)
+    changes: List[str] = []
+    fix = _fixer(changes)
+
+    meta = data.get("meta")
+    if isinstance(meta, dict):
+        _repair_meta(meta, fix)
+
+    pages = data.get("pages")
+    if isinstance(pages, list):
+        for i, page in enumerate(pages):
+            if isinstance(page, dict):
+                _repair_page(page, i, fix, changes)
+
+    return data, changes
+
+
+def repair_meta(meta: Any) -> Tuple[Any, List[str]]:
+    """repair_schema for "meta" alone, as it arrives mid-stream."""
+    if not isinstance(meta, dict):
+        return meta, []
+    meta = copy.deepcopy(meta)
+    changes: List[str] = []
+    _repair_meta(meta, _fixer(changes))
+    return meta, changes
+
+
+def repair_page(page: Any, index: int) -> Tuple[Any, List[str]]:
+    """repair_schema for pages[index] alone; gives the same page as repairing the whole schema."""
+    if not isinstance(page, dict):
+        return page, []
+    page = copy.deepcopy(page)
+    changes: List[str] = []
+    _repair_page(page, index, _fixer(changes), changes)
+    return page, changes
+
+
+def _repair_meta(meta: dict, fix) -> None:
+    if isinstance(meta.get("title"), str):
+        fix(meta, "title", meta["title"].strip() or None, "meta → title")
+    fix(meta, "type", _normalize_choice(meta.get("type"), ALLOWED_PAGE_TYPES, PAGE_TYPE_ALIASES), "meta → type")
+
+    theme = meta.get("theme")
+    if isinstance(theme, dict):
+        fix(theme, "primaryColor", _normalize_color(theme.get("primaryColor")), "meta → theme → primaryColor")
+        fix(theme, "fontFamily", _normalize_choice(theme.get("fontFamily"), ALLOWED_FONTS, {}),
+            "meta → theme → fontFamily")
+        fix(theme, "borderRadius", _normalize_choice(theme.get("borderRadius"), ALLOWED_RADIUS, RADIUS_ALIASES),
+            "meta → theme → borderRadius")
+        fix(theme, "spacing", _normalize_choice(theme.get("spacing"), ALLOWED_SPACING, SPACING_ALIASES),
+            "meta → theme → spacing")
+
+
+def _repair_page(page: dict, i: int, fix, changes: List[str]) -> None:
+    where = f"pages → {i}"
+    route = page.get("route")
+    name = page.get("name")
+
+    if isinstance(route, str):
+        route = route.strip()
+        if route and not route.startswith("/"):
+            route = "/" + route
+        fix(page, "route", route or None, f"{where} → route")
+    elif route is None and isinstance(name, str) and name.strip():
+        fix(page, "route", "/" if i == 0 else "/" + _slug(name), f"{where} → route")
+
+    if (not isinstance(name, str) or not name.strip()) and isinstance(page.get("route"), str):
+        fix(page, "name", (page["route"].strip("/").replace("-", " ").title() or "Home"), f"{where} → name")
+
+    sections = page.get("sections")
+    if not isinstance(sections, list):
+        return
+
+    for j, section in enumerate(sections):
+        if not isinstance(section, dict):
+            continue
+        at = f"{where} → sections → {j}"
+        fix(section, "component", normalize_component_name(section.get("component")), f"{at} → component")
+        if not isinstance(section.get("variant"), str):
+            fix(section, "variant", "default", f"{at} → variant")
+        if section.get("props") is None:
+            section["props"] = {}
+            changes.append(f"{at} → props: missing → {{}}")
+
+    if len(sections) > MAX_SECTIONS_PER_PAGE:
+        # Keep a trailing Footer: drop the overflow from just before it
+        keep_footer = isinstance(sections[-1], dict) and sections[-1].get("component") == "Footer"
+        trimmed = sections[:MAX_SECTIONS_PER_PAGE - 1] + [sections[-1]] if keep_footer \
+            else sections[:MAX_SECTIONS_PER_PAGE]
+        page["sections"] = trimmed
+        changes.append(f"{where} → sections: trimmed {len(sections)} → {MAX_SECTIONS_PER_PAGE}")
+
+
+def stream_violation(path: tuple, value: Any) -> Optional[str]:
+    """
+    Check for SchemaStreamParser: the violations repair_schema can't fix,
+    caught while the model is still generating. Message format matches
+    validate_schema's errors.
+    """
+    if len(path) == 2 and path[0] == "pages" and value is None and path[1] >= MAX_PAGES:
+        return f"pages: Too many pages (more than {MAX_PAGES}). Max allowed: {MAX_PAGES}"
+    if (len(path) == 5 and path[0] == "pages" and path[2] == "sections" and path[4] == "component"
+            and isinstance(value, str) and normalize_component_name(value) is None):
+        location = " → ".join(str(p) for p in path)
+        return f"{location}: Component '{value}' is not in registry. Allowed: {sorted(ALLOWED_COMPONENTS)}"
+    return None
+
+
+def repair_and_validate(raw_output: str) -> dict:
+    """
+    validate_schema with the repair stage between parsing and validation.
+    Same result shape, plus "repairs": the list of changes applied.
+    """
+    data, error = parse_schema_json(raw_output)
+    if error:
+        return dict(error, repairs=[])
+    data, repairs = repair_schema(data)
+    result = validate_schema_data(data, raw_output)
+    result["repairs"] = repairs
+    return result
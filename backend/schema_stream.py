@@ -0,0 +1,218 @@
+# /backend/schema_stream.py
+"""
+MechaStream — Incremental parser for streamed schema JSON.
+Fed raw model output chunk by chunk; emits "meta" and each page of "pages"
+as soon as its closing brace arrives, so callers can validate and build
+pages before the model has finished generating. An optional check can
+reject the document mid-stream (SchemaViolation) so the caller can cancel
+generation instead of waiting for output that can't be used.
+"""
+
+import json
+from typing import Any, Callable, List, Optional, Tuple
+
+# Event kinds returned by SchemaStreamParser.feed()
+EVENT_META = "meta"
+EVENT_PAGE = "page"
+EVENT_DONE = "done"
+
+
+class SchemaViolation(ValueError):
+    """The streamed document broke a rule no repair can fix; `path` is where."""
+
+    def __init__(self, message: str, path: tuple):
+        super().__init__(message)
+        self.path = path
+
+
+class _Frame:
+    """One open container ({ or [) on the parser stack."""
+
+    __slots__ = ("kind", "key", "start", "expect_key", "count")
+
+    def __init__(self, kind: str, key: Any, start: int):
+        self.kind = kind          # "{" or "["
+        self.key = key            # key/index of this container in its parent
+        self.start = start        # offset of the opening bracket in the buffer
+        self.expect_key = kind == "{"
+        self.count = 0            # index of the current element (arrays)
+
+
+class SchemaStreamParser:
+    """
+    Character-level scanner that tracks JSON nesting without building the
+    document. Anything before the first "{" (chatter, ```json fences) is
+    skipped. Call feed() with each chunk; it returns a list of
+    (kind, path, value) events in arrival order:
+
+      ("meta", ("meta",), dict)        — the meta object closed
+      ("page", ("pages", i), dict)     — page i closed
+      ("done", (), dict)               — the root object closed
+
+    `check(path, value)` is called with every string value as it closes and
+    with value None whenever a container opens at `path`. If it returns a
+    message, feed() raises SchemaViolation.
+
+    With `restart`, a root object that doesn't decode to a schema (no "meta"
+    or "pages" key) is taken for chatter, e.g. "Sure {here} it is: {...}",
+    and the scan resumes just past its opening brace.
+    """
+
+    def __init__(self, check: Optional[Callable[[tuple, Any], Optional[str]]] = None,
+                 restart: bool = False):
+        self.check = check
+        self.restart = restart
+        self._buf = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._pending_key: Any = None
+        self.started = False
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._buf
+
+    def json_text(self) -> Optional[str]:
+        """The root JSON object once it has closed, else None."""
+        if not self.done:
+            return None
+        return self._buf[self._root_start:self._root_end]
+
+    def feed(self, chunk: str) -> List[Tuple[str, tuple, Any]]:
+        events: List[Tuple[str, tuple, Any]] = []
+        if self.done or not chunk:
+            self._buf += chunk or ""
+            return events
+
+        self._buf += chunk
+        buf = self._buf
+        i = self._pos
+        n = len(buf)
+
+        while i < n and not self.done:
+            c = buf[i]
+
+            if not self.started:
+                if c == "{":
+                    self.started = True
+                    self._root_start = i
+                    self._stack.append(_Frame("{", None, i))
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._close_string(buf, i)
+                i += 1
+                continue
+
+            top = self._stack[-1]
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":":
+                top.expect_key = False
+            elif c == ",":
+                if top.kind == "{":
+                    top.expect_key = True
+                else:
+                    top.count += 1
+            elif c in "{[":
+                key = self._pending_key if top.kind == "{" else top.count
+                self._stack.append(_Frame(c, key, i))
+                if self.check:
+                    self._pos = i + 1
+                    self._run_check(self._path(), None)
+            elif c in "}]":
+                frame = self._stack.pop()
+                event = self._close_container(frame, buf, i)
+                if event:
+                    events.append(event)
+                elif not self.started:
+                    i = frame.start  # rejected root: rescan from just past its "{"
+            i += 1
+
+        self._pos = i
+        return events
+
+    # ─── internals ───
+
+    def _path(self) -> tuple:
+        return tuple(f.key for f in self._stack[1:])
+
+    def _run_check(self, path: tuple, value: Any) -> None:
+        message = self.check(path, value)
+        if message:
+            raise SchemaViolation(message, path)
+
+    def _close_string(self, buf: str, end: int) -> None:
+        top = self._stack[-1]
+        if top.kind == "{" and top.expect_key:
+            try:
+                self._pending_key = json.loads(buf[self._string_start:end + 1])
+            except json.JSONDecodeError:
+                self._pending_key = buf[self._string_start + 1:end]
+        elif self.check:
+            try:
+                value = json.loads(buf[self._string_start:end + 1])
+            except json.JSONDecodeError:
+                return
+            key = self._pending_key if top.kind == "{" else top.count
+            self._pos = end + 1
+            self._run_check(self._path() + (key,), value)
+
+    def _close_container(self, frame: _Frame, buf: str, end: int) -> Optional[Tuple[str, tuple, Any]]:
+        if not self._stack:
+            value = self._decode(buf, frame.start, end)
+            if self.restart and not (isinstance(value, dict) and ("meta" in value or "pages" in value)):
+                self.started = False
+                self._pending_key = None
+                return None
+            self.done = True
+            self._root_end = end + 1
+            return (EVENT_DONE, (), value)
+
+        path = self._path() + (frame.key,)
+        if path == ("meta",):
+            return (EVENT_META, path, self._decode(buf, frame.start, end))
+        if len(path) == 2 and path[0] == "pages" and frame.kind == "{":
+            return (EVENT_PAGE, path, self._decode(buf, frame.start, end))
+        return None
+
+    @staticmethod
+    def _decode(buf: str, start: int, end: int) -> Any:
+        try:
+            return json.loads(buf[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+
+
+def extract_json_object(text: str) -> Optional[str]:
+    """
+    The first complete, decodable JSON object in `text`, skipping any chatter
+    or ``` fences around it. None if the first object never closes
+    (truncated output) or nothing in the text decodes.
+    """
+    start = text.find("{")
+    while start != -1:
+        parser = SchemaStreamParser()
+        parser.feed(text[start:])
+        if not parser.done:
+            return None
+        candidate = parser.json_text()
+        try:
+            json.loads(candidate)
+            return candidate
+        except json.JSONDecodeError:
+            start = text.find("{", start + 1)  # e.g. "{braces}" in the chatter
+    return None
@@ -2,7 +2,13 @@
 
 from pydantic import BaseModel, validator, ValidationError
 from typing import List, Dict, Any
+from functools import lru_cache
+import copy
 import json
+import os
+import re
+
+from schema_stream import extract_json_object
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # ALLOWED VALUES
@@ -132,6 +138,116 @@ class AppSchema(BaseModel):
         return v
 
 
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# FAST PATH
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# Single pass over the raw dict applying the same rules as the models
+# above and returning what AppSchema(**data).dict() would. It accepts only
+# exact JSON types (str, list, dict); anything invalid or needing pydantic's
+# coercion (numbers as strings, tuples, ...) returns None and goes through
+# pydantic, which then produces the error messages.
+
+SCHEMA_FAST_VALIDATE = os.environ.get("SCHEMA_FAST_VALIDATE", "1").lower() in ("1", "true", "yes")
+
+
+def _copy_json(value: Any) -> Any:
+    """Copy dicts/lists the way .dict() does; leaves scalars shared."""
+    kind = type(value)
+    if kind is dict:
+        return {k: _copy_json(v) for k, v in value.items()}
+    if kind is list:
+        return [_copy_json(v) for v in value]
+    return value
+
+
+def _compile_fast_validators():
+    # Constants bound as closure locals: one dict/set lookup per check
+    components, page_types, fonts = ALLOWED_COMPONENTS, ALLOWED_PAGE_TYPES, ALLOWED_FONTS
+    radius, spacing = ALLOWED_RADIUS, ALLOWED_SPACING
+    max_sections, max_pages = MAX_SECTIONS_PER_PAGE, MAX_PAGES
+    copy_json = _copy_json
+
+    def theme_fast(theme):
+        if type(theme) is not dict:
+            return None
+        color = theme.get("primaryColor")
+        font = theme.get("fontFamily")
+        border = theme.get("borderRadius")
+        space = theme.get("spacing")
+        if type(color) is not str or color[:1] != "#" or len(color) not in (4, 7):
+            return None
+        if type(font) is not str or type(border) is not str or type(space) is not str:
+            return None
+        font = font.lower()
+        if font not in fonts or border not in radius or space not in spacing:
+            return None
+        return {"primaryColor": color, "fontFamily": font, "borderRadius": border, "spacing": space}
+
+    def meta_fast(meta):
+        if type(meta) is not dict:
+            return None
+        title = meta.get("title")
+        page_type = meta.get("type")
+        if type(title) is not str or type(page_type) is not str or page_type not in page_types:
+            return None
+        title = title.strip()
+        if not title:
+            return None
+        theme = theme_fast(meta.get("theme"))
+        if theme is None:
+            return None
+        return {"title": title, "type": page_type, "theme": theme}
+
+    def page_fast(page):
+        if type(page) is not dict:
+            return None
+        name = page.get("name")
+        route = page.get("route")
+        sections = page.get("sections")
+        if type(name) is not str or type(route) is not str or route[:1] != "/":
+            return None
+        if type(sections) is not list or not 0 < len(sections) <= max_sections:
+            return None
+        out = []
+        for section in sections:
+            if type(section) is not dict:
+                return None
+            component = section.get("component")
+            variant = section.get("variant")
+            props = section.get("props")
+            if type(component) is not str or component not in components or type(variant) is not str:
+                return None
+            if type(props) is not dict:
+                return None
+            for key in props:
+                if type(key) is not str:
+                    return None
+            out.append({"component": component, "variant": variant, "props": copy_json(props)})
+        return {"name": name, "route": route, "sections": out}
+
+    def app_fast(data):
+        if type(data) is not dict:
+            return None
+        pages = data.get("pages")
+        if type(pages) is not list or not 0 < len(pages) <= max_pages:
+            return None
+        meta = meta_fast(data.get("meta"))
+        if meta is None:
+            return None
+        out = []
+        for page in pages:
+            checked = page_fast(page)
+            if checked is None:
+                return None
+            out.append(checked)
+        return {"meta": meta, "pages": out}
+
+    return app_fast, meta_fast, page_fast
+
+
+_fast_app_schema, _fast_meta, _fast_page = _compile_fast_validators()
+
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # MAIN VALIDATOR FUNCTION
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -144,26 +260,57 @@ def validate_schema(raw_output: str) -> dict:
       - schema: validated dict (if valid)
       - errors: list of error messages (if invalid)
     """
-    # Step 1: Strip any accidental markdown
-    cleaned = raw_output.strip()
-    if cleaned.startswith("```"):
-        cleaned = cleaned.split("```")[1]
-        if cleaned.startswith("json"):
-            cleaned = cleaned[4:]
-    cleaned = cleaned.strip()
+    data, error = parse_schema_json(raw_output)
+    if error:
+        return error
+    return validate_schema_data(data, raw_output)
+
+
+def parse_schema_json(raw_output: str):
+    """
+    Steps 1-2 of validate_schema: find the JSON object and parse it.
+    Returns (data, None) or (None, failure result).
+    """
+    # Step 1: Take the first complete JSON object, wherever the model put it
+    # (after chatter, inside ``` fences, followed by more text)
+    cleaned = extract_json_object(raw_output)
+    if cleaned is None:
+        # Truncated or no object: parse from the first "{" for a useful error
+        start = raw_output.find("{")
+        cleaned = raw_output[start:] if start != -1 else raw_output.strip()
 
     # Step 2: Parse JSON
     try:
-        data = json.loads(cleaned)
+        return json.loads(cleaned), None
     except json.JSONDecodeError as e:
-        return {
+        return None, {
             "success": False,
             "schema": None,
             "errors": [f"Invalid JSON from AI: {str(e)}"],
             "raw": raw_output
         }
 
-    # Step 3: Validate against schema
+
+def validate_schema_data(data: Any, raw_output: str = "") -> dict:
+    """
+    Step 3 of validate_schema: validate parsed data against AppSchema.
+    Valid plain-JSON input takes the fast path; pydantic handles the rest.
+    """
+    if not isinstance(data, dict):
+        return {
+            "success": False,
+            "schema": None,
+            "errors": ["Schema must be a JSON object"],
+            "raw": raw_output
+        }
+    if SCHEMA_FAST_VALIDATE:
+        schema = _fast_app_schema(data)
+        if schema is not None:
+            return {"success": True, "schema": schema, "errors": []}
+    return _validate_with_pydantic(data, raw_output)
+
+
+def _validate_with_pydantic(data: dict, raw_output: str = "") -> dict:
     try:
         validated = AppSchema(**data)
         return {
@@ -172,18 +319,109 @@ def validate_schema(raw_output: str) -> dict:
             "errors": []
         }
     except ValidationError as e:
-        errors = []
-        for error in e.errors():
-            location = " → ".join(str(loc) for loc in error["loc"])
-            errors.append(f"{location}: {error['msg']}")
         return {
             "success": False,
             "schema": None,
-            "errors": errors,
+            "errors": _format_errors(e),
             "raw": raw_output
         }
 
 
+def _format_errors(e: ValidationError, prefix: tuple = ()) -> List[str]:
+    """Flatten pydantic errors into 'loc → loc: msg' strings."""
+    errors = []
+    for error in e.errors():
+        location = " → ".join(str(loc) for loc in prefix + tuple(error["loc"]))
+        errors.append(f"{location}: {error['msg']}")
+    return errors
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# PARTIAL VALIDATORS (streaming)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def validate_meta(data: Any) -> dict:
+    """
+    Validate the "meta" object on its own, as it arrives mid-stream.
+    Returns {"success", "meta", "errors"}; error locations match validate_schema.
+    """
+    if not isinstance(data, dict):
+        return {"success": False, "meta": None, "errors": ["meta: value is not a valid dict"]}
+    meta = _fast_meta(data) if SCHEMA_FAST_VALIDATE else None
+    if meta is not None:
+        return {"success": True, "meta": meta, "errors": []}
+    try:
+        return {"success": True, "meta": MetaModel(**data).dict(), "errors": []}
+    except ValidationError as e:
+        return {"success": False, "meta": None, "errors": _format_errors(e, ("meta",))}
+
+
+def validate_page(data: Any, index: int) -> dict:
+    """
+    Validate a single entry of "pages" on its own, as it arrives mid-stream.
+    Returns {"success", "page", "errors"}; error locations match validate_schema.
+    """
+    if not isinstance(data, dict):
+        return {"success": False, "page": None, "errors": [f"pages → {index}: value is not a valid dict"]}
+    page = _fast_page(data) if SCHEMA_FAST_VALIDATE else None
+    if page is not None:
+        return {"success": True, "page": page, "errors": []}
+    try:
+        return {"success": True, "page": PageModel(**data).dict(), "errors": []}
+    except ValidationError as e:
+        return {"success": False, "page": None, "errors": _format_errors(e, ("pages", index))}
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# STRUCTURED OUTPUT
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _inline_refs(node: Any, definitions: Dict[str, Any]) -> Any:
+    if isinstance(node, dict):
+        if "$ref" in node:
+            return _inline_refs(definitions[node["$ref"].split("/")[-1]], definitions)
+        return {
+            k: _inline_refs(v, definitions) for k, v in node.items()
+            if k != "definitions" and not (k == "title" and isinstance(v, str))
+        }
+    if isinstance(node, list):
+        return [_inline_refs(v, definitions) for v in node]
+    return node
+
+
+@lru_cache(maxsize=1)
+def _output_json_schema() -> Dict[str, Any]:
+    schema = AppSchema.schema()
+    out = _inline_refs(schema, schema.get("definitions", {}))
+
+    # Validators aren't visible to .schema(); mirror them as JSON Schema constraints
+    meta = out["properties"]["meta"]["properties"]
+    meta["title"]["minLength"] = 1
+    meta["type"]["enum"] = sorted(ALLOWED_PAGE_TYPES)
+    theme = meta["theme"]["properties"]
+    theme["primaryColor"]["pattern"] = "^#([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$"
+    theme["fontFamily"]["enum"] = sorted(ALLOWED_FONTS)
+    theme["borderRadius"]["enum"] = sorted(ALLOWED_RADIUS)
+    theme["spacing"]["enum"] = sorted(ALLOWED_SPACING)
+
+    pages = out["properties"]["pages"]
+    pages.update(minItems=1, maxItems=MAX_PAGES)
+    page = pages["items"]["properties"]
+    page["route"]["pattern"] = "^/"
+    page["sections"].update(minItems=1, maxItems=MAX_SECTIONS_PER_PAGE)
+    section = page["sections"]["items"]["properties"]
+    section["component"]["enum"] = sorted(ALLOWED_COMPONENTS)
+    return out
+
+
+def output_json_schema() -> Dict[str, Any]:
+    """
+    JSON Schema for AppSchema (refs inlined, allowed values as enums) for
+    Ollama's structured-output "format" parameter.
+    """
+    return copy.deepcopy(_output_json_schema())
+
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # COMPLEXITY DETECTOR
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -215,3 +453,44 @@ def detect_complexity(prompt: str) -> dict:
             )
         }
     return {"is_complex": False, "triggers": [], "message": ""}
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# TOKEN BUDGET
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+# Rough token costs of schema JSON, measured on typical qwen2.5-coder output
+TOKENS_META = 90
+TOKENS_PER_PAGE = 60
+TOKENS_PER_SECTION = 110
+MIN_NUM_PREDICT = 512
+MAX_NUM_PREDICT = 4096
+
+_NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "single": 1}
+_PAGE_COUNT = re.compile(r"\b(\d+|one|two|three|four|five|six|single)[\s-]*pages?\b")
+_NAMED_PAGE = re.compile(r"\b(home|about|pricing|contact|blog|dashboard|features|login|signup|faq|team|careers)\s+pages?\b")
+
+
+def estimate_page_count(prompt: str) -> int:
+    """Pages the prompt asks for: an explicit count, else distinct named pages, else 1."""
+    prompt_lower = prompt.lower()
+    match = _PAGE_COUNT.search(prompt_lower)
+    if match:
+        word = match.group(1)
+        count = int(word) if word.isdigit() else _NUMBER_WORDS[word]
+    else:
+        count = len(set(_NAMED_PAGE.findall(prompt_lower))) or 1
+    return max(1, min(MAX_PAGES, count))
+
+
+def estimate_num_predict(prompt: str) -> int:
+    """
+    num_predict sized to the schema the prompt should produce: requested
+    pages × full sections, plus headroom for prompts that trip the
+    complexity detector (they tend to produce longer props).
+    """
+    pages = estimate_page_count(prompt)
+    tokens = TOKENS_META + pages * (TOKENS_PER_PAGE + MAX_SECTIONS_PER_PAGE * TOKENS_PER_SECTION)
+    if detect_complexity(prompt)["is_complex"]:
+        tokens *= 1.15
+    return int(max(MIN_NUM_PREDICT, min(MAX_NUM_PREDICT, tokens * 1.2)))
@@ -0,0 +1,58 @@
+import json
+
+import app as flask_app
+import routes.generate as generate_route
+from archetypes import ARCHETYPES, build_archetype_schema, classify_prompt, schema_from_prompt
+from schema_cache import SchemaCache
+from schema_validator import validate_schema_data
+
+
+def test_every_archetype_builds_a_valid_schema():
+    for name in ARCHETYPES:
+        result = validate_schema_data(build_archetype_schema(name, "page"))
+        assert result["success"], (name, result["errors"])
+
+
+def test_generic_prompts_match_an_archetype():
+    cases = {
+        "portfolio for a photographer": "portfolio",
+        "pricing page for my SaaS": "pricing",
+        "SaaS landing page for Acme": "saas",
+    }
+    for prompt, archetype in cases.items():
+        match = schema_from_prompt(prompt)
+        assert match and match["archetype"] == archetype, prompt
+
+
+def test_brand_and_color_are_filled_from_the_prompt():
+    schema = schema_from_prompt("SaaS landing page for Acme in blue")["schema"]
+    assert schema["meta"]["title"] == "Acme"
+    assert schema["meta"]["theme"]["primaryColor"] == "#3b82f6"
+
+
+def test_apostrophes_are_not_quotes():
+    cozy = schema_from_prompt("website for my restaurant, it's the best in town and it's cozy")["schema"]
+    assert "best in town" not in json.dumps(cozy)
+    assert cozy["meta"]["title"] == "Restaurant"
+
+    bakery = schema_from_prompt("website for Joe's bakery and Sam's cafe")["schema"]
+    assert bakery["meta"]["title"] == "Joe's Bakery And Sam's Cafe"
+    assert schema_from_prompt("restaurant website called 'Bloom'")["schema"]["meta"]["title"] == "Bloom"
+    assert schema_from_prompt("restaurant website called Joe's Diner")["schema"]["meta"]["title"] == "Joe's Diner"
+
+
+def test_specific_prompts_go_to_the_llm():
+    assert classify_prompt("admin dashboard with charts for my SaaS")["confidence"] == 0
+    assert classify_prompt("portfolio with home, about and contact pages")["confidence"] == 0
+    assert schema_from_prompt("something nice") is None
+
+
+def test_generate_skips_ollama_for_archetype_prompts(monkeypatch):
+    calls = []
+    monkeypatch.setattr(generate_route, "call_ollama_for_schema", lambda prompt, timeout=None: calls.append(prompt))
+    monkeypatch.setattr(generate_route, "schema_cache", SchemaCache(path=None))
+    client = flask_app.app.test_client()
+
+    body = client.post("/api/generate", json={"prompt": "portfolio for a photographer"}).get_json()
+    assert body["success"] and body["source"] == "archetype"
+    assert calls == []
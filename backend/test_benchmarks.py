@@ -0,0 +1,25 @@
+from benchmarks.corpus import SIZES, raw_corpus, schema_corpus
+from benchmarks.run import compare, run
+from schema_validator import MAX_PAGES, MAX_SECTIONS_PER_PAGE, validate_schema
+
+
+def test_corpus_is_valid_and_max_size_is_the_limit():
+    for size, raw in raw_corpus().items():
+        assert validate_schema(raw)["success"], size
+    biggest = schema_corpus()["max"]
+    assert len(biggest["pages"]) == MAX_PAGES
+    assert all(len(p["sections"]) == MAX_SECTIONS_PER_PAGE for p in biggest["pages"])
+
+
+def test_run_records_speed_and_allocations():
+    out = run(["build_app"], min_time=0.001, repeats=1)
+    assert set(out["results"]) == {f"build_app[{size}]" for size in SIZES}
+    metrics = out["results"]["build_app[max]"]
+    assert metrics["ops_per_sec"] > 0 and metrics["alloc_blocks"] > 0
+
+
+def test_compare_flags_regressions_past_tolerance():
+    baseline = {"x[small]": {"ops_per_sec": 100.0, "peak_kib": 10.0, "alloc_blocks": 10}}
+    rows = compare({"x[small]": {"ops_per_sec": 70.0, "peak_kib": 10.5, "alloc_blocks": 20}}, baseline, 0.2)
+    assert rows[0]["regressions"] == ["ops_per_sec", "alloc_blocks"]
+    assert compare({"y[small]": {"ops_per_sec": 1.0, "peak_kib": 1.0, "alloc_blocks": 1}}, baseline)[0]["regressions"] == []
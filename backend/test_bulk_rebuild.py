@@ -0,0 +1,90 @@
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.corpus import make_schema
+from bulk_rebuild import Throttle, format_progress, load_checkpoint, run_rebuild
+from code_builder import build_app
+
+
+def _rows(n):
+    rows = []
+    for i in range(n):
+        schema = make_schema(1 + i % 3, 4, seed=i)
+        current = build_app(schema)["pages"] if i % 2 else {"/": {"code": "stale"}}
+        rows.append({"id": f"00000000-0000-0000-0000-{i:012d}", "schema_json": schema, "pages_json": current})
+    rows.append({"id": "00000000-0000-0000-0000-999999999999", "schema_json": {"meta": {}}, "pages_json": None})
+    return rows
+
+
+def test_rebuild_writes_only_stale_rows_in_order(tmp_path):
+    rows = _rows(9)
+    written = []
+
+    def write(updates):
+        written.append(updates)
+        return len(updates)
+
+    checkpoint = tmp_path / "checkpoint.json"
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        stats = run_rebuild(iter(rows), write, pool, batch_size=2, checkpoint=str(checkpoint))
+
+    assert stats["rows"] == 10
+    assert stats["failed"] == 1 and stats["failures"][0][0] == rows[-1]["id"]
+    ids = [project_id for batch in written for project_id, _, _ in batch]
+    assert ids == [row["id"] for row in rows[:9:2]]  # stale rows only, in input order
+    for batch in written:
+        for project_id, pages, schema in batch:
+            row = next(r for r in rows if r["id"] == project_id)
+            assert json.loads(pages) == build_app(row["schema_json"])["pages"]
+            assert json.loads(schema) == row["schema_json"]
+    assert stats["updated"] == 5 and stats["unchanged"] == 4 and stats["skipped"] == 0
+    assert load_checkpoint(str(checkpoint)) == rows[-1]["id"]
+
+
+def test_checkpoint_only_covers_written_batches(tmp_path):
+    rows = _rows(4)
+    checkpoint = tmp_path / "checkpoint.json"
+
+    def failing_write(updates):
+        if any(project_id == rows[2]["id"] for project_id, _, _ in updates):
+            raise RuntimeError("db down")
+        return len(updates)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        with pytest.raises(RuntimeError, match="db down"):
+            run_rebuild(iter(rows), failing_write, pool, batch_size=2, checkpoint=str(checkpoint))
+    assert load_checkpoint(str(checkpoint)) == rows[1]["id"]
+
+
+def test_rows_edited_since_the_read_are_skipped():
+    rows = _rows(4)
+
+    def write(updates):
+        # As if rows[2]'s schema_json changed after the cursor read it: the
+        # guarded UPDATE matches one row fewer
+        return sum(1 for project_id, _, _ in updates if project_id != rows[2]["id"])
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        stats = run_rebuild(iter(rows), write, pool, batch_size=2)
+    assert stats["updated"] == 1 and stats["skipped"] == 1
+    assert stats["unchanged"] == 2 and stats["failed"] == 1
+    assert "1 skipped" in format_progress(stats, 1.0)
+
+
+def test_throttle_limits_rate():
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    throttle = Throttle(max_rate=100, clock=lambda: now[0], sleep=sleep)
+    throttle.wait(50)
+    assert slept == [0.5]
+    now[0] += 1.0
+    throttle.wait(50)
+    assert slept == [0.5]
+    assert throttle.slept == 0.5
@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+
+import pytest
+
+import app as flask_app
+import routes.generate as generate_route
+from benchmarks.corpus import make_schema
+from circuit_breaker import CircuitBreaker, CircuitOpen
+from deadline import Deadline, DeadlineExpired
+from ollama_client import DeadlineExceeded, OllamaError
+from schema_cache import SchemaCache
+
+
+def _fail():
+    raise OllamaError("down")
+
+
+def _breaker(**options):
+    defaults = dict(failure_rate=0.5, window=4, min_calls=2, open_seconds=0.05,
+                    failure_types=(OllamaError,), ignore_types=(DeadlineExceeded,))
+    return CircuitBreaker("test", **dict(defaults, **options))
+
+
+def test_opens_on_failure_rate_and_rejects_without_calling():
+    breaker = _breaker()
+    for _ in range(2):
+        with pytest.raises(OllamaError):
+            breaker.call(_fail)
+    assert breaker.state == "open"
+
+    calls = []
+    with pytest.raises(CircuitOpen) as e:
+        breaker.call(calls.append, 1)
+    assert calls == [] and e.value.retry_after >= 1
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = _breaker()
+    for _ in range(2):
+        with pytest.raises(OllamaError):
+            breaker.call(_fail)
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    with pytest.raises(OllamaError):
+        breaker.call(_fail)
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+
+
+def test_slow_calls_and_ignored_errors():
+    slow = _breaker(slow_ms=0, slow_rate=1.0)
+    slow.call(lambda: None)
+    slow.call(lambda: None)
+    assert slow.state == "open"
+
+    breaker = _breaker()
+
+    def timed_out():
+        raise DeadlineExceeded("timed out")
+
+    for _ in range(4):
+        with pytest.raises(DeadlineExceeded):
+            breaker.call(timed_out)
+    assert breaker.state == "closed"
+
+
+def test_deadline_from_header():
+    assert Deadline.from_headers({}, default_ms=0).remaining() is None
+    deadline = Deadline.from_headers({"X-Deadline-Ms": "50"}, max_ms=20)
+    assert 0 < deadline.remaining() <= 0.02
+    with pytest.raises(ValueError):
+        Deadline.from_headers({"X-Deadline-Ms": "soon"})
+    for bad in ("inf", "1e300"):
+        with pytest.raises(ValueError):
+            Deadline.from_headers({"X-Deadline-Ms": bad})
+    with pytest.raises(DeadlineExpired):
+        Deadline(0).check("build")
+
+
+def test_generate_fails_fast_when_circuit_is_open(monkeypatch):
+    breaker = _breaker(open_seconds=30)
+    monkeypatch.setattr(generate_route, "breaker", breaker)
+    monkeypatch.setattr(generate_route, "schema_cache", SchemaCache(path=None))
+    monkeypatch.setattr(generate_route, "call_ollama_for_schema", lambda prompt, timeout=None: _fail())
+    client = flask_app.app.test_client()
+
+    body = {"prompt": "inventory tracker", "fast_path": False}
+    assert [client.post("/api/generate", json=body).status_code for _ in range(2)] == [503, 503]
+    resp = client.post("/api/generate", json=body)
+    assert resp.status_code == 503 and int(resp.headers["Retry-After"]) >= 1
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_generate_returns_504_when_deadline_passes(monkeypatch):
+    timeouts = []
+
+    def slow_ollama(prompt, timeout=None):
+        timeouts.append(timeout)
+        time.sleep(timeout)
+        raise DeadlineExceeded("Ollama request failed: timed out")
+
+    monkeypatch.setattr(generate_route, "breaker", _breaker())
+    monkeypatch.setattr(generate_route, "schema_cache", SchemaCache(path=None))
+    monkeypatch.setattr(generate_route, "call_ollama_for_schema", slow_ollama)
+    client = flask_app.app.test_client()
+
+    resp = client.post("/api/generate", json={"prompt": "inventory tracker", "fast_path": False},
+                       headers={"X-Deadline-Ms": "30"})
+    assert resp.status_code == 504
+    assert 0 < timeouts[0] <= 0.03  # the Ollama call itself stops at the deadline
+    assert generate_route.breaker.state == "closed"
+    assert generate_route.inflight.stats()["in_flight"] == 0
+
+    for bad in ("abc", "nan", "inf", "-inf", "1e300"):
+        assert client.post("/api/generate", json={"prompt": "x"}, headers={"X-Deadline-Ms": bad}).status_code == 400
+
+
+def test_short_deadline_leader_does_not_fail_coalesced_waiters(monkeypatch):
+    raw = json.dumps(make_schema(1, 3))
+
+    calls = []
+
+    def slow_ollama(prompt, timeout=None):
+        calls.append(timeout)
+        if timeout is not None and timeout < 0.2:
+            time.sleep(timeout)
+            raise DeadlineExceeded("Ollama request failed: timed out")
+        time.sleep(0.2)
+        return raw
+
+    monkeypatch.setattr(generate_route, "breaker", _breaker())
+    monkeypatch.setattr(generate_route, "schema_cache", SchemaCache(path=None))
+    monkeypatch.setattr(generate_route, "call_ollama_for_schema", slow_ollama)
+
+    outcomes = {}
+
+    def caller(name, deadline):
+        try:
+            outcomes[name] = generate_route.fetch_schema("inventory tracker", "k", deadline)["success"]
+        except RuntimeError as e:
+            outcomes[name] = e
+
+    leader = threading.Thread(target=caller, args=("leader", Deadline(50)))
+    leader.start()
+    while not generate_route.inflight.stats()["in_flight"]:
+        time.sleep(0.005)
+    waiter = threading.Thread(target=caller, args=("waiter", Deadline()))
+    waiter.start()
+    leader.join()
+    waiter.join()
+
+    assert isinstance(outcomes["leader"], (DeadlineExceeded, DeadlineExpired))
+    assert outcomes["waiter"] is True
+    assert len(calls) == 2 and calls[0] <= 0.05 and calls[1] is None  # retried with the waiter's budget
+    assert generate_route.inflight.stats()["in_flight"] == 0
@@ -0,0 +1,136 @@
+import copy
+import json
+import zipfile
+
+import app as flask_app
+from benchmarks.corpus import make_schema
+from code_builder import apply_build_delta, build_app, build_app_incremental, iter_build_app
+from exporter import build_zip
+
+
+def _edited(schema):
+    edited = copy.deepcopy(schema)
+    edited["pages"][1]["sections"][2]["props"]["title"] = "Changed"
+    del edited["pages"][2]
+    edited["pages"].append({"name": "Blog", "route": "/blog", "sections": [
+        {"component": "Hero", "variant": "default", "props": {"headline": "News"}}]})
+    return edited
+
+
+def test_incremental_build_rebuilds_only_changed_pages():
+    schema = make_schema(3, 5)
+    built = build_app(schema)
+    edited = _edited(schema)
+    removed = schema["pages"][2]["route"]
+
+    delta = build_app_incremental(schema, built, edited)
+    assert not delta["full"]
+    assert set(delta["pages"]) == {edited["pages"][1]["route"], "/blog"}
+    assert delta["unchanged"] == ["/"]
+    assert delta["removed"] == [removed]
+    assert delta["changed_sections"] == {edited["pages"][1]["route"]: [2]}
+    assert apply_build_delta(built, delta) == build_app(edited)
+
+
+def test_incremental_build_theme_change_rebuilds_everything():
+    schema = make_schema(3, 5)
+    edited = copy.deepcopy(schema)
+    edited["meta"]["theme"]["borderRadius"] = "pill"
+    delta = build_app_incremental(schema, None, edited)
+    assert delta["full"]
+    assert delta["unchanged"] == []
+    assert apply_build_delta(build_app(schema), delta) == build_app(edited)
+
+
+def test_rebuild_route_returns_only_changed_pages():
+    schema = make_schema(3, 5)
+    edited = _edited(schema)
+    client = flask_app.app.test_client()
+
+    resp = client.post("/api/rebuild", json={"schema": edited, "previous_schema": schema})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert set(body["pages"]) == {edited["pages"][1]["route"], "/blog"}
+    assert body["unchanged"] == ["/"]
+    assert "schema" not in body  # the client already has it
+    full = client.post("/api/rebuild", json={"schema": edited}).get_json()
+    assert full["full"] and len(full["pages"]) == 3
+    assert len(resp.get_data()) < len(client.post("/api/rebuild", json={"schema": edited}).get_data())
+
+    padded = json.loads(json.dumps(edited))
+    padded["meta"]["title"] = "  " + padded["meta"]["title"] + "  "
+    normalised = client.post("/api/rebuild", json={"schema": padded, "previous_schema": schema}).get_json()
+    assert normalised["schema"]["meta"]["title"] == edited["meta"]["title"]
+
+    bad = client.post("/api/rebuild", json={"schema": {"meta": {}}, "previous_schema": schema})
+    assert bad.status_code == 422
+
+
+def test_iter_build_app_matches_build_app():
+    schema = make_schema(5, 6)
+    built = build_app(schema)
+    events = list(iter_build_app(schema))
+
+    assert events[0] == {"type": "app", "title": built["title"], "theme": built["theme"], "routes": list(built["pages"])}
+    assert events[-1] == {"type": "done", "pages": 5}
+    codes = {}
+    for event in events:
+        if event["type"] == "chunk":
+            codes[event["route"]] = codes.get(event["route"], "") + event["code"]
+    assert codes == {route: page["code"] for route, page in built["pages"].items()}
+
+
+def test_build_stream_route_sends_ndjson():
+    schema = make_schema(3, 5)
+    client = flask_app.app.test_client()
+    resp = client.post("/api/build/stream", json={"schema": schema})
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    events = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [e["route"] for e in events if e["type"] == "page"] == list(build_app(schema)["pages"])
+
+    assert client.post("/api/build/stream", json={"schema": {"pages": []}}).status_code == 422
+    assert client.post("/api/build/stream", json={}).status_code == 400
+
+
+def _multi_page_schema():
+    schema = make_schema(3, 4)
+    for page in schema["pages"]:
+        page["sections"][-1]["props"] = {"brand": "Acme", "tagline": "Ship it."}
+    schema["pages"][2]["sections"][0]["props"] = {"logo": "Acme Docs", "links": ["Home"]}
+    return schema
+
+
+def test_shared_components_are_emitted_once():
+    schema = _multi_page_schema()
+    built = build_app(schema, shared_components=True)
+
+    assert set(built["components"]) == {"Navbar", "Footer"}
+    for route in ("/", "/features"):
+        code = built["pages"][route]["code"]
+        assert "import Navbar from '../components/Navbar';" in code
+        assert "const Navbar" not in code and "const Footer" not in code
+        assert "<Navbar />" in code and "<Footer />" in code
+    assert "const Navbar" in built["pages"]["/pricing"]["code"]  # its own variant stays inline
+    assert "export default Footer;" in built["components"]["Footer"]["code"]
+
+    report = built["dedupe"]
+    assert report["saved_bytes"] == report["inline_bytes"] - report["output_bytes"] > 0
+    inline = build_app(schema)
+    assert report["inline_bytes"] == sum(len(p["code"].encode("utf-8")) for p in inline["pages"].values())
+
+
+def test_shared_component_variants_get_numbered_names():
+    schema = _multi_page_schema()
+    schema["pages"].append(dict(copy.deepcopy(schema["pages"][2]), name="Docs", route="/docs"))
+    built = build_app(schema, shared_components=True)
+    assert {"Navbar", "Navbar2", "Footer"} <= set(built["components"])
+    assert "import Navbar from '../components/Navbar2';" in built["pages"]["/docs"]["code"]
+
+
+def test_exporter_writes_shared_components():
+    built = build_app(_multi_page_schema(), shared_components=True)
+    names = zipfile.ZipFile(build_zip(built)).namelist()
+    assert "Acme Cloud/components/Navbar.tsx" in names
+    assert "Acme Cloud/components/.gitkeep" not in names
+    assert "Acme Cloud/components/.gitkeep" in zipfile.ZipFile(build_zip(build_app(make_schema(1, 3)))).namelist()
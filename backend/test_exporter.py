@@ -0,0 +1,223 @@
+import errno
+import io
+import os
+import struct
+import zipfile
+
+import app as flask_app
+import export_cache
+import routes.export as export_route
+from benchmarks.corpus import make_schema
+from code_builder import build_app
+from export_cache import ExportCache
+from exporter import STATIC_FILES, ZipStreamWriter, build_zip, compress_entry, predeflate, project_files, zip_stream
+
+
+def _read(data):
+    zf = zipfile.ZipFile(io.BytesIO(data))
+    assert zf.testzip() is None
+    return {info.filename: zf.read(info).decode("utf-8") for info in zf.infolist()}
+
+
+def test_zip_stream_contains_every_project_file():
+    built = build_app(make_schema(3, 5))
+    chunks = list(zip_stream(built))
+    assert len(chunks) > len(list(project_files(built)))
+    files = _read(b"".join(chunks))
+    assert files == {f"Acme Cloud/{path}": content for path, content in project_files(built)}
+    assert _read(build_zip(built).getvalue()) == files
+
+
+def test_writer_stores_and_deflates_large_entries():
+    writer = ZipStreamWriter()
+    big = ("x" * 100 + "\n").encode() * 5000
+    data = b"".join(writer.add_compressed("big.txt", compress_entry(big, 6)))
+    data += b"".join(writer.add_compressed("héllo.txt", compress_entry(b"hi", None)))
+    data += writer.close()
+
+    zf = zipfile.ZipFile(io.BytesIO(data))
+    assert zf.read("big.txt") == big
+    assert zf.read("héllo.txt") == b"hi"
+    assert zf.getinfo("héllo.txt").compress_type == zipfile.ZIP_STORED
+    assert zf.getinfo("big.txt").compress_size < len(big) // 10
+
+
+def test_export_route_streams_zip(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_route, "export_cache", ExportCache(str(tmp_path)))
+    client = flask_app.app.test_client()
+    resp = client.post("/api/export", json={"schema": make_schema(2, 4), "shared_components": True})
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/zip"
+    assert resp.headers["Content-Disposition"] == 'attachment; filename="Acme Cloud.zip"'
+    assert resp.is_streamed
+    assert "Acme Cloud/pages/index.tsx" in _read(resp.get_data())
+
+    assert client.post("/api/export", json={"schema": {"meta": {}}}).status_code == 422
+
+
+def test_export_route_encodes_non_ascii_download_names(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_route, "export_cache", ExportCache(str(tmp_path)))
+    client = flask_app.app.test_client()
+    schema = make_schema(1, 3)
+    schema["meta"]["title"] = "日本 Shop"
+
+    miss = client.post("/api/export", json={"schema": schema})
+    miss.get_data()  # stored once streamed to the end
+    hit = client.post("/api/export", json={"schema": schema})
+    assert (miss.headers["X-Export-Cache"], hit.headers["X-Export-Cache"]) == ("miss", "hit")
+    for resp in (miss, hit):
+        disposition = resp.headers["Content-Disposition"]
+        disposition.encode("latin-1")  # what a WSGI server requires of header values
+        assert "filename*=UTF-8''%E6%97%A5%E6%9C%AC%20Shop.zip" in disposition
+    assert miss.headers["Content-Disposition"] == hit.headers["Content-Disposition"]
+
+
+def test_static_entries_are_spliced_from_the_predeflated_pool():
+    predeflate.cache_clear()
+    for size in (2, 3):
+        _read(build_zip(build_app(make_schema(size, 4))).getvalue())
+    info = predeflate.cache_info()
+    assert info.misses == len(STATIC_FILES)
+    assert info.hits == len(STATIC_FILES)
+
+
+def test_export_cache_tee_stores_only_complete_streams(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=1 << 20)
+    assert cache.get("k") is None
+    assert b"".join(cache.tee("k", iter([b"ab", b"cd"]))) == b"abcd"
+    with open(cache.get("k"), "rb") as f:
+        assert f.read() == b"abcd"
+
+    partial = cache.tee("p", iter([b"ab", b"cd"]))
+    next(partial)
+    partial.close()
+    assert cache.get("p") is None
+    assert os.listdir(tmp_path) == ["k.zip"]
+    assert cache.stats()["hits"] == 1 and cache.stats()["aborted"] == 1
+
+
+def test_export_cache_tee_keeps_streaming_when_the_disk_fills(tmp_path, monkeypatch):
+    real_open = open
+
+    class FullDisk:
+        def __init__(self, path, mode):
+            self._file = real_open(path, mode)
+
+        def write(self, data):
+            raise OSError(errno.ENOSPC, "No space left on device")
+
+        def close(self):
+            self._file.close()
+
+    monkeypatch.setattr(export_cache, "open", FullDisk, raising=False)
+    cache = ExportCache(str(tmp_path), max_bytes=1 << 20)
+    assert b"".join(cache.tee("k", iter([b"ab", b"cd", b"ef"]))) == b"abcdef"
+    assert os.listdir(tmp_path) == []
+    assert cache.stats()["write_errors"] == 1 and cache.stats()["stores"] == 0
+
+
+def test_export_cache_evicts_least_recently_used(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=250)
+    for i, key in enumerate(("a", "b", "c")):
+        list(cache.tee(key, iter([b"x" * 100])))
+        os.utime(cache.path(key), (i, i))
+    assert cache.get("a") is None and cache.get("b") and cache.get("c")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_export_route_serves_repeat_exports_from_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_route, "export_cache", ExportCache(str(tmp_path)))
+    client = flask_app.app.test_client()
+    body = {"schema": make_schema(3, 5)}
+
+    first = client.post("/api/export", json=body)
+    data = first.get_data()
+    assert first.headers["X-Export-Cache"] == "miss"
+    second = client.post("/api/export", json=body)
+    assert second.headers["X-Export-Cache"] == "hit"
+    assert second.get_data() == data
+    assert second.headers["Content-Disposition"].startswith("attachment")
+    second.close()
+
+    edited = {"schema": make_schema(3, 5, seed=1)}
+    assert client.post("/api/export", json=edited).headers["X-Export-Cache"] == "miss"
+
+
+def test_parallel_compression_keeps_entry_order_and_content():
+    built = build_app(make_schema(5, 6), shared_components=True)
+    sequential = zipfile.ZipFile(io.BytesIO(b"".join(zip_stream(built, parallel=False))))
+    parallel = zipfile.ZipFile(io.BytesIO(b"".join(zip_stream(built, parallel=True))))
+    assert parallel.testzip() is None
+    assert parallel.namelist() == sequential.namelist()
+    assert [parallel.read(n) for n in parallel.namelist()] == [sequential.read(n) for n in sequential.namelist()]
+
+
+def test_per_entry_levels_and_tiny_files_stored():
+    built = build_app(make_schema(2, 4))
+    zf = zipfile.ZipFile(io.BytesIO(b"".join(zip_stream(built))))
+    assert zf.getinfo("Acme Cloud/components/.gitkeep").compress_type == zipfile.ZIP_STORED
+    assert zf.getinfo("Acme Cloud/pages/index.tsx").compress_type == zipfile.ZIP_DEFLATED
+
+    store_pages = lambda path, size: None if path.startswith("pages/") else 9
+    for parallel in (False, True):
+        zf = zipfile.ZipFile(io.BytesIO(b"".join(zip_stream(built, parallel=parallel, level_for=store_pages))))
+        assert zf.testzip() is None
+        assert zf.getinfo("Acme Cloud/pages/index.tsx").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("Acme Cloud/components/.gitkeep").compress_type == zipfile.ZIP_DEFLATED
+
+
+def _local_headers(data):
+    """(name, flags, crc, compressed size, size) of each local header, read front to back."""
+    zf = zipfile.ZipFile(io.BytesIO(data))
+    out = []
+    for info in zf.infolist():
+        fields = struct.unpack_from("<IHHHHHIIIHH", data, info.header_offset)
+        assert fields[0] == 0x04034B50
+        assert fields[2] == info.flag_bits  # local and central flags agree
+        out.append((info.filename, fields[2], fields[6], fields[7], fields[8]))
+    return zf, out
+
+
+def test_prepared_entries_carry_sizes_in_the_local_header():
+    data = build_zip(build_app(make_schema(2, 4))).getvalue()
+    zf, headers = _local_headers(data)
+    assert any(zf.getinfo(name).compress_type == zipfile.ZIP_STORED for name, *_ in headers)
+    for name, flags, crc, compressed_size, size in headers:
+        info = zf.getinfo(name)
+        assert not flags & 0x08  # no data descriptor: readable by forward-only readers
+        assert (crc, compressed_size, size) == (info.CRC, info.compress_size, info.file_size)
+
+
+def test_archives_are_byte_for_byte_reproducible():
+    built = build_app(make_schema(5, 6))
+    first = build_zip(built).getvalue()
+    assert build_zip(build_app(make_schema(5, 6))).getvalue() == first
+    assert b"".join(zip_stream(built, parallel=True)) == first
+    assert all(info.date_time == (1980, 1, 1, 0, 0, 0) for info in zipfile.ZipFile(io.BytesIO(first)).infolist())
+
+
+def test_export_route_etag_and_304(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_route, "export_cache", ExportCache(str(tmp_path)))
+    client = flask_app.app.test_client()
+    body = {"schema": make_schema(3, 5)}
+
+    first = client.post("/api/export", json=body)
+    etag = first.headers["ETag"]
+    data = first.get_data()
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    cached = client.post("/api/export", json=body)
+    assert cached.headers["ETag"] == etag and cached.get_data() == data
+    cached.close()
+
+    monkeypatch.setattr(export_route, "export_cache", ExportCache(""))
+    uncached = client.post("/api/export", json=body)
+    assert uncached.headers["ETag"] == etag and uncached.get_data() == data
+
+    not_modified = client.post("/api/export", json=body, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b""
+    assert not_modified.headers["ETag"] == etag
+
+    other = client.post("/api/export", json={"schema": make_schema(2, 5)}, headers={"If-None-Match": etag})
+    assert other.status_code == 200 and other.headers["ETag"] != etag
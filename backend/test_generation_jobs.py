@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+import app as flask_app
+import routes.generate as generate_route
+from generation_jobs import JobRunner, QueueFull
+
+
+def _wait(runner, job_id, timeout=2.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        job = runner.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.005)
+    raise AssertionError("job did not finish")
+
+
+def test_job_result_is_stored():
+    runner = JobRunner(workers=1, max_queue=1)
+    job = _wait(runner, runner.submit(lambda x: ({"value": x}, 200), 7))
+    assert job["status"] == "done"
+    assert (job["result"], job["status_code"]) == ({"value": 7}, 200)
+
+
+def test_full_queue_rejects_with_retry_after():
+    runner = JobRunner(workers=1, max_queue=1)
+    gate = threading.Event()
+    runner.submit(lambda: (gate.wait(2), 200))
+    runner.submit(lambda: ({}, 200))
+    with pytest.raises(QueueFull) as exc:
+        runner.submit(lambda: ({}, 200))
+    assert exc.value.retry_after >= 1
+    gate.set()
+    assert runner.stats()["rejected"] == 1
+
+
+def test_crashing_job_is_marked_failed():
+    runner = JobRunner(workers=1, max_queue=0)
+
+    def boom():
+        raise ValueError("bad")
+
+    job = _wait(runner, runner.submit(boom))
+    assert (job["status"], job["status_code"]) == ("failed", 500)
+
+
+def test_job_routes(monkeypatch):
+    runner = JobRunner(workers=1, max_queue=0)
+    gate = threading.Event()
+    monkeypatch.setattr(generate_route, "jobs", runner)
+    monkeypatch.setattr(generate_route, "run_generate", lambda prompt, fast_path=True, deadline=None, shared_components=False: (gate.wait(2) and {"success": True}, 200))
+    client = flask_app.app.test_client()
+
+    created = client.post("/api/generate/jobs", json={"prompt": "blog"})
+    assert created.status_code == 202
+    rejected = client.post("/api/generate/jobs", json={"prompt": "blog"})
+    assert rejected.status_code == 429 and int(rejected.headers["Retry-After"]) >= 1
+
+    gate.set()
+    _wait(runner, created.get_json()["job_id"])
+    status = client.get(created.get_json()["status_url"]).get_json()
+    assert status["status"] == "done" and status["result"] == {"success": True}
+    assert client.get("/api/generate/jobs/nope").status_code == 404
@@ -0,0 +1,59 @@
+import json
+import random
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+import ollama_client
+import routes.generate as generate_route
+from app import app
+from loadtest.load_generator import percentile, run_load
+from loadtest.mock_ollama import MockOllama, malform, parse_latency, start_mock_server
+from schema_cache import SchemaCache
+
+
+def test_latency_specs():
+    rng = random.Random(1)
+    assert parse_latency("fixed:250")(rng) == 0.25
+    assert all(0.1 <= parse_latency("uniform:100:200")(rng) <= 0.2 for _ in range(50))
+    assert parse_latency("normal:-50:1")(rng) == 0.0
+    with pytest.raises(ValueError):
+        parse_latency("gamma:1")
+
+
+def test_malformed_outputs_fail_parsing_or_validation():
+    schema = MockOllama().corpus[0]
+    rng = random.Random(3)
+    with pytest.raises(ValueError):
+        json.loads(malform(schema, "truncated", rng))
+    assert "```json" in malform(schema, "chatter", rng)
+    assert json.loads(malform(schema, "invalid", rng))["meta"]["type"] == "blog-ish"
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50, 95, 99)
+    assert percentile([], 99) == 0.0
+
+
+def test_load_run_against_mock(monkeypatch):
+    mock = MockOllama(latency="fixed:5", error_rate=0.25, seed=7)
+    mock_server = start_mock_server(mock)
+    monkeypatch.setattr(ollama_client, "_client", ollama_client.OllamaClient(
+        f"http://127.0.0.1:{mock_server.server_address[1]}"))
+    monkeypatch.setattr(generate_route, "schema_cache", SchemaCache(path=None))
+    monkeypatch.setattr(generate_route, "breaker", generate_route.CircuitBreaker(min_calls=1000))
+    app_server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=app_server.serve_forever, daemon=True).start()
+    try:
+        report = run_load(f"http://127.0.0.1:{app_server.server_port}", rps=40, duration=0.5, seed=1)
+    finally:
+        app_server.shutdown()
+        mock_server.shutdown()
+
+    assert report["requests"] == 20
+    assert report["outcomes"]["ok"] + report["outcomes"].get("ollama_unavailable", 0) == 20
+    assert report["sources"] == {"llm": report["outcomes"]["ok"]}
+    assert 0 < report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
+    assert mock.stats()["requests"] >= 20
@@ -0,0 +1,234 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ollama_client import DeadlineExceeded, OllamaClient, OllamaError
+
+
+class _StubOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    reply = {"message": {"role": "assistant", "content": "{}"}, "done": True,
+             "total_duration": 900_000_000, "load_duration": 800_000_000, "prompt_eval_duration": 40_000_000,
+             "prompt_eval_count": 12, "eval_duration": 60_000_000, "eval_count": 3}
+    delay = 0.0
+    name = "stub"
+
+    def do_GET(self):
+        self._send(200, {"models": []})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.delay)
+        if body.get("model") == "missing":
+            self._send(404, {"error": "model 'missing' not found"})
+        elif body.get("stream"):
+            lines = [{"message": {"content": c}, "done": False} for c in ("{", "}")]
+            lines.append(dict(self.reply, message={"content": ""}))
+            self._send(200, None, b"".join(json.dumps(l).encode() + b"\n" for l in lines))
+        else:
+            self._send(200, dict(self.reply, backend=self.name))
+
+    def _send(self, status, payload, raw=None):
+        data = raw if raw is not None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_stub(name="stub", delay=0.0):
+    handler = type(f"Stub_{name}", (_StubOllama,), {"name": name, "delay": delay})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+@pytest.fixture
+def stubs():
+    servers = []
+
+    def start(name="stub", delay=0.0):
+        server, url = _start_stub(name, delay)
+        servers.append(server)
+        return url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def stub_url(stubs):
+    return stubs()
+
+
+def test_connections_are_reused(stub_url):
+    client = OllamaClient(stub_url, pool_size=2, timeout=5)
+    for _ in range(5):
+        assert client.chat({"model": "m", "messages": []})["done"] is True
+    stats = client.stats()["backends"][0]["pool"]
+    assert stats["requests"] == 5
+    assert stats["connections_created"] == 1
+    assert stats["connections_reused"] == 4
+
+
+def test_stream_yields_lines_and_returns_connection(stub_url):
+    client = OllamaClient(stub_url, pool_size=1, timeout=5)
+    chunks = [out["message"]["content"] for out in client.chat_stream({"model": "m", "messages": []})]
+    assert chunks == ["{", "}", ""]
+    client.chat({"model": "m", "messages": []})
+    assert client.stats()["backends"][0]["pool"]["connections_created"] == 1
+
+
+def test_http_error_raises_ollama_error(stub_url):
+    client = OllamaClient(stub_url, pool_size=1, timeout=5)
+    with pytest.raises(OllamaError, match="not found"):
+        client.chat({"model": "missing", "messages": []})
+
+
+def test_unreachable_backend_raises_runtime_error():
+    client = OllamaClient("http://127.0.0.1:9", pool_size=1, timeout=1)
+    with pytest.raises(RuntimeError):
+        client.chat({"model": "m", "messages": []})
+
+
+def test_least_outstanding_spreads_concurrent_requests(stubs):
+    client = OllamaClient([stubs("a", delay=0.1), stubs("b", delay=0.1)], pool_size=4, timeout=5)
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(client.chat({"model": "m"})["backend"]))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(seen) == ["a", "a", "b", "b"]
+
+
+def test_dead_backend_is_ejected_and_requests_fail_over(stubs):
+    client = OllamaClient(["http://127.0.0.1:9", stubs("live")], pool_size=2, timeout=2,
+                          eject_after=2, eject_seconds=60)
+    for _ in range(6):
+        assert client.chat({"model": "m"})["backend"] == "live"
+    dead, live = client.stats()["backends"]
+    assert dead["healthy"] is False and dead["ejections"] == 1
+    assert dead["requests"] == 2  # no traffic once ejected
+    assert live["healthy"] is True
+
+
+def test_active_health_check_reinstates_backend(stubs):
+    client = OllamaClient([stubs("a")], pool_size=1, timeout=2, eject_after=1, eject_seconds=60)
+    backend = client.balancer.backends[0]
+    client.balancer.record(backend, ok=False)
+    assert client.stats()["backends"][0]["healthy"] is False
+    assert client.balancer.check(backend) is True
+    assert client.stats()["backends"][0]["healthy"] is True
+
+
+def test_hedged_request_is_won_by_fast_backend(stubs):
+    client = OllamaClient([stubs("slow", delay=1.0), stubs("fast")], pool_size=2, timeout=5,
+                          hedge=True, hedge_after_ms=50)
+    slow = client.balancer.backends[0]
+    slow.outstanding = -1  # make least-outstanding pick the slow backend first
+    started = time.monotonic()
+    assert client.chat({"model": "m"})["backend"] == "fast"
+    assert time.monotonic() - started < 0.8
+    assert client.stats()["hedging"]["hedge_wins"] == 1
+
+
+def test_post_all_reaches_every_backend_and_timings_are_reported(stubs):
+    client = OllamaClient([stubs("a"), stubs("b")], pool_size=1, timeout=5)
+    results = client.post_all("/api/chat", {"model": "m"})
+    assert sorted(out["backend"] for out in results.values()) == ["a", "b"]
+
+    client.chat({"model": "m"})
+    timings = client.stats()["timings"]
+    assert timings["responses"] == 1 and timings["cold_loads"] == 1
+    assert timings["avg_load_ms"] == 800.0 and timings["last"]["prompt_eval_ms"] == 40.0
+
+
+def _start_garbage_server():
+    """Answers every request with a malformed status line."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(8)
+
+    def serve():
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return
+            conn.recv(65536)
+            conn.sendall(b"garbage\r\n\r\n")
+            conn.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return sock, f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def test_malformed_reply_releases_the_pool_slot():
+    sock, url = _start_garbage_server()
+    try:
+        client = OllamaClient(url, pool_size=1, timeout=2, eject_after=100)
+        for _ in range(3):  # a leaked slot would make the 2nd call wait for a free connection
+            with pytest.raises(OllamaError, match="failed: (?!no free)"):
+                client.chat({"model": "m", "messages": []})
+        assert client.balancer.check(client.balancer.backends[0]) is False
+        assert client.stats()["backends"][0]["pool"]["connections_discarded"] == 3  # check() has its own connection
+    finally:
+        sock.close()
+
+
+def test_streamed_schema_call_reuses_connection_and_records_timings(stub_url, monkeypatch):
+    import routes.generate as generate_route
+
+    client = OllamaClient(stub_url, pool_size=1, timeout=5)
+    monkeypatch.setattr(generate_route, "OLLAMA_STREAM_SCHEMA", True)
+    monkeypatch.setattr(generate_route, "get_client", lambda: client)
+    for _ in range(3):
+        assert generate_route.call_ollama_for_schema("landing page") == "{}"
+    stats = client.stats()
+    assert (stats["backends"][0]["pool"]["connections_created"], stats["backends"][0]["pool"]["connections_reused"]) == (1, 2)
+    assert stats["timings"]["responses"] == 3
+
+
+def test_stream_fails_over_before_the_first_line(stubs):
+    client = OllamaClient(["http://127.0.0.1:9", stubs("live")], pool_size=1, timeout=2)
+    for _ in range(2):  # whichever backend is picked first
+        chunks = [out["message"]["content"] for out in client.chat_stream({"model": "m", "messages": []})]
+        assert chunks == ["{", "}", ""]
+
+
+def test_busy_backend_passes_the_health_check(stub_url):
+    client = OllamaClient(stub_url, pool_size=1, timeout=2, eject_after=1)
+    backend = client.balancer.backends[0]
+    held = backend.pool.acquire(time.monotonic() + 1)  # every pooled slot in use
+    try:
+        assert client.balancer.check(backend, timeout=0.5) is True
+        assert backend.healthy(time.monotonic())
+    finally:
+        backend.pool.release(held, reusable=False)
+
+
+def test_deadlines_do_not_count_against_backend_health(stub_url):
+    client = OllamaClient(stub_url, pool_size=1, timeout=2, eject_after=1)
+    backend = client.balancer.backends[0]
+    held = backend.pool.acquire(time.monotonic() + 1)
+    try:
+        with pytest.raises(DeadlineExceeded, match="no free connection"):
+            client.chat({"model": "m", "messages": []}, timeout=0.05)
+        with pytest.raises(DeadlineExceeded):
+            list(client.chat_stream({"model": "m", "messages": []}, timeout=0.05))
+    finally:
+        backend.pool.release(held, reusable=False)
+    assert backend.consecutive_failures == 0
+    assert backend.healthy(time.monotonic())
@@ -0,0 +1,90 @@
+import json
+import threading
+
+import app as flask_app
+import routes.generate as generate_route
+from schema_cache import SchemaCache, make_cache_key
+
+SCHEMA = {
+    "meta": {
+        "title": "Acme",
+        "type": "saas",
+        "theme": {"primaryColor": "#111", "fontFamily": "inter", "borderRadius": "pill", "spacing": "compact"},
+    },
+    "pages": [{"name": "Home", "route": "/", "sections": [{"component": "Hero", "variant": "default", "props": {}}]}],
+}
+
+
+def test_key_ignores_case_punctuation_and_whitespace():
+    a = make_cache_key("SaaS landing page for Acme!", "m", "sys")
+    b = make_cache_key("  saas   landing page for acme ", "m", "sys")
+    assert a == b
+    assert a != make_cache_key("saas landing page for acme", "other-model", "sys")
+    assert a != make_cache_key("saas landing page for acme", "m", "sys v2")
+
+
+def test_lru_eviction_and_counters():
+    cache = SchemaCache(max_entries=2, ttl=60, path=None)
+    cache.set("a", SCHEMA)
+    cache.set("b", SCHEMA)
+    assert cache.get("a") == SCHEMA  # a is now most recent
+    cache.set("c", SCHEMA)           # evicts b
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (1, 1, 1, 2)
+
+
+def test_ttl_expiry():
+    cache = SchemaCache(max_entries=4, ttl=-1, path=None)
+    cache.set("a", SCHEMA)
+    assert cache.get("a") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_persistence_roundtrip(tmp_path):
+    path = str(tmp_path / "schemas.json")
+    SchemaCache(max_entries=4, ttl=60, path=path, save_interval=0).set("a", SCHEMA)
+    assert SchemaCache(max_entries=4, ttl=60, path=path).get("a") == SCHEMA
+
+
+def test_saves_are_debounced_and_never_go_backwards(tmp_path):
+    path = str(tmp_path / "schemas.json")
+    cache = SchemaCache(max_entries=8, ttl=60, path=path, save_interval=60)
+    for key in "abc":
+        cache.set(key, SCHEMA)
+    assert cache.stats()["saves"] == 0  # gathered into the pending write
+    cache.flush()
+    cache.flush()  # nothing new: no rewrite
+    assert cache.stats()["saves"] == 1
+    assert SchemaCache(max_entries=8, ttl=60, path=path).get("c") == SCHEMA
+
+    writers = [threading.Thread(target=cache.set, args=(f"k{i}", SCHEMA)) for i in range(8)]
+    for t in writers:
+        t.start()
+    for t in writers:
+        t.join()
+    threads = [threading.Thread(target=cache.flush) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with open(path, encoding="utf-8") as f:
+        assert len(json.load(f)["entries"]) == 8  # the newest snapshot, whoever wrote last
+
+
+def test_generate_serves_repeat_prompt_from_cache(monkeypatch):
+    calls = []
+
+    def fake_ollama(prompt, timeout=None):
+        calls.append(prompt)
+        return json.dumps(SCHEMA)
+
+    monkeypatch.setattr(generate_route, "call_ollama_for_schema", fake_ollama)
+    monkeypatch.setattr(generate_route, "schema_cache", SchemaCache(max_entries=4, ttl=60, path=None))
+    client = flask_app.app.test_client()
+
+    first = client.post("/api/generate", json={"prompt": "Pricing page for Acme", "fast_path": False}).get_json()
+    second = client.post("/api/generate", json={"prompt": "pricing page for acme.", "fast_path": False}).get_json()
+    assert first["cached"] is False and second["cached"] is True
+    assert second["pages"] == first["pages"]
+    assert len(calls) == 1
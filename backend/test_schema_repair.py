@@ -0,0 +1,68 @@
+import json
+
+import routes.generate as generate_route
+from schema_cache import SchemaCache
+from schema_repair import normalize_component_name, repair_and_validate, repair_schema
+
+NEAR_VALID = {
+    "meta": {
+        "title": " Acme ",
+        "type": "Landing",
+        "theme": {"primaryColor": "abc123", "fontFamily": "Poppins, sans-serif", "borderRadius": "Round", "spacing": "loose"},
+    },
+    "pages": [{
+        "name": "Home",
+        "route": "home",
+        "sections": [{"component": "navbar", "props": {}}]
+                    + [{"component": "Features", "variant": "grid"} for _ in range(5)]
+                    + [{"component": "Footer", "variant": "default", "props": {}}],
+    }],
+}
+
+
+def test_repair_makes_near_valid_schema_valid():
+    result = repair_and_validate(json.dumps(NEAR_VALID))
+    assert result["success"], result["errors"]
+    schema = result["schema"]
+    assert schema["meta"]["theme"] == {
+        "primaryColor": "#abc123", "fontFamily": "poppins", "borderRadius": "rounded", "spacing": "relaxed",
+    }
+    assert schema["meta"]["type"] == "landing"
+    page = schema["pages"][0]
+    assert page["route"] == "/home"
+    assert len(page["sections"]) == 6 and page["sections"][-1]["component"] == "Footer"
+    assert page["sections"][0] == {"component": "Navbar", "variant": "default", "props": {}}
+    assert any("trimmed 7 → 6" in change for change in result["repairs"])
+
+
+def test_repair_leaves_unknown_values_for_the_validator():
+    data = {"meta": {"title": "x", "type": "blog", "theme": {}}, "pages": [{"sections": [{"component": "Carousel"}]}]}
+    repaired, _ = repair_schema(data)
+    assert repaired["meta"]["type"] == "blog"
+    assert repaired["pages"][0]["sections"][0]["component"] == "Carousel"
+    assert normalize_component_name("call to action") == "CTA"
+
+
+def test_valid_schema_needs_no_repairs():
+    data, changes = repair_schema(json.loads(json.dumps(NEAR_VALID)))
+    assert repair_schema(data)[1] == []
+    assert changes
+
+
+def test_llm_repair_only_when_local_repair_fails(monkeypatch):
+    bad = dict(NEAR_VALID, meta=dict(NEAR_VALID["meta"], type="blog"))
+    repair_calls = []
+
+    def fake_repair(prompt, raw, errors, timeout=None):
+        repair_calls.append(errors)
+        return json.dumps(NEAR_VALID)
+
+    monkeypatch.setattr(generate_route, "call_ollama_for_repair", fake_repair)
+    monkeypatch.setattr(generate_route, "schema_cache", SchemaCache())
+
+    assert generate_route.validate_with_repair("p", json.dumps(NEAR_VALID))["success"]
+    assert repair_calls == []
+
+    result = generate_route.validate_with_repair("p", json.dumps(bad))
+    assert result["success"] and result["llm_repair"] is True
+    assert len(repair_calls) == 1 and "meta → type" in repair_calls[0][0]
@@ -0,0 +1,199 @@
+import json
+
+import app as flask_app
+import routes.generate as generate_route
+from schema_cache import SchemaCache
+from schema_repair import stream_violation
+from schema_stream import SchemaStreamParser, SchemaViolation, extract_json_object
+
+SCHEMA = {
+    "meta": {
+        "title": "Acme",
+        "type": "landing",
+        "theme": {"primaryColor": "#6366f1", "fontFamily": "Inter", "borderRadius": "rounded", "spacing": "normal"},
+    },
+    "pages": [
+        {"name": "Home", "route": "/", "sections": [
+            {"component": "Hero", "variant": "centered", "props": {"headline": "Hi {there}"}},
+        ]},
+        {"name": "About", "route": "/about", "sections": [
+            {"component": "CTA", "variant": "default", "props": {"headline": "Quote \" and ] bracket"}},
+        ]},
+    ],
+}
+
+
+def _chunks(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_parser_emits_meta_and_pages_in_order():
+    raw = "Sure! ```json\n" + json.dumps(SCHEMA, indent=2) + "\n``` trailing chatter"
+    parser = SchemaStreamParser()
+    events = []
+    for chunk in _chunks(raw):
+        events.extend(parser.feed(chunk))
+
+    kinds = [(kind, path) for kind, path, _ in events]
+    assert kinds == [("meta", ("meta",)), ("page", ("pages", 0)), ("page", ("pages", 1)), ("done", ())]
+    assert events[1][2] == SCHEMA["pages"][0]
+    assert events[2][2] == SCHEMA["pages"][1]
+    assert json.loads(parser.json_text()) == SCHEMA
+
+
+def test_parser_ignores_nested_objects_inside_pages():
+    parser = SchemaStreamParser()
+    events = parser.feed(json.dumps(SCHEMA))
+    assert [kind for kind, _, _ in events].count("page") == 2
+
+
+def test_parser_restart_skips_braces_in_leading_chatter():
+    raw = 'Sure {here} it is: {"note": 1} ' + json.dumps(SCHEMA)
+    latched = SchemaStreamParser()
+    latched.feed(raw)
+    assert latched.json_text() == "{here}"
+
+    parser = SchemaStreamParser(restart=True)
+    events = []
+    for chunk in _chunks(raw):
+        events.extend(parser.feed(chunk))
+    assert [kind for kind, _, _ in events] == ["meta", "page", "page", "done"]
+    assert json.loads(parser.json_text()) == SCHEMA
+
+
+def test_schema_call_skips_chatter_without_format(monkeypatch):
+    monkeypatch.setattr(generate_route, "OLLAMA_FORMAT", "off")
+
+    def fake_stream(prompt, timeout=None):
+        yield from _chunks("Sure {here} it is: " + json.dumps(SCHEMA))
+
+    monkeypatch.setattr(generate_route, "stream_ollama_for_schema", fake_stream)
+    assert json.loads(generate_route.call_ollama_for_schema("landing page")) == SCHEMA
+
+
+def test_generate_stream_sends_pages_before_done(monkeypatch):
+    raw = json.dumps(SCHEMA)
+    monkeypatch.setattr(generate_route, "stream_ollama_for_schema", lambda prompt, timeout=None: (c for c in _chunks(raw, 5)))
+    monkeypatch.setattr(generate_route, "schema_cache", SchemaCache())
+
+    client = flask_app.app.test_client()
+    resp = client.post("/api/generate", json={"prompt": "landing page", "stream": True})
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/event-stream"
+
+    events = [block.split("\n")[0][len("event: "):] for block in resp.get_data(as_text=True).strip().split("\n\n")]
+    assert events == ["meta", "page", "page", "done"]
+
+
+def test_generate_stream_reports_invalid_schema(monkeypatch):
+    bad = dict(SCHEMA, pages=[{"name": "Home", "route": "/", "sections": []}])
+    monkeypatch.setattr(generate_route, "stream_ollama_for_schema", lambda prompt, timeout=None: (c for c in [json.dumps(bad)]))
+    monkeypatch.setattr(generate_route, "schema_cache", SchemaCache())
+    monkeypatch.setattr(generate_route, "SCHEMA_LLM_REPAIR", False)
+
+    client = flask_app.app.test_client()
+    body = client.post("/api/generate", json={"prompt": "x", "stream": True}).get_data(as_text=True)
+    last = body.strip().split("\n\n")[-1]
+    assert last.startswith("event: error")
+    assert json.loads(last.split("data: ", 1)[1])["status"] == 422
+
+    monkeypatch.setattr(generate_route, "stream_ollama_for_schema", lambda prompt, timeout=None: (c for c in ["  "]))
+    body = client.post("/api/generate", json={"prompt": "y", "stream": True}).get_data(as_text=True)
+    error = json.loads(body.strip().split("\n\n")[-1].split("data: ", 1)[1])
+    assert (error["message"], error["status"]) == (generate_route.MSG_EMPTY, 422)
+
+
+def test_generate_stream_pages_are_repaired_like_done(monkeypatch):
+    fixable = json.loads(json.dumps(SCHEMA))
+    fixable["meta"]["theme"]["primaryColor"] = "6366F1"
+    fixable["pages"][1]["route"] = "about"
+    fixable["pages"][1]["sections"][0]["component"] = "cta"
+    monkeypatch.setattr(generate_route, "stream_ollama_for_schema",
+                        lambda prompt, timeout=None: (c for c in _chunks(json.dumps(fixable), 5)))
+    monkeypatch.setattr(generate_route, "schema_cache", SchemaCache())
+
+    client = flask_app.app.test_client()
+    body = client.post("/api/generate", json={"prompt": "landing page", "stream": True}).get_data(as_text=True)
+    events = [(block.split("\n")[0][len("event: "):], json.loads(block.split("data: ", 1)[1]))
+              for block in body.strip().split("\n\n")]
+    assert [kind for kind, _ in events] == ["meta", "page", "page", "done"]
+    assert [data["page"]["route"] for kind, data in events if kind == "page"] == events[-1][1]["routes"]
+
+
+def test_extract_json_object_skips_chatter_and_fences():
+    text = 'Here you go {not json} ```json\n' + json.dumps(SCHEMA) + '\n``` and {"extra": 1}'
+    assert json.loads(extract_json_object(text)) == SCHEMA
+    assert extract_json_object('{"meta": {"title": "cut') is None
+
+
+def test_parser_check_rejects_unknown_component():
+    bad = json.loads(json.dumps(SCHEMA))
+    bad["pages"][1]["sections"][0]["component"] = "Carousel3D"
+    parser = SchemaStreamParser(check=stream_violation)
+    text = json.dumps(bad)
+    try:
+        for chunk in _chunks(text):
+            parser.feed(chunk)
+    except SchemaViolation as e:
+        assert "Carousel3D" in str(e)
+        assert e.path == ("pages", 1, "sections", 0, "component")
+        assert len(parser.text) < len(text)
+    else:
+        raise AssertionError("expected SchemaViolation")
+
+
+def test_parser_check_rejects_too_many_pages():
+    many = dict(SCHEMA, pages=SCHEMA["pages"] * 3)
+    parser = SchemaStreamParser(check=stream_violation)
+    try:
+        parser.feed(json.dumps(many))
+    except SchemaViolation as e:
+        assert e.path == ("pages", 5)
+    else:
+        raise AssertionError("expected SchemaViolation")
+
+
+def test_schema_call_reads_to_the_end_after_the_object(monkeypatch):
+    consumed = []
+    closed = []
+
+    def fake_stream(prompt, timeout=None):
+        try:
+            for chunk in _chunks(json.dumps(SCHEMA)) + ["\nExplanation: " + "x" * 500]:
+                consumed.append(chunk)
+                yield chunk
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(generate_route, "stream_ollama_for_schema", fake_stream)
+    raw = generate_route.call_ollama_for_schema("landing page")
+    assert json.loads(raw) == SCHEMA
+    # Drained to Ollama's done line so the connection can go back to the pool
+    assert consumed[-1].startswith("\nExplanation")
+    assert closed == [True]
+
+
+def test_generate_aborts_with_422_on_stream_violation(monkeypatch):
+    bad = json.loads(json.dumps(SCHEMA))
+    bad["pages"][0]["sections"][0]["component"] = "Carousel3D"
+    consumed = []
+
+    def fake_stream(prompt, timeout=None):
+        for chunk in _chunks(json.dumps(bad)):
+            consumed.append(chunk)
+            yield chunk
+
+    monkeypatch.setattr(generate_route, "stream_ollama_for_schema", fake_stream)
+    monkeypatch.setattr(generate_route, "schema_cache", SchemaCache())
+    monkeypatch.setattr(generate_route, "breaker", generate_route.CircuitBreaker(min_calls=1000))
+
+    client = flask_app.app.test_client()
+    resp = client.post("/api/generate", json={"prompt": "landing page", "fast_path": False})
+    assert resp.status_code == 422
+    assert "Carousel3D" in resp.get_json()["errors"][0]
+    assert len(consumed) < len(_chunks(json.dumps(bad)))
+
+    body = client.post("/api/generate", json={"prompt": "landing page", "fast_path": False, "stream": True})
+    last = body.get_data(as_text=True).strip().split("\n\n")[-1]
+    assert last.startswith("event: error")
+    assert json.loads(last.split("data: ", 1)[1])["status"] == 422
@@ -0,0 +1,123 @@
+import copy
+import json
+import random
+
+import pytest
+
+import schema_validator
+from benchmarks.corpus import schema_corpus
+from schema_validator import (
+    ALLOWED_COMPONENTS,
+    MAX_PAGES,
+    _validate_with_pydantic,
+    estimate_num_predict,
+    estimate_page_count,
+    output_json_schema,
+    validate_meta,
+    validate_page,
+    validate_schema_data,
+)
+
+
+def test_output_schema_mirrors_validator_constraints():
+    schema = output_json_schema()
+    assert "$ref" not in str(schema)
+    pages = schema["properties"]["pages"]
+    assert pages["maxItems"] == MAX_PAGES
+    component = pages["items"]["properties"]["sections"]["items"]["properties"]["component"]
+    assert set(component["enum"]) == ALLOWED_COMPONENTS
+
+
+def test_token_budget_scales_with_requested_pages():
+    assert estimate_page_count("landing page for a bakery") == 1
+    assert estimate_page_count("a three-page site") == 3
+    assert estimate_page_count("home page, about page and contact page") == 3
+    assert estimate_page_count("20 pages please") == MAX_PAGES
+    assert estimate_num_predict("landing page") < estimate_num_predict("a three-page site")
+    assert estimate_num_predict("landing page") < estimate_num_predict("landing page with parallax animation")
+
+
+# ─── fast path vs pydantic ───
+
+_ODD_VALUES = [None, 0, 1.5, True, "", "  ", "#fff", "#abcdef", "#12", "Inter", "INTER", "pill", "Pill",
+               "saas", "blog", "/", "about", "Hero", "hero", [], [1], {}, {"a": 1}, ("x",), b"bytes"]
+
+
+def _paths(node, path=()):
+    yield path
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from _paths(value, path + (key,))
+    elif isinstance(node, list):
+        for i, value in enumerate(node):
+            yield from _paths(value, path + (i,))
+
+
+def _mutate(schema, rng):
+    data = copy.deepcopy(schema)
+    for _ in range(rng.randint(1, 3)):
+        path = rng.choice([p for p in _paths(data) if p])
+        parent = data
+        for key in path[:-1]:
+            parent = parent[key]
+        action = rng.random()
+        if action < 0.2 and isinstance(parent, dict):
+            del parent[path[-1]]
+        elif action < 0.3 and isinstance(parent, dict):
+            parent["extra"] = "ignored"
+        elif action < 0.4 and isinstance(parent, list):
+            parent.extend(copy.deepcopy(parent[:1]) * rng.randint(1, 6))
+        elif action < 0.45 and isinstance(parent, list):
+            parent.clear()
+        else:
+            parent[path[-1]] = copy.deepcopy(rng.choice(_ODD_VALUES))
+    return data
+
+
+def _pydantic_only(data):
+    try:
+        return _validate_with_pydantic(data, "raw")
+    except TypeError:  # e.g. AppSchema(**data) with non-str keys
+        return None
+
+
+def test_fast_path_matches_pydantic_on_valid_schemas():
+    for size, schema in schema_corpus().items():
+        schema["meta"]["title"] = "  Padded  "
+        schema["meta"]["theme"]["fontFamily"] = "Poppins"
+        fast = validate_schema_data(schema, "raw")
+        assert fast == _validate_with_pydantic(schema, "raw"), size
+        assert fast["schema"]["pages"][0]["sections"][0]["props"] is not schema["pages"][0]["sections"][0]["props"]
+
+
+def test_fast_path_matches_pydantic_on_mutated_schemas():
+    rng = random.Random(1234)
+    corpus = list(schema_corpus().values())
+    checked = 0
+    for _ in range(1500):
+        data = _mutate(rng.choice(corpus), rng)
+        expected = _pydantic_only(data)
+        if expected is None:
+            continue
+        assert validate_schema_data(data, "raw") == expected, json.dumps(data, default=str)[:300]
+        checked += 1
+    assert checked > 1000
+
+
+def test_partial_validators_match_pydantic(monkeypatch):
+    rng = random.Random(99)
+    schema = schema_corpus()["typical"]
+    cases = [_mutate(schema, rng) for _ in range(300)]
+    parts = [(c.get("meta"), c["pages"][0] if isinstance(c.get("pages"), list) and c["pages"] else None)
+             for c in cases]
+    fast = [(validate_meta(meta), validate_page(page, 0)) for meta, page in parts]
+    monkeypatch.setattr(schema_validator, "SCHEMA_FAST_VALIDATE", False)
+    slow = [(validate_meta(meta), validate_page(page, 0)) for meta, page in parts]
+    assert fast == slow
+
+
+@pytest.mark.parametrize("value, expected", [(1, "1"), (1.5, "1.5")])
+def test_coercions_fall_back_to_pydantic(value, expected):
+    schema = schema_corpus()["small"]
+    schema["pages"][0]["name"] = value
+    assert validate_schema_data(schema)["schema"]["pages"][0]["name"] == expected
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    executions = []
+    release = threading.Event()
+
+    def work():
+        executions.append(1)
+        release.wait(2)
+        return {"ok": True}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    while flight.stats()["calls"] < 8:
+        time.sleep(0.005)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(executions) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert all(result == {"ok": True} for result, _ in results)
+    assert flight.stats()["deduplicated"] == 7
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_waiters_receive_the_leaders_error():
+    flight = SingleFlight()
+    started = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError("ollama down")
+
+    def follower():
+        started.wait()
+        try:
+            flight.do("k", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    t = threading.Thread(target=follower)
+    t.start()
+    with pytest.raises(RuntimeError):
+        flight.do("k", failing)
+    t.join()
+    assert errors == ["ollama down"]
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == (1, False)
+    assert flight.do("k", lambda: 2) == (2, False)
+
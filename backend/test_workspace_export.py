@@ -0,0 +1,127 @@
+import io
+import json
+import zipfile
+
+import app as flask_app
+import routes.export as export_route
+from benchmarks.corpus import make_schema
+from code_builder import build_app
+from workspace_export import REPORT_FILE, ExportProgress, project_build, workspace_zip_stream
+
+
+def _rows():
+    schema = make_schema(2, 4)
+    return [
+        {"id": "11111111-aaaa-4000-8000-000000000001", "name": "Stored",
+         "schema_json": schema, "pages_json": json.dumps(build_app(schema)["pages"])},
+        {"id": "22222222-aaaa-4000-8000-000000000002", "name": "Fresh",
+         "schema_json": json.dumps(make_schema(1, 3, seed=1)), "pages_json": None},
+        {"id": "33333333-aaaa-4000-8000-000000000003", "name": "Broken",
+         "schema_json": {"meta": {}}, "pages_json": None},
+    ]
+
+
+def _read(data):
+    zf = zipfile.ZipFile(io.BytesIO(data))
+    assert zf.testzip() is None
+    return {info.filename: zf.read(info).decode("utf-8") for info in zf.infolist()}
+
+
+def test_project_build_reuses_stored_pages_unless_rebuild():
+    row = _rows()[0]
+    row["pages_json"] = json.dumps({"/": {"name": "Home", "code": "stale"}})
+    assert project_build(row)["pages"]["/"]["code"] == "stale"
+    assert project_build(row, rebuild=True) == build_app(row["schema_json"])
+    assert project_build(row)["title"] == row["schema_json"]["meta"]["title"]
+
+
+def test_workspace_zip_has_a_folder_per_project_and_a_report():
+    progress = ExportProgress("ws", total=3)
+    files = _read(b"".join(workspace_zip_stream(iter(_rows()), progress)))
+
+    folders = {name.split("/")[0] for name in files if "/" in name}
+    assert len(folders) == 2
+    assert all(folder.endswith(("-11111111", "-22222222")) for folder in folders)
+    assert not any(name.startswith("Broken") for name in files)
+
+    report = json.loads(files[REPORT_FILE])
+    assert (report["exported"], report["failed"]) == (2, 1)
+    assert [p["status"] for p in report["projects"]] == ["ok", "ok", "failed"]
+
+    state = progress.to_dict()
+    assert (state["status"], state["done"], state["failed"], state["total"]) == ("done", 2, 1, 3)
+
+
+def test_malformed_stored_pages_are_rebuilt_or_reported():
+    schema = make_schema(1, 3)
+    rows = [
+        {"id": "44444444-aaaa-4000-8000-000000000004", "name": "Rebuilt",
+         "schema_json": schema, "pages_json": {"/": "not a page"}},
+        {"id": "55555555-aaaa-4000-8000-000000000005", "name": "Orphan",
+         "schema_json": None, "pages_json": {"/": ["nope"]}},
+    ]
+    assert project_build(rows[0]) == build_app(schema)
+
+    files = _read(b"".join(workspace_zip_stream(iter(rows))))
+    report = json.loads(files[REPORT_FILE])
+    assert [p["status"] for p in report["projects"]] == ["ok", "failed"]
+    assert any(name.startswith(report["projects"][0]["folder"] + "/pages/") for name in files)
+
+
+def test_workspace_zip_reads_rows_one_project_at_a_time():
+    pulled = []
+
+    def rows():
+        for row in _rows()[:2]:
+            pulled.append(row["id"])
+            yield row
+
+    stream = workspace_zip_stream(rows())
+    next(stream)
+    assert len(pulled) == 1
+    b"".join(stream)
+    assert len(pulled) == 2
+
+
+class _Conn:
+    closed = 0
+
+    def close(self):
+        self.closed += 1
+
+
+def test_workspace_export_route_is_off_unless_enabled(monkeypatch):
+    monkeypatch.setattr(export_route, "WORKSPACE_EXPORT_ENABLED", False)
+    opened = []
+    monkeypatch.setattr(export_route, "open_workspace", lambda workspace_id: opened.append(workspace_id))
+    client = flask_app.app.test_client()
+    assert client.get("/api/workspaces/0b6c3e2a-8f1d-4a57-9c1e-3d2f4b5a6c7d/export").status_code == 404
+    assert opened == []
+
+
+def test_workspace_export_route_streams_and_reports_progress(monkeypatch):
+    monkeypatch.setattr(export_route, "WORKSPACE_EXPORT_ENABLED", True)
+    conn = _Conn()
+    monkeypatch.setattr(export_route, "open_workspace", lambda workspace_id: (conn, 3))
+    monkeypatch.setattr(export_route, "stream_workspace",
+                        lambda c, workspace_id, progress, rebuild: workspace_zip_stream(_rows(), progress, rebuild))
+    client = flask_app.app.test_client()
+
+    resp = client.get("/api/workspaces/0b6c3e2a-8f1d-4a57-9c1e-3d2f4b5a6c7d/export")
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/zip"
+    assert REPORT_FILE in _read(resp.get_data())
+    resp.close()
+    assert conn.closed
+
+    progress = client.get(f"/api/exports/{resp.headers['X-Export-Id']}/progress").get_json()["progress"]
+    assert (progress["status"], progress["done"], progress["failed"]) == ("done", 2, 1)
+    assert client.get("/api/exports/nope/progress").status_code == 404
+
+
+def test_workspace_export_route_rejects_bad_ids(monkeypatch):
+    monkeypatch.setattr(export_route, "WORKSPACE_EXPORT_ENABLED", True)
+    client = flask_app.app.test_client()
+    assert client.get("/api/workspaces/not-a-uuid/export").status_code == 400
+    monkeypatch.setattr(export_route, "open_workspace", lambda workspace_id: (_Conn(), 0))
+    assert client.get("/api/workspaces/0b6c3e2a-8f1d-4a57-9c1e-3d2f4b5a6c7d/export").status_code == 404
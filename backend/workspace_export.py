@@ -0,0 +1,240 @@
+# /backend/workspace_export.py
+"""
+MechaStream — Workspace-wide bulk export.
+Every project of a workspace in one streaming ZIP, one folder per project,
+plus export-report.json. Rows come from `projects` through a server-side
+cursor and each project is built and compressed before the next row is
+read, so memory stays bounded however many projects the workspace has.
+Stored pages_json is reused when present and well-formed (unless
+rebuild), otherwise schema_json is validated and rebuilt. Progress is kept per export id and
+can be polled while the download runs.
+Config from env: WORKSPACE_EXPORT_ENABLED, WORKSPACE_EXPORT_BATCH_SIZE,
+WORKSPACE_EXPORT_TTL.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from code_builder import build_app, resolve_theme
+from exporter import project_files, project_folder, zip_stream_folders
+from schema_validator import validate_schema_data
+
+# Off until requests carry an authenticated user: the route can't yet check
+# that the caller belongs to the workspace or that their plan allows exports
+WORKSPACE_EXPORT_ENABLED = os.environ.get("WORKSPACE_EXPORT_ENABLED", "0").lower() in ("1", "true", "yes")
+# Rows per server-side cursor round trip (rows carry whole schemas and pages)
+WORKSPACE_EXPORT_BATCH_SIZE = int(os.environ.get("WORKSPACE_EXPORT_BATCH_SIZE", 20))
+# Seconds a finished export's progress stays readable
+WORKSPACE_EXPORT_TTL = int(os.environ.get("WORKSPACE_EXPORT_TTL", 3600))
+
+COUNT_SQL = "SELECT count(*) FROM projects WHERE workspace_id = %s::uuid"
+# Columns are table-qualified: a bare "id" in ORDER BY would sort by the text alias
+SELECT_SQL = (
+    "SELECT id::text AS id, name, schema_json, pages_json FROM projects"
+    " WHERE workspace_id = %s::uuid ORDER BY projects.created_at, projects.id"
+)
+
+REPORT_FILE = "export-report.json"
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# PROGRESS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class ExportProgress:
+    """Counters for one running export; updated by the stream, read by the progress route."""
+
+    def __init__(self, workspace_id: str = "", total: Optional[int] = None):
+        self.workspace_id = workspace_id
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.current: Optional[str] = None
+        self.error: Optional[str] = None
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def project_started(self, name: str) -> None:
+        with self._lock:
+            self.current = name
+
+    def project_done(self, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self.done += 1
+            else:
+                self.failed += 1
+            self.current = None
+
+    def finish(self, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.error = error
+            self.finished = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = (self.finished or time.time()) - self.started
+            processed = self.done + self.failed
+            return {
+                "workspace_id": self.workspace_id,
+                "status": "failed" if self.error else "done" if self.finished else "running",
+                "total": self.total,
+                "done": self.done,
+                "failed": self.failed,
+                "current": self.current,
+                "error": self.error,
+                "seconds": round(elapsed, 2),
+                "projects_per_sec": round(processed / elapsed, 2) if elapsed > 0 else 0.0,
+            }
+
+
+class ProgressRegistry:
+    """Export id -> ExportProgress, purged WORKSPACE_EXPORT_TTL seconds after each export ends."""
+
+    def __init__(self, ttl: float = WORKSPACE_EXPORT_TTL):
+        self.ttl = ttl
+        self._exports: Dict[str, ExportProgress] = {}
+        self._lock = threading.Lock()
+
+    def create(self, workspace_id: str, total: Optional[int] = None) -> Tuple[str, ExportProgress]:
+        self._purge()
+        export_id = uuid.uuid4().hex
+        progress = ExportProgress(workspace_id, total)
+        with self._lock:
+            self._exports[export_id] = progress
+        return export_id, progress
+
+    def get(self, export_id: str) -> Optional[ExportProgress]:
+        self._purge()
+        with self._lock:
+            return self._exports.get(export_id)
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for export_id in [k for k, p in self._exports.items() if p.finished and p.finished < cutoff]:
+                del self._exports[export_id]
+
+
+progress_registry = ProgressRegistry()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# BUILD
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _json_column(value: Any) -> Any:
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _stored_pages_usable(pages: Any) -> bool:
+    """pages_json in build_app()'s shape: {route: {"code": str, ...}}, as project_files reads it."""
+    return isinstance(pages, dict) and bool(pages) and all(
+        isinstance(route, str) and isinstance(page, dict) and isinstance(page.get("code", ""), str)
+        for route, page in pages.items()
+    )
+
+
+def project_build(row: Dict[str, Any], rebuild: bool = False) -> Dict[str, Any]:
+    """
+    build_app()-shaped result for one projects row. Reuses the stored
+    pages_json unless `rebuild` or it is missing or malformed. Raises
+    ValueError when the project has nothing exportable.
+    """
+    schema = _json_column(row.get("schema_json"))
+    pages = _json_column(row.get("pages_json"))
+    meta = (schema.get("meta") or {}) if isinstance(schema, dict) else {}
+
+    if not rebuild and _stored_pages_usable(pages):
+        return {
+            "success": True,
+            "title": meta.get("title") or row.get("name"),
+            "theme": resolve_theme(meta.get("theme") or {}),
+            "pages": pages,
+        }
+    if schema is None:
+        raise ValueError("Project has no schema")
+    result = validate_schema_data(schema)
+    if not result["success"]:
+        raise ValueError("; ".join(result["errors"][:3]))
+    return build_app(result["schema"])
+
+
+def workspace_folders(rows: Iterable[Dict[str, Any]], progress: ExportProgress,
+                      rebuild: bool = False) -> Iterator[Tuple[str, Iterable[Tuple[str, str]]]]:
+    """
+    (folder, files) per exportable project for zip_stream_folders, then
+    export-report.json at the archive root. A project that can't be built
+    is listed in the report instead of failing the whole export.
+    """
+    report: List[Dict[str, Any]] = []
+    for row in rows:
+        name = row.get("name") or row["id"]
+        progress.project_started(name)
+        try:
+            built = project_build(row, rebuild)
+        except (ValueError, TypeError, KeyError) as e:
+            report.append({"id": row["id"], "name": name, "status": "failed", "error": str(e)})
+            progress.project_done(ok=False)
+            continue
+        folder = project_folder(built, row["id"][:8])
+        report.append({"id": row["id"], "name": name, "status": "ok", "folder": folder,
+                       "pages": len(built["pages"])})
+        yield folder, project_files(built)
+        progress.project_done(ok=True)
+
+    summary = progress.to_dict()
+    yield "", [(REPORT_FILE, json.dumps({
+        "workspace_id": progress.workspace_id,
+        "exported": summary["done"],
+        "failed": summary["failed"],
+        "projects": report,
+    }, indent=2) + "\n")]
+
+
+def workspace_zip_stream(rows: Iterable[Dict[str, Any]], progress: Optional[ExportProgress] = None,
+                         rebuild: bool = False) -> Iterator[bytes]:
+    """The workspace archive as a stream of bytes; progress is finished when the stream ends."""
+    progress = progress or ExportProgress()
+    try:
+        yield from zip_stream_folders(workspace_folders(rows, progress, rebuild))
+    except Exception as e:
+        progress.finish(error=f"{type(e).__name__}: {e}")
+        raise
+    progress.finish()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# DATABASE
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def open_workspace(workspace_id: str):
+    """(connection, project count) for a workspace export. Caller closes the connection."""
+    from database.db import connect
+
+    conn = connect(application_name="mechastream-workspace-export")
+    try:
+        with conn.cursor() as cur:
+            cur.execute(COUNT_SQL, (workspace_id,))
+            total = cur.fetchone()[0]
+    except Exception:
+        conn.close()
+        raise
+    return conn, total
+
+
+def stream_workspace(conn, workspace_id: str, progress: ExportProgress, rebuild: bool = False,
+                     batch_size: int = WORKSPACE_EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """workspace_zip_stream over a server-side cursor on `conn`, which is closed at the end."""
+    from database.db import iter_rows
+
+    try:
+        rows = iter_rows(conn, SELECT_SQL, (workspace_id,), batch_size=batch_size)
+        yield from workspace_zip_stream(rows, progress, rebuild)
+    finally:
+        conn.close()